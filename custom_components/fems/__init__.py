@@ -2,36 +2,124 @@
 
 from __future__ import annotations
 
+import asyncio
+from functools import partial
 import logging
+import os
+
+import voluptuous as vol
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
-from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+)
+from homeassistant.exceptions import ConfigEntryNotReady, ServiceValidationError
 from homeassistant.helpers import config_validation as cv
 from homeassistant.helpers import device_registry as dr
 from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.service import async_register_admin_service
 
+from .chargers import charger_ids_from_entry
 from .const import (
-    CELLS_PER_MODULE,
+    ATTR_CONFIG_ENTRY_ID,
+    ATTR_FILENAME,
+    CAPTURE_DIRECTORY,
     CONF_BATTERY_MODULE_COUNT,
     CONF_ENABLE_CELL_VOLTAGES,
+    CONF_MODBUS_HOST,
+    CONF_REST_HOST,
     DEFAULT_BATTERY_MODULE_COUNT,
     DEFAULT_ENABLE_CELL_VOLTAGES,
     DOMAIN,
     MANUFACTURER,
-    MAX_BATTERY_MODULE_COUNT,
     MODEL,
     PLATFORMS,
+    SERVICE_DUMP_TRACES,
+    SERVICE_START_CAPTURE,
+    SERVICE_STOP_CAPTURE,
+    SIGNAL_OPTIONS_UPDATED,
 )
 from .coordinator import FemsDataUpdateCoordinator
 from .diagnostics_coordinator import FemsDiagnosticsCoordinator
+from .entity import CELL_DIAGNOSE_KEY_RE, CHARGER_KEY_RE, FemsDeviceInfos
+from .layout import BatteryLayout, battery_layout_from_entry
+from .ratelimit import async_release_rate_limiters
+from .scheduler import async_get_scheduler
+from .store import FemsSnapshotStore
 
 _LOGGER = logging.getLogger(__name__)
 
 CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
 
+START_CAPTURE_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Optional(ATTR_FILENAME): cv.string,
+    }
+)
+STOP_CAPTURE_SCHEMA = vol.Schema({vol.Required(ATTR_CONFIG_ENTRY_ID): cv.string})
+DUMP_TRACES_SCHEMA = STOP_CAPTURE_SCHEMA
+
+
+def _get_coordinator(hass: HomeAssistant, call: ServiceCall) -> FemsDataUpdateCoordinator:
+    """Return the main coordinator addressed by a service call."""
+    entry_id = call.data[ATTR_CONFIG_ENTRY_ID]
+    coordinator = hass.data.get(DOMAIN, {}).get(entry_id)
+    if not isinstance(coordinator, FemsDataUpdateCoordinator):
+        raise ServiceValidationError(f"FEMS config entry {entry_id} is not loaded")
+    return coordinator
+
+
+def _capture_path(hass: HomeAssistant, filename: str) -> str:
+    """Return the capture path for a bare file name in the capture directory."""
+    if filename in ("", ".", "..") or os.path.basename(filename) != filename:
+        raise ServiceValidationError(
+            f"Capture file name {filename!r} must not contain a directory"
+        )
+    return hass.config.path(CAPTURE_DIRECTORY, filename)
+
+
 async def async_setup(hass: HomeAssistant, config: dict) -> bool:
     """Set up the FEMS component."""
+
+    async def _async_start_capture(call: ServiceCall) -> None:
+        coordinator = _get_coordinator(hass, call)
+        path = _capture_path(
+            hass,
+            call.data.get(
+                ATTR_FILENAME,
+                f"fems_capture_{coordinator.entry.entry_id}.bin.gz",
+            ),
+        )
+        await hass.async_add_executor_job(
+            partial(os.makedirs, os.path.dirname(path), exist_ok=True)
+        )
+        await coordinator.async_start_capture(path)
+
+    async def _async_stop_capture(call: ServiceCall) -> None:
+        await _get_coordinator(hass, call).async_stop_capture()
+
+    async def _async_dump_traces(call: ServiceCall) -> ServiceResponse:
+        return {"traces": _get_coordinator(hass, call).tracer.as_list()}
+
+    # Aufzeichnungen schreiben Dateien, daher nur für Administratoren
+    async_register_admin_service(
+        hass, DOMAIN, SERVICE_START_CAPTURE, _async_start_capture, START_CAPTURE_SCHEMA
+    )
+    async_register_admin_service(
+        hass, DOMAIN, SERVICE_STOP_CAPTURE, _async_stop_capture, STOP_CAPTURE_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_DUMP_TRACES,
+        _async_dump_traces,
+        DUMP_TRACES_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
     return True
 
 
@@ -63,16 +151,40 @@ async def async_migrate_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     return True
 
 
-def _remove_entity_if_exists(
-    entity_registry: er.EntityRegistry,
-    unique_id: str,
-    domain: str = "sensor",
-) -> None:
-    """Remove entity from registry if it exists."""
-    entity_id = entity_registry.async_get_entity_id(domain, DOMAIN, unique_id)
-    if entity_id:
-        _LOGGER.debug("Removing stale entity: %s (%s)", entity_id, unique_id)
-        entity_registry.async_remove(entity_id)
+def _is_dynamic_unique_id(entry_id: str, unique_id: str) -> bool:
+    """Return True if the unique ID belongs to a dynamic entity."""
+    if not unique_id.startswith(f"{entry_id}_"):
+        return False
+    key = unique_id.removeprefix(f"{entry_id}_")
+    return bool(CELL_DIAGNOSE_KEY_RE.fullmatch(key) or CHARGER_KEY_RE.fullmatch(key))
+
+
+def _expected_dynamic_unique_ids(
+    entry_id: str,
+    layout: BatteryLayout,
+    enable_cell_voltages: bool,
+    charger_ids: tuple[int, ...] = (),
+) -> set[str]:
+    """Return unique IDs of all dynamic entities for the current options."""
+    expected = {
+        f"{entry_id}_charger{charger}_{channel}"
+        for charger in charger_ids
+        for channel in ("power", "voltage", "current")
+    }
+    expected |= {
+        f"{entry_id}_modul_{module}_spread"
+        if tower == 0
+        else f"{entry_id}_tower{tower}_modul_{module}_spread"
+        for tower, module in layout.modules()
+    }
+
+    if enable_cell_voltages:
+        expected.update(
+            f"{entry_id}_tower{tower}_module{module}_cell{cell:03d}_voltage"
+            for tower, module, cell in layout.cells()
+        )
+
+    return expected
 
 
 async def _async_cleanup_dynamic_entities(
@@ -82,39 +194,48 @@ async def _async_cleanup_dynamic_entities(
     """Remove stale dynamic entities after option changes."""
     entity_registry = er.async_get(hass)
 
-    module_count = entry.options.get(
-        CONF_BATTERY_MODULE_COUNT,
-        entry.data.get(CONF_BATTERY_MODULE_COUNT, DEFAULT_BATTERY_MODULE_COUNT),
-    )
     enable_cell_voltages = entry.options.get(
         CONF_ENABLE_CELL_VOLTAGES,
         entry.data.get(CONF_ENABLE_CELL_VOLTAGES, DEFAULT_ENABLE_CELL_VOLTAGES),
     )
 
-    # Modul-Spread-Entities oberhalb der konfigurierten Modulanzahl entfernen
-    for module in range(module_count, MAX_BATTERY_MODULE_COUNT):
-        unique_id = f"{entry.entry_id}_modul_{module}_spread"
-        _remove_entity_if_exists(entity_registry, unique_id)
-
-    # Zellspannungs-Entities entfernen, wenn deaktiviert
-    # oder wenn sie oberhalb der konfigurierten Modulanzahl liegen
-    for module in range(MAX_BATTERY_MODULE_COUNT):
-        remove_module_cells = (not enable_cell_voltages) or (module >= module_count)
+    expected = _expected_dynamic_unique_ids(
+        entry.entry_id,
+        battery_layout_from_entry(entry),
+        enable_cell_voltages,
+        charger_ids_from_entry(entry),
+    )
 
-        if not remove_module_cells:
-            continue
+    # Nur die tatsächlich registrierten Entities dieses Eintrags prüfen
+    stale_entity_ids = [
+        registry_entry.entity_id
+        for registry_entry in er.async_entries_for_config_entry(
+            entity_registry, entry.entry_id
+        )
+        if _is_dynamic_unique_id(entry.entry_id, registry_entry.unique_id)
+        and registry_entry.unique_id not in expected
+    ]
 
-        for cell in range(CELLS_PER_MODULE):
-            unique_id = (
-                f"{entry.entry_id}_tower0_module{module}_cell{cell:03d}_voltage"
-            )
-            _remove_entity_if_exists(entity_registry, unique_id)
+    for entity_id in stale_entity_ids:
+        _LOGGER.debug("Removing stale entity: %s", entity_id)
+        entity_registry.async_remove(entity_id)
 
 
 async def _async_update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
-    """Handle options update."""
+    """Apply options to the running integration without a reload."""
+    coordinator: FemsDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id]
+    diagnostics_coordinator: FemsDiagnosticsCoordinator = hass.data[DOMAIN][
+        f"{entry.entry_id}_diagnostics"
+    ]
+
+    coordinator.async_apply_options()
+    layout_changed = diagnostics_coordinator.async_apply_options()
+
     await _async_cleanup_dynamic_entities(hass, entry)
-    await hass.config_entries.async_reload(entry.entry_id)
+    async_dispatcher_send(hass, SIGNAL_OPTIONS_UPDATED.format(entry.entry_id))
+
+    if layout_changed:
+        await diagnostics_coordinator.async_request_refresh()
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
@@ -122,27 +243,81 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     await _async_cleanup_dynamic_entities(hass, entry)
 
     coordinator = FemsDataUpdateCoordinator(hass, entry)
-
-    try:
-        await coordinator.async_config_entry_first_refresh()
-    except Exception as err:
-        raise ConfigEntryNotReady(
-            f"Initial FEMS refresh failed: {err}"
-        ) from err
-
     diagnostics_coordinator = FemsDiagnosticsCoordinator(
         hass,
         entry,
         coordinator.rest_api,
+        coordinator.timings,
+        coordinator.pacer,
     )
 
-    try:
-        await diagnostics_coordinator.async_config_entry_first_refresh()
-    except Exception as err:
+    entry.async_on_unload(
+        partial(
+            async_release_rate_limiters,
+            hass,
+            (entry.data[CONF_REST_HOST], entry.data[CONF_MODBUS_HOST]),
+            entry.entry_id,
+        )
+    )
+
+    coordinator.device_infos = diagnostics_coordinator.device_infos = (
+        FemsDeviceInfos(entry.entry_id)
+    )
+
+    scheduler = async_get_scheduler(hass)
+    coordinator.schedule_slot = scheduler.async_register(
+        entry.entry_id, "data", coordinator, "cycle", "publish"
+    )
+    diagnostics_coordinator.schedule_slot = scheduler.async_register(
+        entry.entry_id,
+        "diagnostics",
+        diagnostics_coordinator,
+        "rest_cells",
+        "diagnostics_publish",
+    )
+    entry.async_on_unload(partial(scheduler.async_unregister, entry.entry_id))
+
+    main_restored, diagnostics_restored = await asyncio.gather(
+        coordinator.async_restore_snapshot(),
+        diagnostics_coordinator.async_restore_snapshot(),
+    )
+
+    first_refreshes = []
+
+    if main_restored:
+        _LOGGER.debug("Using restored FEMS snapshot until first live refresh")
+        entry.async_create_background_task(
+            hass,
+            coordinator.async_refresh(),
+            f"{DOMAIN}_{entry.entry_id}_first_refresh",
+        )
+    else:
+        first_refreshes.append(coordinator.async_config_entry_first_refresh())
+
+    # Diagnostics sind optional: ein Fehler blockiert das Setup nicht,
+    # der Coordinator startet leer und füllt sich beim nächsten Intervall.
+    if diagnostics_restored:
+        entry.async_create_background_task(
+            hass,
+            diagnostics_coordinator.async_refresh(),
+            f"{DOMAIN}_{entry.entry_id}_diagnostics_first_refresh",
+        )
+    else:
+        first_refreshes.append(diagnostics_coordinator.async_refresh())
+
+    results = await asyncio.gather(*first_refreshes, return_exceptions=True)
+
+    if not main_restored and isinstance(results[0], Exception):
+        err = results[0]
         raise ConfigEntryNotReady(
-            f"Initial FEMS diagnostics refresh failed: {err}"
+            f"Initial FEMS refresh failed: {err}"
         ) from err
 
+    if not diagnostics_restored and not diagnostics_coordinator.last_update_success:
+        _LOGGER.warning(
+            "Initial FEMS diagnostics refresh failed; continuing without cell data"
+        )
+
     hass.data.setdefault(DOMAIN, {})
     hass.data[DOMAIN][entry.entry_id] = coordinator
     hass.data[DOMAIN][f"{entry.entry_id}_diagnostics"] = diagnostics_coordinator
@@ -170,7 +345,15 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     )
 
     if unload_ok:
-        hass.data[DOMAIN].pop(entry.entry_id, None)
+        coordinator = hass.data[DOMAIN].pop(entry.entry_id, None)
+        if coordinator is not None:
+            await coordinator.async_stop_capture()
         hass.data[DOMAIN].pop(f"{entry.entry_id}_diagnostics", None)
 
-    return unload_ok
\ No newline at end of file
+    return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove persisted snapshots when a config entry is removed."""
+    for name in ("data", "diagnostics"):
+        await FemsSnapshotStore(hass, entry.entry_id, name).async_remove()
@@ -37,12 +37,20 @@ def _modbus_data_available(coordinator: FemsDataUpdateCoordinator) -> bool:
 
 def _rest_communication_ok(coordinator: FemsDataUpdateCoordinator) -> bool:
     """Return True if REST communication is available."""
-    return coordinator.last_update_success and _rest_data_available(coordinator)
+    return (
+        coordinator.last_update_success
+        and not coordinator.data.stale
+        and _rest_data_available(coordinator)
+    )
 
 
 def _modbus_communication_ok(coordinator: FemsDataUpdateCoordinator) -> bool:
     """Return True if Modbus communication is available."""
-    return coordinator.last_update_success and _modbus_data_available(coordinator)
+    return (
+        coordinator.last_update_success
+        and not coordinator.data.stale
+        and _modbus_data_available(coordinator)
+    )
 
 
 def _fault_active(coordinator: FemsDataUpdateCoordinator) -> bool:
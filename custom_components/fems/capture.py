@@ -0,0 +1,186 @@
+"""Record raw FEMS REST and Modbus traffic."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Iterator
+import gzip
+import logging
+from pathlib import Path
+import struct
+import time
+from typing import IO, NamedTuple
+
+_LOGGER = logging.getLogger(__name__)
+
+KIND_REST = 1
+KIND_MODBUS = 2
+
+MODBUS_OK = 0
+MODBUS_ERROR = 1
+
+# kind, wall clock timestamp, latency, status, key length, body length
+_FRAME_HEADER = struct.Struct(">BdfHHI")
+_GZIP_MAGIC = b"\x1f\x8b"
+
+
+class TrafficFrame(NamedTuple):
+    """One recorded request/response pair."""
+
+    kind: int
+    timestamp: float
+    latency: float
+    status: int
+    key: str
+    body: bytes
+
+
+def encode_frame(frame: TrafficFrame) -> bytes:
+    """Encode one frame as a length-prefixed record."""
+    key = frame.key.encode()
+    return (
+        _FRAME_HEADER.pack(
+            frame.kind,
+            frame.timestamp,
+            frame.latency,
+            frame.status,
+            len(key),
+            len(frame.body),
+        )
+        + key
+        + frame.body
+    )
+
+
+def decode_frames(stream: IO[bytes]) -> Iterator[TrafficFrame]:
+    """Decode frames until the end of the stream or a truncated record."""
+    while True:
+        header = stream.read(_FRAME_HEADER.size)
+        if len(header) < _FRAME_HEADER.size:
+            return
+
+        kind, timestamp, latency, status, key_length, body_length = (
+            _FRAME_HEADER.unpack(header)
+        )
+        payload = stream.read(key_length + body_length)
+        if len(payload) < key_length + body_length:
+            # Abgebrochener letzter Datensatz (z. B. Absturz während Aufnahme)
+            return
+
+        yield TrafficFrame(
+            kind,
+            timestamp,
+            latency,
+            status,
+            payload[:key_length].decode(),
+            payload[key_length:],
+        )
+
+
+def read_frames(path: str | Path) -> list[TrafficFrame]:
+    """Read all frames of a capture file, compressed or not."""
+    with open(path, "rb") as raw:
+        compressed = raw.read(2) == _GZIP_MAGIC
+        raw.seek(0)
+        stream: IO[bytes] = gzip.GzipFile(fileobj=raw) if compressed else raw
+        return list(decode_frames(stream))
+
+
+def modbus_key(function: str, address: int, count: int) -> str:
+    """Return the capture key of one Modbus read."""
+    return f"{function}/{address}/{count}"
+
+
+def pack_registers(registers: list[int]) -> bytes:
+    """Pack 16-bit registers for storage."""
+    return struct.pack(f">{len(registers)}H", *registers)
+
+
+def unpack_registers(body: bytes) -> list[int]:
+    """Unpack stored 16-bit registers."""
+    return list(struct.unpack(f">{len(body) // 2}H", body))
+
+
+class FemsTrafficRecorder:
+    """Append raw FEMS responses to a capture file."""
+
+    def __init__(self, path: str | Path, compress: bool | None = None) -> None:
+        """Initialize recorder; compression defaults to a ``.gz`` suffix."""
+        self.path = Path(path)
+        self.compress = self.path.suffix == ".gz" if compress is None else compress
+        self.frames = 0
+        self._file: IO[bytes] | None = None
+        self._lock = asyncio.Lock()
+
+    def _open(self) -> IO[bytes]:
+        """Open the capture file for appending."""
+        if self.compress:
+            # Jeder Start hängt ein neues gzip-Member an; gzip liest alle nacheinander
+            return gzip.open(self.path, "ab")
+        return open(self.path, "ab")  # noqa: SIM115
+
+    def _write(self, data: bytes) -> None:
+        """Write one encoded frame (executor)."""
+        if self._file is None:
+            self._file = self._open()
+        self._file.write(data)
+
+    def _close(self) -> None:
+        """Close the capture file (executor)."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    async def async_record(
+        self,
+        kind: int,
+        key: str,
+        status: int,
+        body: bytes,
+        latency: float,
+    ) -> None:
+        """Append one response to the capture file."""
+        data = encode_frame(
+            TrafficFrame(kind, time.time(), latency, status, key, body)
+        )
+        loop = asyncio.get_running_loop()
+
+        async with self._lock:
+            try:
+                await loop.run_in_executor(None, self._write, data)
+            except OSError as err:
+                _LOGGER.warning("Could not write FEMS capture %s: %s", self.path, err)
+                return
+            self.frames += 1
+
+    async def async_record_rest(
+        self,
+        channel_group: str,
+        status: int,
+        text: str,
+        latency: float,
+    ) -> None:
+        """Record one REST response."""
+        await self.async_record(KIND_REST, channel_group, status, text.encode(), latency)
+
+    async def async_record_modbus(
+        self,
+        function: str,
+        address: int,
+        count: int,
+        registers: list[int] | None,
+        latency: float,
+    ) -> None:
+        """Record one Modbus read; ``None`` registers mark a failed read."""
+        await self.async_record(
+            KIND_MODBUS,
+            modbus_key(function, address, count),
+            MODBUS_ERROR if registers is None else MODBUS_OK,
+            b"" if registers is None else pack_registers(registers),
+            latency,
+        )
+
+    async def async_close(self) -> None:
+        """Flush and close the capture file."""
+        async with self._lock:
+            await asyncio.get_running_loop().run_in_executor(None, self._close)
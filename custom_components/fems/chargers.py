@@ -0,0 +1,40 @@
+"""PV charger (MPPT) discovery for FEMS."""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+import re
+from typing import TYPE_CHECKING
+
+from .const import CONF_CHARGERS, DEFAULT_CHARGER_IDS
+
+if TYPE_CHECKING:
+    from homeassistant.config_entries import ConfigEntry
+
+CHARGER_CHANNELS = "(ActualPower|Voltage|Current)"
+# OpenEMS wertet auch die Komponenten-ID als Regex aus: alle Charger in einer
+# Abfrage, die zugleich neu hinzugekommene Charger erkennt
+CHARGER_GROUP = f"charger\\d+/{CHARGER_CHANNELS}"
+
+_CHARGER_ADDRESS_RE = re.compile(r"charger(\d+)/\w+")
+
+
+def charger_ids_from_channels(addresses: Iterable[str]) -> tuple[int, ...]:
+    """Return the sorted charger numbers found in REST addresses."""
+    return tuple(
+        sorted(
+            {
+                int(match.group(1))
+                for address in addresses
+                if (match := _CHARGER_ADDRESS_RE.fullmatch(address))
+            }
+        )
+    )
+
+
+def charger_ids_from_entry(entry: ConfigEntry) -> tuple[int, ...]:
+    """Return the chargers stored in a config entry.
+
+    Entries created before discovery fall back to charger0 and charger1.
+    """
+    return tuple(entry.data.get(CONF_CHARGERS, DEFAULT_CHARGER_IDS))
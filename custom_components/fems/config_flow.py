@@ -3,40 +3,51 @@
 from __future__ import annotations
 
 import asyncio
+import ipaddress
 import logging
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 import aiohttp
 import voluptuous as vol
-from pymodbus.client import AsyncModbusTcpClient
 
 from homeassistant import config_entries
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.data_entry_flow import FlowResult
+from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
 
 from .const import (
     CONF_BATTERY_MODULE_COUNT,
+    CONF_BATTERY_TOWER_COUNT,
+    CONF_CELLS_PER_MODULE,
+    CONF_CHARGERS,
+    CONF_DETECT_LOOP_BLOCKING,
     CONF_DIAGNOSTICS_INTERVAL,
     CONF_ENABLE_CELL_VOLTAGES,
     CONF_MODBUS_HOST,
     CONF_MODBUS_PORT,
     CONF_MODBUS_SLAVE,
     CONF_PASSWORD,
+    CONF_RESCAN_BATTERY_LAYOUT,
+    CONF_RESCAN_CHARGERS,
     CONF_REST_HOST,
     CONF_REST_PORT,
     CONF_SCAN_INTERVAL,
     CONF_USERNAME,
+    DATA_MODBUS_CLIENTS,
     DEFAULT_BATTERY_MODULE_COUNT,
+    DEFAULT_BATTERY_TOWER_COUNT,
+    DEFAULT_CELLS_PER_MODULE,
+    DEFAULT_DETECT_LOOP_BLOCKING,
     DEFAULT_DIAGNOSTICS_INTERVAL,
     DEFAULT_ENABLE_CELL_VOLTAGES,
     DEFAULT_MODBUS_PORT,
     DEFAULT_MODBUS_SLAVE,
     DEFAULT_REST_PORT,
     DEFAULT_SCAN_INTERVAL,
+    DEFAULT_SUBNET,
     DOMAIN,
-    MAX_BATTERY_MODULE_COUNT,
     MAX_DIAGNOSTICS_INTERVAL,
     MAX_SCAN_INTERVAL,
     MIN_BATTERY_MODULE_COUNT,
@@ -45,9 +56,24 @@ from .const import (
     MODBUS_TIMEOUT,
     REST_TIMEOUT,
 )
+from .discovery import DiscoveredFems, async_discover_fems, subnet_hosts
+from .fems_modbus import async_get_client_class, modbus_client_key
+from .layout import (
+    CELL_PROBE_CHANNEL,
+    BatteryLayout,
+    async_detect_battery_layout,
+    battery_layout_from_channels,
+)
+from .ratelimit import async_get_rate_limiter, async_release_rate_limiters
+
+if TYPE_CHECKING:
+    from pymodbus.client import AsyncModbusTcpClient
 
 _LOGGER = logging.getLogger(__name__)
 
+CONF_SUBNET = "subnet"
+CONF_HOST = "host"
+
 
 class CannotConnect(Exception):
     """Error to indicate we cannot connect."""
@@ -67,12 +93,18 @@ async def _validate_rest(
     port: int,
     username: str,
     password: str,
-) -> None:
-    """Validate REST connectivity and authentication."""
+) -> BatteryLayout | None:
+    """Validate REST connectivity and authentication.
+
+    The same query probes the first cell of every module, so the battery
+    layout is returned without a second request (None if not reported).
+    """
     session = async_get_clientsession(hass)
+    await async_get_rate_limiter(hass, host).rest.async_acquire()
     url = (
         f"http://{host}:{port}/rest/channel/"
-        "battery0/(Soc|Soh|State|StatusFault|StatusWarning|StatusAlarm)"
+        "battery0/(Soc|Soh|State|StatusFault|StatusWarning|StatusAlarm|"
+        f"{CELL_PROBE_CHANNEL})"
     )
 
     try:
@@ -108,6 +140,13 @@ async def _validate_rest(
                     )
                     raise CannotConnect
 
+                items = payload if isinstance(payload, list) else [payload]
+                return battery_layout_from_channels(
+                    item["address"]
+                    for item in items
+                    if isinstance(item, dict) and "address" in item
+                )
+
     except InvalidAuth:
         raise
     except TimeoutError as err:
@@ -124,19 +163,25 @@ async def _validate_rest(
 
 
 async def _validate_modbus(
+    hass: HomeAssistant,
     host: str,
     port: int,
     slave: int,
-) -> None:
-    """Validate Modbus connectivity."""
-    client: AsyncModbusTcpClient | None = None
+) -> AsyncModbusTcpClient:
+    """Validate Modbus connectivity and return the connected client."""
+    client = None
+    validated = False
+    rate_limit = async_get_rate_limiter(hass, host).modbus
 
     try:
         async with asyncio.timeout(MODBUS_TIMEOUT):
-            client = AsyncModbusTcpClient(
+            client_class = await async_get_client_class(hass)
+            client = client_class(
                 host=host,
                 port=port,
                 timeout=MODBUS_TIMEOUT,
+                # Der Client wird an FemsModbusApi übergeben, die selbst neu verbindet
+                reconnect_delay=0,
             )
 
             connected = await client.connect()
@@ -151,6 +196,7 @@ async def _validate_modbus(
             if not connected:
                 raise ModbusConnectionError
 
+            await rate_limit.async_acquire()
             result = await client.read_input_registers(
                 address=302,
                 count=1,
@@ -162,6 +208,8 @@ async def _validate_modbus(
             if result is None or result.isError():
                 raise ModbusConnectionError
 
+            validated = True
+
     except TimeoutError as err:
         _LOGGER.debug("Modbus probe timeout: %r", err)
         raise ModbusConnectionError from err
@@ -171,31 +219,103 @@ async def _validate_modbus(
         _LOGGER.exception("Unexpected Modbus validation error")
         raise ModbusConnectionError from err
     finally:
-        if client is not None:
-            try:
-                client.close()
-            except Exception:  # noqa: BLE001
-                _LOGGER.debug("Ignoring Modbus client close error", exc_info=True)
+        if not validated:
+            _close_modbus_client(client)
+
+    return client
+
+
+def _close_modbus_client(client: AsyncModbusTcpClient | None) -> None:
+    """Close a probe client, ignoring errors."""
+    if client is None:
+        return
+    try:
+        client.close()
+    except Exception:  # noqa: BLE001
+        _LOGGER.debug("Ignoring Modbus client close error", exc_info=True)
+
+
+def _probe_result(task: asyncio.Task[Any]) -> Any:
+    """Return the result or error of a probe, None if it was cancelled."""
+    if task.cancelled():
+        return None
+    return task.exception() or task.result()
 
 
 async def _validate_input(
     hass: HomeAssistant,
     data: dict[str, Any],
-) -> None:
-    """Validate the user input allows us to connect."""
-    await _validate_rest(
-        hass=hass,
-        host=data[CONF_REST_HOST],
-        port=int(data[CONF_REST_PORT]),
-        username=data.get(CONF_USERNAME, "x"),
-        password=data.get(CONF_PASSWORD, "user"),
+) -> tuple[dict[str, str], AsyncModbusTcpClient | None, BatteryLayout | None]:
+    """Probe REST and Modbus concurrently.
+
+    Once one probe fails the other is cancelled, so only the failed field
+    is reported. Returns the errors per form field, the connected Modbus
+    client for the runtime API to take over (if both probes passed) and
+    the battery layout reported by the REST probe.
+    """
+    rest_task = asyncio.create_task(
+        _validate_rest(
+            hass=hass,
+            host=data[CONF_REST_HOST],
+            port=int(data[CONF_REST_PORT]),
+            username=data.get(CONF_USERNAME, "x"),
+            password=data.get(CONF_PASSWORD, "user"),
+        )
     )
-
-    await _validate_modbus(
-        host=data[CONF_MODBUS_HOST],
-        port=int(data[CONF_MODBUS_PORT]),
-        slave=int(data[CONF_MODBUS_SLAVE]),
+    modbus_task = asyncio.create_task(
+        _validate_modbus(
+            hass=hass,
+            host=data[CONF_MODBUS_HOST],
+            port=int(data[CONF_MODBUS_PORT]),
+            slave=int(data[CONF_MODBUS_SLAVE]),
+        )
     )
+    tasks = (rest_task, modbus_task)
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+    finally:
+        # Abgebrochene Modbus-Prüfung schließt ihren Client selbst
+        pending = [task for task in tasks if not task.done()]
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.wait(pending)
+    rest_result = _probe_result(rest_task)
+    modbus_result = _probe_result(modbus_task)
+    client = None if isinstance(modbus_result, BaseException) else modbus_result
+
+    errors: dict[str, str] = {}
+    if isinstance(rest_result, InvalidAuth):
+        errors[CONF_PASSWORD] = "invalid_auth"
+    elif isinstance(rest_result, CannotConnect):
+        errors[CONF_REST_HOST] = "cannot_connect"
+    elif isinstance(rest_result, BaseException):
+        _close_modbus_client(client)
+        raise rest_result
+
+    if isinstance(modbus_result, ModbusConnectionError):
+        errors[CONF_MODBUS_HOST] = "cannot_connect_modbus"
+    elif isinstance(modbus_result, BaseException):
+        raise modbus_result
+
+    if errors:
+        _close_modbus_client(client)
+        return errors, None, None
+
+    return errors, client, rest_result
+
+
+def _discovered_label(result: DiscoveredFems) -> str:
+    """Describe a discovered host with its probe latencies."""
+    parts = [
+        f"{name} {latency * 1000:.0f} ms"
+        for name, latency in (
+            ("REST", result.rest_latency),
+            ("Modbus", result.modbus_latency),
+        )
+        if latency is not None
+    ]
+    return f"{result.host} ({', '.join(parts)})"
 
 
 class FemsConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
@@ -203,21 +323,172 @@ class FemsConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
     VERSION = 2
 
+    def __init__(self) -> None:
+        """Initialize the config flow."""
+        self._discovery_input: dict[str, Any] = {}
+        self._discovered: list[DiscoveredFems] = []
+        self._suggested: dict[str, Any] = {}
+        # Übergebener Modbus-Client, bis das Setup ihn übernommen hat
+        self._parked_client: tuple[str, AsyncModbusTcpClient] | None = None
+        # Geprüfte Hosts, deren Limiter ohne Eintrag wieder entfallen
+        self._probed_hosts: set[str] = set()
+
+    @callback
+    def async_remove(self) -> None:
+        """Release probe resources the entry setup did not take over."""
+        async_release_rate_limiters(self.hass, self._probed_hosts)
+        if self._parked_client is None:
+            return
+        key, client = self._parked_client
+        self._parked_client = None
+        parked = self.hass.data.get(DATA_MODBUS_CLIENTS, {})
+        if parked.get(key) is client:
+            # Flow abgebrochen oder Setup nicht gestartet
+            del parked[key]
+            _close_modbus_client(client)
+
     async def async_step_user(
         self,
         user_input: dict[str, Any] | None = None,
     ) -> FlowResult:
-        """Handle the initial step."""
+        """Let the user choose between a subnet scan and manual entry."""
+        if user_input is not None:
+            return await self.async_step_manual(user_input)
+
+        return self.async_show_menu(
+            step_id="user",
+            menu_options=["discovery", "manual"],
+        )
+
+    async def async_step_discovery(
+        self,
+        user_input: dict[str, Any] | None = None,
+    ) -> FlowResult:
+        """Scan a subnet for hosts answering like a FEMS."""
         errors: dict[str, str] = {}
 
         if user_input is not None:
             try:
-                await _validate_input(self.hass, user_input)
+                hosts = subnet_hosts(user_input[CONF_SUBNET])
+            except ValueError:
+                errors[CONF_SUBNET] = "invalid_subnet"
+            else:
+                self._discovery_input = user_input
+                configured = self._async_current_ids()
+                self._discovered = [
+                    result
+                    for result in await async_discover_fems(
+                        async_get_clientsession(self.hass),
+                        hosts,
+                        rest_port=user_input[CONF_REST_PORT],
+                        modbus_port=user_input[CONF_MODBUS_PORT],
+                        slave=user_input[CONF_MODBUS_SLAVE],
+                    )
+                    if f"{result.host}:{user_input[CONF_REST_PORT]}" not in configured
+                ]
+                if self._discovered:
+                    return await self.async_step_pick_device()
+                errors["base"] = "no_devices_found"
 
-                await self.async_set_unique_id(
-                    f"{user_input[CONF_REST_HOST]}:{user_input[CONF_REST_PORT]}"
-                )
-                self._abort_if_unique_id_configured()
+        schema = vol.Schema(
+            {
+                vol.Required(
+                    CONF_SUBNET,
+                    default=await self._async_default_subnet(),
+                ): str,
+                vol.Required(CONF_REST_PORT, default=DEFAULT_REST_PORT): int,
+                vol.Required(CONF_MODBUS_PORT, default=DEFAULT_MODBUS_PORT): int,
+                vol.Required(CONF_MODBUS_SLAVE, default=DEFAULT_MODBUS_SLAVE): int,
+            }
+        )
+
+        return self.async_show_form(
+            step_id="discovery",
+            data_schema=self.add_suggested_values_to_schema(
+                schema, user_input or {}
+            ),
+            errors=errors,
+        )
+
+    async def async_step_pick_device(
+        self,
+        user_input: dict[str, Any] | None = None,
+    ) -> FlowResult:
+        """Offer the discovered hosts, fastest first."""
+        if user_input is not None:
+            host = user_input[CONF_HOST]
+            self._suggested = {
+                CONF_REST_HOST: host,
+                CONF_REST_PORT: self._discovery_input[CONF_REST_PORT],
+                CONF_MODBUS_HOST: host,
+                CONF_MODBUS_PORT: self._discovery_input[CONF_MODBUS_PORT],
+                CONF_MODBUS_SLAVE: self._discovery_input[CONF_MODBUS_SLAVE],
+            }
+            return await self.async_step_manual()
+
+        hosts = {
+            result.host: _discovered_label(result) for result in self._discovered
+        }
+        return self.async_show_form(
+            step_id="pick_device",
+            data_schema=vol.Schema({vol.Required(CONF_HOST): vol.In(hosts)}),
+        )
+
+    async def _async_default_subnet(self) -> str:
+        """Return the /24 of the Home Assistant host as scan default."""
+        # Lazy Import: network wird nur für den Vorschlag gebraucht
+        from homeassistant.components.network import (  # noqa: PLC0415
+            async_get_source_ip,
+        )
+
+        try:
+            source_ip = await async_get_source_ip(self.hass)
+        except (HomeAssistantError, OSError):
+            return DEFAULT_SUBNET
+
+        return str(ipaddress.ip_network(f"{source_ip}/24", strict=False))
+
+    async def async_step_manual(
+        self,
+        user_input: dict[str, Any] | None = None,
+    ) -> FlowResult:
+        """Handle manual entry of the connection settings."""
+        errors: dict[str, str] = {}
+
+        if user_input is not None:
+            # Erst auf Duplikat prüfen, dann proben: kein offener Client bei Abbruch
+            await self.async_set_unique_id(
+                f"{user_input[CONF_REST_HOST]}:{user_input[CONF_REST_PORT]}"
+            )
+            self._abort_if_unique_id_configured()
+
+            self._probed_hosts.update(
+                (user_input[CONF_REST_HOST], user_input[CONF_MODBUS_HOST])
+            )
+            try:
+                errors, client, layout = await _validate_input(self.hass, user_input)
+            except Exception:  # noqa: BLE001
+                _LOGGER.exception("Unexpected exception during config flow")
+                errors["base"] = "unknown"
+
+            if not errors:
+                if client is not None:
+                    # Die geprüfte Verbindung übernimmt der Coordinator beim Setup
+                    key = modbus_client_key(
+                        user_input[CONF_MODBUS_HOST],
+                        int(user_input[CONF_MODBUS_PORT]),
+                        int(user_input[CONF_MODBUS_SLAVE]),
+                    )
+                    self.hass.data.setdefault(DATA_MODBUS_CLIENTS, {})[key] = client
+                    self._parked_client = (key, client)
+
+                # Erkannte Aufteilung hat Vorrang vor der Eingabe
+                if layout is None:
+                    layout = BatteryLayout(
+                        tower_count=DEFAULT_BATTERY_TOWER_COUNT,
+                        module_count=int(user_input[CONF_BATTERY_MODULE_COUNT]),
+                        cells_per_module=DEFAULT_CELLS_PER_MODULE,
+                    )
 
                 return self.async_create_entry(
                     title=f"FEMS ({user_input[CONF_REST_HOST]})",
@@ -227,32 +498,24 @@ class FemsConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                         CONF_MODBUS_HOST: user_input[CONF_MODBUS_HOST],
                         CONF_MODBUS_PORT: int(user_input[CONF_MODBUS_PORT]),
                         CONF_MODBUS_SLAVE: int(user_input[CONF_MODBUS_SLAVE]),
-                        CONF_BATTERY_MODULE_COUNT: int(
-                            user_input[CONF_BATTERY_MODULE_COUNT]
-                        ),
+                        CONF_BATTERY_MODULE_COUNT: layout.module_count,
+                        CONF_BATTERY_TOWER_COUNT: layout.tower_count,
+                        CONF_CELLS_PER_MODULE: layout.cells_per_module,
+                        # Charger erkennt der Coordinator im Betrieb
+                        CONF_CHARGERS: [],
                         CONF_USERNAME: user_input.get(CONF_USERNAME, "x"),
                         CONF_PASSWORD: user_input.get(CONF_PASSWORD, "user"),
                     },
                     options={
                         CONF_SCAN_INTERVAL: DEFAULT_SCAN_INTERVAL,
                         CONF_DIAGNOSTICS_INTERVAL: DEFAULT_DIAGNOSTICS_INTERVAL,
-                        CONF_BATTERY_MODULE_COUNT: int(
-                            user_input[CONF_BATTERY_MODULE_COUNT]
-                        ),
+                        CONF_BATTERY_MODULE_COUNT: layout.module_count,
+                        CONF_BATTERY_TOWER_COUNT: layout.tower_count,
+                        CONF_CELLS_PER_MODULE: layout.cells_per_module,
                         CONF_ENABLE_CELL_VOLTAGES: DEFAULT_ENABLE_CELL_VOLTAGES,
                     },
                 )
 
-            except InvalidAuth:
-                errors["base"] = "invalid_auth"
-            except ModbusConnectionError:
-                errors["base"] = "cannot_connect_modbus"
-            except CannotConnect:
-                errors["base"] = "cannot_connect"
-            except Exception:  # noqa: BLE001
-                _LOGGER.exception("Unexpected exception during config flow")
-                errors["base"] = "unknown"
-
         schema = vol.Schema(
             {
                 vol.Required(CONF_REST_HOST): str,
@@ -265,10 +528,7 @@ class FemsConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                     default=DEFAULT_BATTERY_MODULE_COUNT,
                 ): vol.All(
                     vol.Coerce(int),
-                    vol.Range(
-                        min=MIN_BATTERY_MODULE_COUNT,
-                        max=MAX_BATTERY_MODULE_COUNT,
-                    ),
+                    vol.Range(min=MIN_BATTERY_MODULE_COUNT),
                 ),
                 vol.Optional(CONF_USERNAME, default="x"): str,
                 vol.Optional(CONF_PASSWORD, default="user"): str,
@@ -276,8 +536,10 @@ class FemsConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         )
 
         return self.async_show_form(
-            step_id="user",
-            data_schema=schema,
+            step_id="manual",
+            data_schema=self.add_suggested_values_to_schema(
+                schema, user_input or self._suggested
+            ),
             errors=errors,
         )
 
@@ -299,8 +561,31 @@ class FemsOptionsFlow(config_entries.OptionsFlow):
         user_input: dict[str, Any] | None = None,
     ) -> FlowResult:
         """Manage the options."""
+        errors: dict[str, str] = {}
+
         if user_input is not None:
-            return self.async_create_entry(title="", data=user_input)
+            options = dict(user_input)
+            rescan = options.pop(CONF_RESCAN_BATTERY_LAYOUT, False)
+            rescan_chargers = options.pop(CONF_RESCAN_CHARGERS, False)
+            # Erkannte Werte ohne Formularfeld beibehalten
+            for key in (CONF_BATTERY_TOWER_COUNT, CONF_CELLS_PER_MODULE):
+                if key in self._config_entry.options:
+                    options[key] = self._config_entry.options[key]
+
+            if rescan:
+                layout = await self._async_rescan_battery_layout()
+                if layout is None:
+                    errors["base"] = "layout_not_detected"
+                else:
+                    options[CONF_BATTERY_MODULE_COUNT] = layout.module_count
+                    options[CONF_BATTERY_TOWER_COUNT] = layout.tower_count
+                    options[CONF_CELLS_PER_MODULE] = layout.cells_per_module
+
+            if rescan_chargers and not await self._async_rescan_chargers():
+                errors["base"] = "chargers_not_detected"
+
+            if not errors:
+                return self.async_create_entry(title="", data=options)
 
         current_scan_interval = self._config_entry.options.get(
             CONF_SCAN_INTERVAL,
@@ -327,6 +612,10 @@ class FemsOptionsFlow(config_entries.OptionsFlow):
                 DEFAULT_ENABLE_CELL_VOLTAGES,
             ),
         )
+        current_detect_loop_blocking = self._config_entry.options.get(
+            CONF_DETECT_LOOP_BLOCKING,
+            DEFAULT_DETECT_LOOP_BLOCKING,
+        )
 
         schema = vol.Schema(
             {
@@ -352,19 +641,37 @@ class FemsOptionsFlow(config_entries.OptionsFlow):
                     default=current_battery_module_count,
                 ): vol.All(
                     vol.Coerce(int),
-                    vol.Range(
-                        min=MIN_BATTERY_MODULE_COUNT,
-                        max=MAX_BATTERY_MODULE_COUNT,
-                    ),
+                    vol.Range(min=MIN_BATTERY_MODULE_COUNT),
                 ),
                 vol.Required(
                     CONF_ENABLE_CELL_VOLTAGES,
                     default=current_enable_cell_voltages,
                 ): bool,
+                vol.Required(
+                    CONF_DETECT_LOOP_BLOCKING,
+                    default=current_detect_loop_blocking,
+                ): bool,
+                vol.Optional(CONF_RESCAN_BATTERY_LAYOUT, default=False): bool,
+                vol.Optional(CONF_RESCAN_CHARGERS, default=False): bool,
             }
         )
 
         return self.async_show_form(
             step_id="init",
             data_schema=schema,
-        )
\ No newline at end of file
+            errors=errors,
+        )
+
+    async def _async_rescan_battery_layout(self) -> BatteryLayout | None:
+        """Probe the battery layout through the running REST client."""
+        coordinator = self.hass.data.get(DOMAIN, {}).get(self._config_entry.entry_id)
+        if coordinator is None:
+            return None
+        return await async_detect_battery_layout(coordinator.rest_api)
+
+    async def _async_rescan_chargers(self) -> bool:
+        """Replace the stored chargers with the ones the device reports now."""
+        coordinator = self.hass.data.get(DOMAIN, {}).get(self._config_entry.entry_id)
+        if coordinator is None:
+            return False
+        return await coordinator.async_rescan_chargers()
@@ -12,34 +12,106 @@ CONF_USERNAME = "username"
 CONF_PASSWORD = "password"
 CONF_MODBUS_SLAVE = "modbus_slave"
 CONF_BATTERY_MODULE_COUNT = "battery_module_count"
+CONF_BATTERY_TOWER_COUNT = "battery_tower_count"
+CONF_CELLS_PER_MODULE = "cells_per_module"
+CONF_CHARGERS = "chargers"
+CONF_RESCAN_BATTERY_LAYOUT = "rescan_battery_layout"
+CONF_RESCAN_CHARGERS = "rescan_chargers"
 CONF_SCAN_INTERVAL = "scan_interval"
 CONF_DIAGNOSTICS_INTERVAL = "diagnostics_interval"
 CONF_ENABLE_CELL_VOLTAGES = "enable_cell_voltages"
+CONF_DETECT_LOOP_BLOCKING = "detect_loop_blocking"
 
 DEFAULT_REST_PORT = 8084
 DEFAULT_MODBUS_PORT = 502
 DEFAULT_MODBUS_SLAVE = 1
 DEFAULT_BATTERY_MODULE_COUNT = 7
+DEFAULT_BATTERY_TOWER_COUNT = 1
+DEFAULT_CELLS_PER_MODULE = 14
+DEFAULT_CHARGER_IDS = (0, 1)
+# Ein Charger wird erst entfernt, wenn er so viele Zyklen am Stück fehlt
+CHARGER_MISSING_CYCLES = 5
 DEFAULT_SCAN_INTERVAL = 30
 DEFAULT_DIAGNOSTICS_INTERVAL = 60
 DEFAULT_ENABLE_CELL_VOLTAGES = True
+DEFAULT_DETECT_LOOP_BLOCKING = False
 
 MIN_BATTERY_MODULE_COUNT = 1
-MAX_BATTERY_MODULE_COUNT = 10
 MIN_SCAN_INTERVAL = 5
 MAX_SCAN_INTERVAL = 300
 MIN_DIAGNOSTICS_INTERVAL = 10
 MAX_DIAGNOSTICS_INTERVAL = 600
-CELLS_PER_MODULE = 14
+# Zellspannungen werden modulweise über das Diagnostics-Intervall verteilt,
+# höchstens eine Abfrage je so viele Sekunden
+MIN_DIAGNOSTICS_SHARD_INTERVAL = 5
 
 REST_TIMEOUT = 20
 MODBUS_TIMEOUT = 10
 
+# Token Bucket je Host, geteilt von allen Einträgen: Dauerrate (Anfragen/s)
+# und Burst. Ein Zyklus (2 REST-Gruppen, 23 Modbus-Register) passt in den Burst.
+REST_RATE_LIMIT = 10.0
+REST_RATE_BURST = 20
+MODBUS_RATE_LIMIT = 50.0
+MODBUS_RATE_BURST = 50
+
+# Reihenfolge im Token-Bucket: kleinere Werte werden zuerst bedient
+PRIORITY_SAFETY = 0
+PRIORITY_POWER = 1
+PRIORITY_DIAGNOSTICS = 2
+# Diagnostics weichen aus, solange der Hauptzyklus mehr als diesen Anteil
+# des Scan-Intervalls braucht, höchstens aber so viele Intervalle am Stück
+CYCLE_BUDGET_RATIO = 0.5
+MAX_DEFERRED_DIAGNOSTICS = 3
+
+# Adaptives Poll-Intervall: strecken, wenn ein Zyklus (geglättet) mehr als
+# OVERRUN des Intervalls braucht, schrittweise zurück zum Ziel unter RECOVER
+ADAPTIVE_OVERRUN_RATIO = 0.5
+ADAPTIVE_RECOVER_RATIO = 0.25
+ADAPTIVE_BACKOFF = 1.5
+ADAPTIVE_RECOVERY = 0.8
+ADAPTIVE_MAX_FACTOR = 4
+ADAPTIVE_SMOOTHING = 0.3
+
+# Subnetz-Suche: kurze Timeouts, begrenzte Parallelität, höchstens ein /22
+DISCOVERY_TIMEOUT = 1.5
+DISCOVERY_CONCURRENCY = 64
+DISCOVERY_MAX_HOSTS = 1022
+DEFAULT_SUBNET = "192.168.1.0/24"
+
+STORAGE_VERSION = 1
+SNAPSHOT_SAVE_DELAY = 60
+
+TIMING_WINDOW = 120
+LOOP_BLOCKING_THRESHOLD = 0.05
+
+TRACE_BUFFER_SIZE = 200
+TRACE_PAYLOAD_SAMPLE_RATE = 0.01
+TRACE_PAYLOAD_LIMIT = 4000
+
 COORDINATOR_UPDATE_INTERVAL = timedelta(seconds=DEFAULT_SCAN_INTERVAL)
 DIAGNOSTICS_UPDATE_INTERVAL = timedelta(seconds=DEFAULT_DIAGNOSTICS_INTERVAL)
 
 PLATFORMS = ["sensor", "binary_sensor"]
 
+# Vom Config Flow geprüfte Modbus-Clients, bis der Coordinator sie übernimmt
+DATA_MODBUS_CLIENTS = f"{DOMAIN}_modbus_clients"
+# Rate Limiter je Host, siehe ratelimit.py
+DATA_RATE_LIMITERS = f"{DOMAIN}_rate_limiters"
+# Phasenplan aller Coordinatoren der Domain
+DATA_SCHEDULER = f"{DOMAIN}_scheduler"
+
+SIGNAL_OPTIONS_UPDATED = f"{DOMAIN}_options_updated_{{}}"
+
+SERVICE_START_CAPTURE = "start_capture"
+SERVICE_STOP_CAPTURE = "stop_capture"
+SERVICE_DUMP_TRACES = "dump_traces"
+ATTR_CONFIG_ENTRY_ID = "config_entry_id"
+ATTR_FILENAME = "filename"
+ATTR_RESTORED = "restored"
+# Aufzeichnungen landen nur in diesem Unterordner des Konfigurationsverzeichnisses
+CAPTURE_DIRECTORY = "fems_captures"
+
 MANUFACTURER = "FENECON"
 MODEL = "FEMS"
 
@@ -3,18 +3,32 @@
 from __future__ import annotations
 
 import asyncio
-import logging
+from collections.abc import Awaitable
 from dataclasses import dataclass
 from datetime import timedelta
-from typing import Any
+import logging
+import re
+import time
+from typing import Any, TypeVar
+
+import aiohttp
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 
+from .capture import FemsTrafficRecorder
+from .chargers import (
+    CHARGER_GROUP,
+    charger_ids_from_channels,
+    charger_ids_from_entry,
+)
 from .const import (
+    CHARGER_MISSING_CYCLES,
     CONF_BATTERY_MODULE_COUNT,
+    CONF_CHARGERS,
+    CONF_DETECT_LOOP_BLOCKING,
     CONF_DIAGNOSTICS_INTERVAL,
     CONF_MODBUS_HOST,
     CONF_MODBUS_PORT,
@@ -24,22 +38,44 @@ from .const import (
     CONF_REST_PORT,
     CONF_SCAN_INTERVAL,
     CONF_USERNAME,
+    DATA_MODBUS_CLIENTS,
     DEFAULT_BATTERY_MODULE_COUNT,
+    DEFAULT_DETECT_LOOP_BLOCKING,
     DEFAULT_SCAN_INTERVAL,
     DOMAIN,
     MODBUS_FLOAT32_HOLDING_REGISTERS,
     MODBUS_FLOAT64_HOLDING_REGISTERS,
     MODBUS_TIMEOUT,
     MODBUS_UINT16_INPUT_REGISTERS,
+    PRIORITY_POWER,
+    PRIORITY_SAFETY,
     REST_TIMEOUT,
 )
-from .fems_modbus import FemsModbusApi
+from .fems_modbus import FemsModbusApi, modbus_client_key
+from .entity import FemsDeviceInfos
 from .fems_rest import FemsRestApi
+from .pacing import FemsPollPacer
+from .ratelimit import async_get_rate_limiter
+from .scheduler import FemsPhasedRefreshMixin, FemsScheduleSlot
+from .store import FemsSnapshotStore
+from .timing import FemsCycleStats, FemsTimings
+from .tracing import FemsRequestTracer
 
 _LOGGER = logging.getLogger(__name__)
 
 REST_COLLECTION_TIMEOUT = max(REST_TIMEOUT, 20)
 
+_T = TypeVar("_T")
+
+# Komponenten-Regex wie "charger(0|1)" oder "charger\d+" zählt als eine Gruppe
+_COMPONENT_PATTERN_RE = re.compile(r"\(.*\)$|\\d\+$")
+
+
+def _rest_group_label(group: str) -> str:
+    """Return the short timing/counter label of a REST group."""
+    component = group.split("/", 1)[0]
+    return f"rest_{_COMPONENT_PATTERN_RE.sub('s', component)}"
+
 
 @dataclass
 class FemsData:
@@ -47,47 +83,163 @@ class FemsData:
 
     rest: dict[str, Any]
     modbus: dict[str, Any]
+    stale: bool = False
 
 
-class FemsDataUpdateCoordinator(DataUpdateCoordinator[FemsData]):
+class FemsDataUpdateCoordinator(
+    FemsPhasedRefreshMixin, DataUpdateCoordinator[FemsData]
+):
     """Coordinator for FEMS."""
 
+    timing_phases = (
+        "cycle",
+        "rest_battery0",
+        "rest_chargers",
+        "rest_parse",
+        "modbus_connect",
+        "modbus_uint16",
+        "modbus_float32",
+        "modbus_float64",
+    )
+
     def __init__(self, hass: HomeAssistant, entry: ConfigEntry) -> None:
         """Initialize coordinator."""
         self.entry = entry
-        self.battery_module_count = entry.options.get(
+        self.timings = FemsTimings()
+        self.tracer = FemsRequestTracer()
+        self.last_cycle_bytes: dict[str, int] = {}
+        # None bis die Charger nach dem Setup einmal abgefragt wurden;
+        # ohne Charger entfällt die Abfrage danach ganz
+        self.charger_ids: tuple[int, ...] | None = None
+        # Aufeinanderfolgende Zyklen, in denen ein Charger (bzw. jeder) fehlte
+        self._charger_misses: dict[int, int] = {}
+        self._cycles_without_chargers = 0
+        self._load_options()
+        self.pacer = FemsPollPacer(self.scan_interval)
+        # Vom Domain-Scheduler beim Setup vergeben
+        self.schedule_slot: FemsScheduleSlot | None = None
+        # Geräte des Eintrags, im Setup für beide Coordinators gebaut
+        self.device_infos: FemsDeviceInfos | None = None
+
+        super().__init__(
+            hass,
+            logger=_LOGGER,
+            name=DOMAIN,
+            update_interval=timedelta(seconds=self.scan_interval),
+            always_update=False,
+        )
+
+        self.rest_api = self._create_rest_api(async_get_clientsession(hass))
+        self.modbus_api = self._create_modbus_api(self._pop_validated_client(hass))
+        self.snapshot_store = FemsSnapshotStore(hass, entry.entry_id, "data")
+
+    def _create_rest_api(self, session: Any) -> FemsRestApi:
+        """Create the REST client for this entry."""
+        return FemsRestApi(
+            host=self.entry.data[CONF_REST_HOST],
+            port=self.entry.data[CONF_REST_PORT],
+            username=self.entry.data[CONF_USERNAME],
+            password=self.entry.data[CONF_PASSWORD],
+            session=session,
+            timings=self.timings,
+            tracer=self.tracer,
+            rate_limit=async_get_rate_limiter(
+                self.hass, self.entry.data[CONF_REST_HOST]
+            ).rest,
+        )
+
+    def _pop_validated_client(self, hass: HomeAssistant) -> Any | None:
+        """Take over the Modbus client the config flow has just validated."""
+        return hass.data.get(DATA_MODBUS_CLIENTS, {}).pop(
+            modbus_client_key(
+                self.entry.data[CONF_MODBUS_HOST],
+                self.entry.data[CONF_MODBUS_PORT],
+                self.entry.data[CONF_MODBUS_SLAVE],
+            ),
+            None,
+        )
+
+    def _create_modbus_api(self, client: Any | None = None) -> FemsModbusApi:
+        """Create the Modbus client for this entry."""
+        return FemsModbusApi(
+            hass=self.hass,
+            host=self.entry.data[CONF_MODBUS_HOST],
+            port=self.entry.data[CONF_MODBUS_PORT],
+            slave=self.entry.data[CONF_MODBUS_SLAVE],
+            client=client,
+            tracer=self.tracer,
+            rate_limit=async_get_rate_limiter(
+                self.hass, self.entry.data[CONF_MODBUS_HOST]
+            ).modbus,
+        )
+
+    async def async_start_capture(self, path: str) -> None:
+        """Record every raw REST and Modbus response to ``path``."""
+        await self.async_stop_capture()
+        recorder = FemsTrafficRecorder(path)
+        self.rest_api.recorder = recorder
+        self.modbus_api.recorder = recorder
+        _LOGGER.info("Recording FEMS traffic to %s", path)
+
+    async def async_stop_capture(self) -> int:
+        """Stop recording and return the number of captured responses."""
+        recorder = self.rest_api.recorder
+        self.rest_api.recorder = None
+        self.modbus_api.recorder = None
+
+        if recorder is None:
+            return 0
+
+        await recorder.async_close()
+        _LOGGER.info(
+            "Stopped FEMS traffic recording: %s response(s) in %s",
+            recorder.frames,
+            recorder.path,
+        )
+        return recorder.frames
+
+    def _load_options(self) -> None:
+        """Read runtime options from the config entry."""
+        self.battery_module_count = self.entry.options.get(
             CONF_BATTERY_MODULE_COUNT,
-            entry.data.get(
+            self.entry.data.get(
                 CONF_BATTERY_MODULE_COUNT,
                 DEFAULT_BATTERY_MODULE_COUNT,
             ),
         )
-        self.scan_interval = entry.options.get(
+        self.scan_interval = self.entry.options.get(
             CONF_SCAN_INTERVAL,
             DEFAULT_SCAN_INTERVAL,
         )
-
-        session = async_get_clientsession(hass)
-        self.rest_api = FemsRestApi(
-            host=entry.data[CONF_REST_HOST],
-            port=entry.data[CONF_REST_PORT],
-            username=entry.data[CONF_USERNAME],
-            password=entry.data[CONF_PASSWORD],
-            session=session,
-        )
-        self.modbus_api = FemsModbusApi(
-            host=entry.data[CONF_MODBUS_HOST],
-            port=entry.data[CONF_MODBUS_PORT],
-            slave=entry.data[CONF_MODBUS_SLAVE],
+        self.timings.detect_blocking = self.entry.options.get(
+            CONF_DETECT_LOOP_BLOCKING,
+            DEFAULT_DETECT_LOOP_BLOCKING,
         )
 
-        super().__init__(
-            hass,
-            logger=_LOGGER,
-            name=DOMAIN,
-            update_interval=timedelta(seconds=self.scan_interval),
-            always_update=False,
+    def async_apply_options(self) -> None:
+        """Apply changed options to the running coordinator."""
+        self._load_options()
+        self.pacer.reset(self.scan_interval)
+        self.update_interval = timedelta(seconds=self.scan_interval)
+
+    async def async_restore_snapshot(self) -> bool:
+        """Restore the last persisted snapshot as stale data."""
+        snapshot = await self.snapshot_store.async_load()
+        if not snapshot:
+            return False
+
+        rest = snapshot.get("rest") or {}
+        modbus = snapshot.get("modbus") or {}
+        if not rest and not modbus:
+            return False
+
+        self.data = FemsData(rest=rest, modbus=modbus, stale=True)
+        _LOGGER.debug(
+            "Restored FEMS snapshot with %s REST and %s Modbus value(s)",
+            len(rest),
+            len(modbus),
         )
+        return True
 
     def _build_rest_groups(self) -> list[str]:
         """Build REST groups for the main coordinator."""
@@ -128,27 +280,122 @@ class FemsDataUpdateCoordinator(DataUpdateCoordinator[FemsData]):
             "Tower0StatusAlarm"
             ")"
         )
-        charger0_group = "charger0/(ActualPower|Voltage|Current)"
-        charger1_group = "charger1/(ActualPower|Voltage|Current)"
+        if self.charger_ids == ():
+            return [battery_group]
+        return [battery_group, CHARGER_GROUP]
+
+    @callback
+    def _async_update_chargers(self, found: tuple[int, ...]) -> None:
+        """Add found chargers at once, drop missing ones only after several cycles.
+
+        ``found`` is empty if no charger component answered (HTTP 404), which
+        may as well be a device that is still starting up.
+        """
+        known = self.charger_ids
+        if known is None:
+            known = charger_ids_from_entry(self.entry)
+
+        kept: list[int] = []
+        for charger in known:
+            if charger in found:
+                continue
+            misses = self._charger_misses.get(charger, 0) + 1
+            if misses < CHARGER_MISSING_CYCLES:
+                self._charger_misses[charger] = misses
+                kept.append(charger)
+            else:
+                self._charger_misses.pop(charger, None)
+        for charger in found:
+            self._charger_misses.pop(charger, None)
+
+        if found:
+            self._cycles_without_chargers = 0
+        else:
+            self._cycles_without_chargers += 1
+        charger_ids = tuple(sorted({*found, *kept}))
+        if not charger_ids and self._cycles_without_chargers < CHARGER_MISSING_CYCLES:
+            # Noch nicht bestätigt: weiter abfragen
+            return
+        self._async_set_charger_ids(charger_ids)
+
+    async def async_rescan_chargers(self) -> bool:
+        """Query the chargers once and take the answer as is.
+
+        Returns False if the device could not be asked.
+        """
+        try:
+            result = await self.rest_api.async_fetch_group(CHARGER_GROUP)
+        except aiohttp.ClientResponseError as err:
+            if err.status != 404:
+                return False
+            found: tuple[int, ...] = ()
+        except Exception:  # noqa: BLE001
+            _LOGGER.debug("FEMS charger rescan failed", exc_info=True)
+            return False
+        else:
+            found = charger_ids_from_channels(result)
+
+        self._charger_misses.clear()
+        self._cycles_without_chargers = 0
+        self._async_set_charger_ids(found)
+        return True
+
+    @callback
+    def _async_set_charger_ids(self, charger_ids: tuple[int, ...]) -> None:
+        """Remember the chargers and store them in the entry."""
+        self.charger_ids = charger_ids
+        if list(charger_ids) == self.entry.data.get(CONF_CHARGERS):
+            return
+
+        _LOGGER.info("FEMS chargers discovered: %s", list(charger_ids) or "none")
+        # Der Update-Listener legt neue Entities an und räumt alte auf
+        self.hass.config_entries.async_update_entry(
+            self.entry,
+            data={**self.entry.data, CONF_CHARGERS: list(charger_ids)},
+        )
 
-        return [
-            battery_group,
-            charger0_group,
-            charger1_group,
-        ]
+    @staticmethod
+    def _rest_group_priority(group: str) -> int:
+        """Return the rate limit priority of a REST group.
+
+        The battery group carries the fault, alarm and run-failed channels
+        and is served before everything else on the host.
+        """
+        return PRIORITY_POWER if group == CHARGER_GROUP else PRIORITY_SAFETY
+
+    def query_plan(self) -> dict[str, Any]:
+        """Return the REST groups and Modbus blocks polled each cycle."""
+        return {
+            "rest_groups": self._build_rest_groups(),
+            "modbus_blocks": {
+                "uint16_input": MODBUS_UINT16_INPUT_REGISTERS,
+                "float32_holding": MODBUS_FLOAT32_HOLDING_REGISTERS,
+                "float64_holding": MODBUS_FLOAT64_HOLDING_REGISTERS,
+            },
+        }
 
     async def _async_fetch_rest_group(
         self,
         group: str,
+        stats: FemsCycleStats,
     ) -> tuple[str, dict[str, Any] | Exception]:
         """Fetch one REST group."""
+        label = _rest_group_label(group)
         try:
-            result = await self.rest_api.async_fetch_group(group)
-            return group, result
+            with self.timings.measure(label):
+                result = await self.rest_api.async_fetch_group(
+                    group, self._rest_group_priority(group), stats
+                )
         except Exception as err:  # noqa: BLE001
+            self.timings.count(
+                label, "timeout" if isinstance(err, TimeoutError) else "failed"
+            )
             return group, err
 
-    async def _async_fetch_rest_data(self) -> dict[str, Any]:
+        self.timings.count(label, "ok")
+        return group, result
+
+    async def _async_fetch_rest_data(self, stats: FemsCycleStats) -> dict[str, Any]:
         """Fetch all REST data and keep partial results."""
         groups = self._build_rest_groups()
         rest: dict[str, Any] = {}
@@ -158,7 +405,7 @@ class FemsDataUpdateCoordinator(DataUpdateCoordinator[FemsData]):
         tasks: list[asyncio.Task] = []
 
         for group in groups:
-            task = asyncio.create_task(self._async_fetch_rest_group(group))
+            task = asyncio.create_task(self._async_fetch_rest_group(group, stats))
             task_to_group[task] = group
             tasks.append(task)
 
@@ -168,13 +415,28 @@ class FemsDataUpdateCoordinator(DataUpdateCoordinator[FemsData]):
                 timeout=REST_COLLECTION_TIMEOUT,
             )
 
-            for task in done:
-                group, result = await task
-                if isinstance(result, Exception):
-                    errors.append((group, result))
-                    _LOGGER.debug("FEMS REST group failed: %s | %r", group, result)
-                    continue
-                rest.update(result)
+            with self.timings.sync_section("rest_merge"):
+                for task in done:
+                    group, result = task.result()
+                    if group == CHARGER_GROUP:
+                        if (
+                            isinstance(result, aiohttp.ClientResponseError)
+                            and result.status == 404
+                        ):
+                            # Keine Komponente passt: (noch) kein Charger
+                            self._async_update_chargers(())
+                            continue
+                        if not isinstance(result, Exception):
+                            self._async_update_chargers(
+                                charger_ids_from_channels(result)
+                            )
+                    if isinstance(result, Exception):
+                        errors.append((group, result))
+                        _LOGGER.debug(
+                            "FEMS REST group failed: %s | %r", group, result
+                        )
+                        continue
+                    rest.update(result)
 
             if pending:
                 pending_groups = [task_to_group[task] for task in pending]
@@ -187,6 +449,9 @@ class FemsDataUpdateCoordinator(DataUpdateCoordinator[FemsData]):
 
                 for task in pending:
                     task.cancel()
+                    self.timings.count(
+                        _rest_group_label(task_to_group[task]), "timeout"
+                    )
 
                 cancelled = await asyncio.gather(*pending, return_exceptions=True)
                 for task, item in zip(pending, cancelled, strict=False):
@@ -232,18 +497,30 @@ class FemsDataUpdateCoordinator(DataUpdateCoordinator[FemsData]):
 
         return rest
 
-    async def _async_fetch_modbus_data_internal(self) -> dict[str, Any]:
+    async def _async_fetch_modbus_data_internal(
+        self, stats: FemsCycleStats
+    ) -> dict[str, Any]:
         """Fetch all Modbus data without timeout wrapper."""
-        await self.modbus_api.async_connect()
+        with self.timings.measure("modbus_connect"):
+            await self.modbus_api.async_connect()
 
-        modbus_uint16_task = self.modbus_api.async_read_many_uint16_input(
-            MODBUS_UINT16_INPUT_REGISTERS
+        modbus_uint16_task = self._async_timed(
+            "modbus_uint16",
+            self.modbus_api.async_read_many_uint16_input(
+                MODBUS_UINT16_INPUT_REGISTERS, stats
+            ),
         )
-        modbus_float32_task = self.modbus_api.async_read_many_float32(
-            MODBUS_FLOAT32_HOLDING_REGISTERS
+        modbus_float32_task = self._async_timed(
+            "modbus_float32",
+            self.modbus_api.async_read_many_float32(
+                MODBUS_FLOAT32_HOLDING_REGISTERS, stats
+            ),
         )
-        modbus_float64_task = self.modbus_api.async_read_many_float64(
-            MODBUS_FLOAT64_HOLDING_REGISTERS
+        modbus_float64_task = self._async_timed(
+            "modbus_float64",
+            self.modbus_api.async_read_many_float64(
+                MODBUS_FLOAT64_HOLDING_REGISTERS, stats
+            ),
         )
 
         modbus_uint16, modbus_float32, modbus_float64 = await asyncio.gather(
@@ -258,24 +535,79 @@ class FemsDataUpdateCoordinator(DataUpdateCoordinator[FemsData]):
         modbus.update(modbus_float64)
         return modbus
 
-    async def _async_fetch_modbus_data(self) -> dict[str, Any]:
+    async def _async_timed(self, phase: str, coro: Awaitable[_T]) -> _T:
+        """Await a coroutine and record its duration."""
+        with self.timings.measure(phase):
+            return await coro
+
+    async def _async_fetch_modbus_data(self, stats: FemsCycleStats) -> dict[str, Any]:
         """Fetch all Modbus data with timeout handling."""
         try:
-            return await asyncio.wait_for(
-                self._async_fetch_modbus_data_internal(),
+            modbus = await asyncio.wait_for(
+                self._async_fetch_modbus_data_internal(stats),
                 timeout=MODBUS_TIMEOUT,
             )
         except asyncio.TimeoutError as err:
+            self.timings.count("modbus", "timeout")
+            # Abgebrochene Lesevorgänge hinterlassen die Verbindung in
+            # unklarem Zustand: schließen, der nächste Zyklus verbindet neu
+            await self.modbus_api.async_close()
             raise UpdateFailed("Modbus update timed out") from err
         except UpdateFailed:
+            self.timings.count("modbus", "failed")
+            await self.modbus_api.async_close()
             raise
         except Exception as err:  # noqa: BLE001
-            raise UpdateFailed(f"Modbus update failed: {err}") from err
-        finally:
+            self.timings.count("modbus", "failed")
             await self.modbus_api.async_close()
+            raise UpdateFailed(f"Modbus update failed: {err}") from err
+
+        # Die Verbindung bleibt zwischen den Zyklen offen
+        self.timings.count("modbus", "ok")
+        return modbus
+
+    async def async_shutdown(self) -> None:
+        """Stop polling and close the Modbus connection."""
+        await super().async_shutdown()
+        await self.modbus_api.async_close()
 
     async def _async_update_data(self) -> FemsData:
         """Fetch data from REST and Modbus."""
+        stats = FemsCycleStats()
+        start = time.monotonic()
+        try:
+            with self.timings.measure("cycle"):
+                data = await self._async_update_data_internal(stats)
+        except UpdateFailed:
+            # Auch ein fehlgeschlagener Zyklus zeigt, wie sehr das Gerät kämpft
+            self._pace(time.monotonic() - start, stats.slowest_latency)
+            raise
+        finally:
+            self.last_cycle_bytes = {
+                "rest": stats.bytes.get("rest", 0),
+                "modbus": stats.bytes.get("modbus", 0),
+            }
+
+        self._pace(time.monotonic() - start, stats.slowest_latency)
+        return data
+
+    def _pace(self, cycle: float, latency: float) -> None:
+        """Adapt the poll interval to the last cycle duration and latency."""
+        if self.update_interval is None:
+            return
+        interval = self.pacer.observe(cycle, latency)
+        if interval != self.update_interval.total_seconds():
+            _LOGGER.debug(
+                "FEMS poll interval %.1fs -> %.1fs (cycle %.1fs, latency %.1fs)",
+                self.update_interval.total_seconds(),
+                interval,
+                cycle,
+                latency,
+            )
+            self.update_interval = timedelta(seconds=interval)
+
+    async def _async_update_data_internal(self, stats: FemsCycleStats) -> FemsData:
+        """Fetch data from REST and Modbus without cycle timing."""
         rest: dict[str, Any] = {}
         modbus: dict[str, Any] = {}
 
@@ -283,13 +615,13 @@ class FemsDataUpdateCoordinator(DataUpdateCoordinator[FemsData]):
         modbus_error: Exception | None = None
 
         try:
-            rest = await self._async_fetch_rest_data()
+            rest = await self._async_fetch_rest_data(stats)
         except Exception as err:  # noqa: BLE001
             rest_error = err
             _LOGGER.warning("REST update failed: %r", err)
 
         try:
-            modbus = await self._async_fetch_modbus_data()
+            modbus = await self._async_fetch_modbus_data(stats)
         except Exception as err:  # noqa: BLE001
             modbus_error = err
             _LOGGER.warning("Modbus update failed: %r", err)
@@ -310,4 +642,17 @@ class FemsDataUpdateCoordinator(DataUpdateCoordinator[FemsData]):
         if modbus_error:
             _LOGGER.warning("Using partial data: Modbus unavailable, REST available")
 
+        with self.timings.sync_section("snapshot_schedule"):
+            # Teilzyklen ergänzen den letzten Snapshot, statt ihn zu leeren
+            self.snapshot_store.async_schedule_merge({"rest": rest, "modbus": modbus})
+
         return FemsData(rest=rest, modbus=modbus)
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Publish new data to all entities."""
+        with (
+            self.timings.measure("publish"),
+            self.timings.sync_section("publish"),
+        ):
+            super().async_update_listeners()
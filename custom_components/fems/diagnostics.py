@@ -9,12 +9,28 @@ from homeassistant.const import CONF_PASSWORD
 from homeassistant.core import HomeAssistant
 
 from .const import DOMAIN
+from .scheduler import async_get_scheduler
 
 TO_REDACT = {
     CONF_PASSWORD,
 }
 
 
+def _coordinator_performance(coordinator: Any, cycle_phase: str) -> dict[str, Any]:
+    """Return refresh statistics and the active query plan of a coordinator."""
+    cycle = coordinator.timings.summary(cycle_phase)
+
+    return {
+        "last_update_success": coordinator.last_update_success,
+        "update_interval_seconds": coordinator.update_interval.total_seconds(),
+        "pacing": coordinator.pacer.as_dict(),
+        "last_refresh_ms": cycle["last"] if cycle else None,
+        "refresh_ms": cycle,
+        "last_cycle_bytes": coordinator.last_cycle_bytes,
+        "query_plan": coordinator.query_plan(),
+    }
+
+
 async def async_get_config_entry_diagnostics(
     hass: HomeAssistant,
     entry: ConfigEntry,
@@ -22,6 +38,7 @@ async def async_get_config_entry_diagnostics(
     """Return diagnostics for a config entry."""
 
     coordinator = hass.data[DOMAIN][entry.entry_id]
+    diagnostics_coordinator = hass.data[DOMAIN].get(f"{entry.entry_id}_diagnostics")
 
     # Config (sensible Daten entfernen)
     config_data = dict(entry.data)
@@ -32,14 +49,42 @@ async def async_get_config_entry_diagnostics(
     # Coordinator-Daten
     data = coordinator.data
 
+    performance: dict[str, Any] = {
+        "main": _coordinator_performance(coordinator, "cycle"),
+        "modbus_connects": coordinator.modbus_api.connects,
+        "requests": coordinator.timings.counters(),
+        "timings_ms": coordinator.timings.as_dict(),
+        "slow_sections": coordinator.timings.slow_sections(),
+        # Gilt je Host, also für alle Einträge mit demselben Gerät
+        "rate_limit": {
+            kind: api.rate_limit.as_dict()
+            for kind, api in (
+                ("rest", coordinator.rest_api),
+                ("modbus", coordinator.modbus_api),
+            )
+            if api.rate_limit is not None
+        },
+        # Phasen und Last aller Einträge, um Gleichtakt zu erkennen
+        "domain_load": async_get_scheduler(hass).as_dict(),
+    }
+    if diagnostics_coordinator is not None:
+        performance["diagnostics"] = _coordinator_performance(
+            diagnostics_coordinator, "rest_cells"
+        )
+
     return {
         "config": config_data,
         "coordinator": {
             "last_update_success": coordinator.last_update_success,
             "update_interval_seconds": coordinator.update_interval.total_seconds(),
         },
+        "performance": performance,
+        "traces": coordinator.tracer.as_list(),
         "data": {
             "rest": data.rest,
             "modbus": data.modbus,
+            "diagnostics_rest": (
+                diagnostics_coordinator.data.rest if diagnostics_coordinator else {}
+            ),
         },
     }
@@ -2,24 +2,40 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass
+import asyncio
+from dataclasses import dataclass, field
 from datetime import timedelta
 import logging
+import time
 from typing import Any
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 
 from .const import (
-    CELLS_PER_MODULE,
-    CONF_BATTERY_MODULE_COUNT,
     CONF_DIAGNOSTICS_INTERVAL,
-    DEFAULT_BATTERY_MODULE_COUNT,
+    CONF_SCAN_INTERVAL,
+    CYCLE_BUDGET_RATIO,
     DEFAULT_DIAGNOSTICS_INTERVAL,
+    DEFAULT_SCAN_INTERVAL,
     DOMAIN,
+    MAX_DEFERRED_DIAGNOSTICS,
+    MIN_DIAGNOSTICS_SHARD_INTERVAL,
+    PRIORITY_DIAGNOSTICS,
 )
+from .entity import FemsDeviceInfos
 from .fems_rest import FemsRestApi
+from .layout import (
+    CellMatrix,
+    battery_layout_from_entry,
+    module_prefix,
+    modules_group,
+)
+from .pacing import FemsPollPacer
+from .scheduler import FemsPhasedRefreshMixin, FemsScheduleSlot
+from .store import FemsSnapshotStore
+from .timing import FemsCycleStats, FemsTimings
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -29,56 +45,296 @@ class FemsDiagnosticsData:
     """Container for diagnostics data."""
 
     rest: dict[str, Any]
+    stale: bool = False
+    cells: CellMatrix | None = field(default=None, compare=False)
+    # (Turm, Modul) der zuletzt abgefragten Scheibe; None nach einer Komplettabfrage
+    modules: frozenset[tuple[int, int]] | None = field(default=None, compare=False)
+
+
+class FemsDiagnosticsCoordinator(
+    FemsPhasedRefreshMixin, DataUpdateCoordinator[FemsDiagnosticsData]
+):
+    """Coordinator for cell diagnostics.
 
+    After one complete read, each refresh fetches a single shard of modules,
+    so every module is read once per diagnostics interval with small
+    requests spread evenly over it.
+    """
 
-class FemsDiagnosticsCoordinator(DataUpdateCoordinator[FemsDiagnosticsData]):
-    """Coordinator for cell diagnostics."""
+    timing_phases = ("rest_cells",)
 
     def __init__(
         self,
         hass: HomeAssistant,
         entry: ConfigEntry,
         rest_api: FemsRestApi,
+        timings: FemsTimings | None = None,
+        main_pacer: FemsPollPacer | None = None,
     ) -> None:
-        """Initialize diagnostics coordinator."""
+        """Initialize diagnostics coordinator.
+
+        ``main_pacer`` is the pacer of the main coordinator; its current
+        interval is the budget the diagnostics give way to.
+        """
         self.entry = entry
         self.rest_api = rest_api
-        self.battery_module_count = entry.options.get(
-            CONF_BATTERY_MODULE_COUNT,
-            entry.data.get(
-                CONF_BATTERY_MODULE_COUNT,
-                DEFAULT_BATTERY_MODULE_COUNT,
-            ),
-        )
-        self.diagnostics_interval = entry.options.get(
-            CONF_DIAGNOSTICS_INTERVAL,
-            DEFAULT_DIAGNOSTICS_INTERVAL,
+        self.timings = timings if timings is not None else FemsTimings()
+        self.main_pacer = main_pacer
+        self.last_cycle_bytes: dict[str, int] = {}
+        self.deferred = 0
+        self._shard_index = 0
+        # True, solange eine Veröffentlichung die Verfügbarkeit wechselt:
+        # dann schreiben alle Entities, nicht nur die der letzten Scheibe
+        self.publish_all = False
+        self._published_success = True
+        self._load_options()
+        self.pacer = FemsPollPacer(self.shard_interval)
+        # Vom Domain-Scheduler beim Setup vergeben
+        self.schedule_slot: FemsScheduleSlot | None = None
+        # Geräte des Eintrags, im Setup für beide Coordinators gebaut
+        self.device_infos: FemsDeviceInfos | None = None
+        self.snapshot_store = FemsSnapshotStore(
+            hass,
+            entry.entry_id,
+            "diagnostics",
         )
 
         super().__init__(
             hass,
             logger=_LOGGER,
             name=f"{DOMAIN}_diagnostics",
-            update_interval=timedelta(seconds=self.diagnostics_interval),
+            update_interval=timedelta(seconds=self.shard_interval),
             always_update=False,
         )
+        self.data = FemsDiagnosticsData(rest={})
+
+    def _load_options(self) -> None:
+        """Read runtime options from the config entry."""
+        self.layout = battery_layout_from_entry(self.entry)
+        self.diagnostics_interval = self.entry.options.get(
+            CONF_DIAGNOSTICS_INTERVAL,
+            DEFAULT_DIAGNOSTICS_INTERVAL,
+        )
+        self.scan_interval = self.entry.options.get(
+            CONF_SCAN_INTERVAL,
+            DEFAULT_SCAN_INTERVAL,
+        )
+        self.shards = self.layout.shards(
+            int(self.diagnostics_interval // MIN_DIAGNOSTICS_SHARD_INTERVAL)
+        )
+        self.shard_interval = self.diagnostics_interval / len(self.shards)
+
+    @property
+    def battery_module_count(self) -> int:
+        """Return the number of modules per tower."""
+        return self.layout.module_count
+
+    def async_apply_options(self) -> bool:
+        """Apply changed options; return True if the cell layout changed."""
+        previous_layout = self.layout
+        previous_shards = self.shards
+        self._load_options()
+        if self.shards != previous_shards:
+            self._shard_index = 0
+        self.pacer.reset(self.shard_interval)
+        self.update_interval = timedelta(seconds=self.shard_interval)
+        if self.layout != previous_layout and self.data.rest:
+            # Vorhandene Werte in der neuen Form weiterreichen
+            self.data = self._build_data(self.data.rest, stale=self.data.stale)
+        return self.layout != previous_layout
+
+    def _build_data(
+        self,
+        rest: dict[str, Any],
+        stale: bool = False,
+    ) -> FemsDiagnosticsData:
+        """Wrap REST channels together with their cell matrix."""
+        with self.timings.sync_section("cell_matrix"):
+            cells = CellMatrix.from_channels(self.layout, rest)
+        return FemsDiagnosticsData(rest=rest, stale=stale, cells=cells)
+
+    async def async_restore_snapshot(self) -> bool:
+        """Restore the last persisted snapshot as stale data."""
+        snapshot = await self.snapshot_store.async_load()
+        if not snapshot or not snapshot.get("rest"):
+            return False
+
+        self.data = self._build_data(snapshot["rest"], stale=True)
+        return True
 
-    def _build_cell_group(self) -> str:
-        """Build REST group for all configured cell voltages."""
-        parts: list[str] = []
+    def _build_cell_groups(self) -> list[str]:
+        """Build one REST group per tower for all cell voltages."""
+        return [
+            self.layout.tower_group(tower) for tower in range(self.layout.tower_count)
+        ]
 
-        for module in range(self.battery_module_count):
-            for cell in range(CELLS_PER_MODULE):
-                parts.append(f"Tower0Module{module}Cell{cell:03d}Voltage")
+    def query_plan(self) -> dict[str, Any]:
+        """Return the REST groups of a complete read and of the shards."""
+        return {
+            **self.layout.as_dict(),
+            "rest_groups": self._build_cell_groups(),
+            "shard_interval_s": round(self.shard_interval, 1),
+            "shard_groups": [modules_group(shard) for shard in self.shards],
+        }
 
-        return f"battery0/({'|'.join(parts)})"
+    async def _async_fetch_cells(
+        self, group: str, stats: FemsCycleStats
+    ) -> dict[str, Any]:
+        """Fetch one cell group and count the outcome."""
+        try:
+            data = await self.rest_api.async_fetch_group(
+                group, PRIORITY_DIAGNOSTICS, stats
+            )
+        except Exception as err:
+            self.timings.count(
+                "rest_cells", "timeout" if isinstance(err, TimeoutError) else "failed"
+            )
+            raise
+
+        self.timings.count("rest_cells", "ok")
+        return data
+
+    def _cycle_budget_at_risk(self) -> bool:
+        """Return True if the main cycle needs the device more urgently.
+
+        That is the case while safety or power requests are queued at the
+        rate limiter, or while the last main cycle used more than
+        ``CYCLE_BUDGET_RATIO`` of the current (possibly stretched) interval
+        of the main coordinator.
+        """
+        rate_limit = self.rest_api.rate_limit
+        if rate_limit is not None and rate_limit.waiting(PRIORITY_DIAGNOSTICS):
+            return True
+        cycle = self.timings.summary("cycle")
+        interval = (
+            self.main_pacer.interval
+            if self.main_pacer is not None
+            else self.scan_interval
+        )
+        return (
+            cycle is not None
+            and cycle["last"] > interval * CYCLE_BUDGET_RATIO * 1000
+        )
+
+    def _pace(self, cycle: float, latency: float) -> None:
+        """Adapt the refresh interval to the last cycle duration and latency."""
+        if self.update_interval is None:
+            return
+        interval = self.pacer.observe(cycle, latency)
+        if interval != self.update_interval.total_seconds():
+            _LOGGER.debug(
+                "FEMS diagnostics interval %.1fs -> %.1fs",
+                self.update_interval.total_seconds(),
+                interval,
+            )
+            self.update_interval = timedelta(seconds=interval)
 
     async def _async_update_data(self) -> FemsDiagnosticsData:
-        """Fetch diagnostics data."""
-        group = self._build_cell_group()
+        """Fetch the next shard, or all cells while no live data exists.
+
+        Under load the refresh is deferred and the previous data is kept,
+        at most ``MAX_DEFERRED_DIAGNOSTICS`` intervals in a row.
+        """
+        if (
+            self.data.rest
+            and not self.data.stale
+            and self.deferred < MAX_DEFERRED_DIAGNOSTICS
+            and self._cycle_budget_at_risk()
+        ):
+            self.deferred += 1
+            self.timings.count("rest_cells", "deferred")
+            _LOGGER.debug(
+                "FEMS diagnostics deferred (%s in a row): main cycle has priority",
+                self.deferred,
+            )
+            return self.data
+
+        self.deferred = 0
+        if not self.data.rest or self.data.stale:
+            return await self._async_read_all()
+        return await self._async_read_shard()
+
+    async def _async_fetch_timed(self, groups: list[str]) -> list[Any]:
+        """Fetch cell groups concurrently, timed and paced as one cycle."""
+        stats = FemsCycleStats()
+        start = time.monotonic()
 
         try:
-            data = await self.rest_api.async_fetch_group(group)
-            return FemsDiagnosticsData(rest=data)
-        except Exception as err:  # noqa: BLE001
+            with self.timings.measure("rest_cells"):
+                results = await asyncio.gather(
+                    *(self._async_fetch_cells(group, stats) for group in groups),
+                    return_exceptions=True,
+                )
+        finally:
+            self.last_cycle_bytes = {"rest": stats.bytes.get("rest", 0)}
+
+        self._pace(time.monotonic() - start, stats.slowest_latency)
+        return results
+
+    async def _async_read_shard(self) -> FemsDiagnosticsData:
+        """Fetch the next shard and replace only its modules."""
+        shard = self.shards[self._shard_index % len(self.shards)]
+        # Auch nach einem Fehler weiter, damit ein defektes Modul nicht alle blockiert
+        self._shard_index = (self._shard_index + 1) % len(self.shards)
+
+        (result,) = await self._async_fetch_timed([modules_group(shard)])
+        if isinstance(result, BaseException):
+            raise UpdateFailed(
+                f"Diagnostics update of modules {list(shard)} failed: {result}"
+            ) from result
+
+        prefixes = tuple(module_prefix(tower, module) for tower, module in shard)
+        data = {
+            address: value
+            for address, value in self.data.rest.items()
+            if not address.startswith(prefixes)
+        }
+        data.update(result)
+
+        with self.timings.sync_section("diagnostics_snapshot_schedule"):
+            self.snapshot_store.async_schedule_save({"rest": data})
+        with self.timings.sync_section("cell_matrix"):
+            cells = self.data.cells.with_modules(shard, result)
+        return FemsDiagnosticsData(rest=data, cells=cells, modules=frozenset(shard))
+
+    async def _async_read_all(self) -> FemsDiagnosticsData:
+        """Fetch all cells, one request per tower."""
+        results = await self._async_fetch_timed(self._build_cell_groups())
+
+        errors = [result for result in results if isinstance(result, BaseException)]
+        if len(errors) == len(results):
+            err = errors[0]
             raise UpdateFailed(f"Diagnostics update failed: {err}") from err
+
+        data: dict[str, Any] = {}
+        previous = self.data.rest if self.data else {}
+        for tower, result in enumerate(results):
+            if isinstance(result, BaseException):
+                # Ausgefallener Turm: letzte bekannte Werte behalten
+                _LOGGER.debug("FEMS cells of tower %s failed: %r", tower, result)
+                prefixes = tuple(
+                    module_prefix(tower, module)
+                    for module in range(self.layout.module_count)
+                )
+                data.update(
+                    (address, value)
+                    for address, value in previous.items()
+                    if address.startswith(prefixes)
+                )
+            else:
+                data.update(result)
+
+        with self.timings.sync_section("diagnostics_snapshot_schedule"):
+            self.snapshot_store.async_schedule_save({"rest": data})
+        return self._build_data(data)
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Publish new data to all diagnostics entities."""
+        self.publish_all = self.last_update_success != self._published_success
+        self._published_success = self.last_update_success
+        with (
+            self.timings.measure("diagnostics_publish"),
+            self.timings.sync_section("diagnostics_publish"),
+        ):
+            super().async_update_listeners()
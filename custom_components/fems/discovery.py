@@ -0,0 +1,187 @@
+"""Parallel subnet scan for FEMS devices."""
+
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+import ipaddress
+import json
+import logging
+import struct
+import time
+
+import aiohttp
+
+from .const import (
+    DISCOVERY_CONCURRENCY,
+    DISCOVERY_MAX_HOSTS,
+    DISCOVERY_TIMEOUT,
+    MODBUS_UINT16_INPUT_REGISTERS,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+# Ein Kanal genügt zum Erkennen; die REST-Validierung im Config Flow fragt
+# zusätzlich Status- und Zellkanäle von battery0 ab
+REST_PROBE_GROUP = "battery0/Soc"
+MODBUS_PROBE_REGISTER = MODBUS_UINT16_INPUT_REGISTERS["ess_soc"]
+
+# MBAP-Header + PDU "Read Input Registers"
+_MODBUS_REQUEST = struct.Struct(">HHHBBHH")
+_MODBUS_RESPONSE_HEADER = struct.Struct(">HHHBBB")
+_MODBUS_READ_INPUT_REGISTERS = 0x04
+
+
+@dataclass(frozen=True)
+class DiscoveredFems:
+    """A host answering like a FEMS on REST and/or Modbus."""
+
+    host: str
+    rest_latency: float | None
+    modbus_latency: float | None
+
+    @property
+    def latency(self) -> float:
+        """Return the fastest successful probe, used for ranking."""
+        return min(
+            latency
+            for latency in (self.rest_latency, self.modbus_latency)
+            if latency is not None
+        )
+
+
+def subnet_hosts(subnet: str) -> list[str]:
+    """Return the host addresses of ``subnet``, e.g. ``192.168.1.0/24``.
+
+    Raises ValueError for invalid or too large networks.
+    """
+    network = ipaddress.ip_network(subnet, strict=False)
+    if network.num_addresses > DISCOVERY_MAX_HOSTS + 2:
+        raise ValueError(f"Subnet {subnet} is too large to scan")
+    return [str(host) for host in network.hosts()]
+
+
+async def _async_probe_rest(
+    session: aiohttp.ClientSession,
+    host: str,
+    port: int,
+    auth: aiohttp.BasicAuth,
+    timeout: float,
+) -> float | None:
+    """Return the latency if ``host`` answers with OpenEMS channel JSON."""
+    url = f"http://{host}:{port}/rest/channel/{REST_PROBE_GROUP}"
+    start = time.monotonic()
+
+    try:
+        async with asyncio.timeout(timeout):
+            async with session.get(url, auth=auth) as response:
+                if response.status != 200:
+                    return None
+                payload = json.loads(await response.text())
+    except (TimeoutError, aiohttp.ClientError, ValueError):
+        return None
+
+    # OpenEMS-Signatur: Liste von Kanälen mit "address"/"value"
+    items = payload if isinstance(payload, list) else [payload]
+    if not items or not all(
+        isinstance(item, dict) and "address" in item and "value" in item
+        for item in items
+    ):
+        return None
+
+    return time.monotonic() - start
+
+
+async def _async_probe_modbus(
+    host: str,
+    port: int,
+    slave: int,
+    timeout: float,
+) -> float | None:
+    """Return the latency if ``host`` serves input register 302 via Modbus TCP."""
+    start = time.monotonic()
+    writer = None
+
+    try:
+        async with asyncio.timeout(timeout):
+            reader, writer = await asyncio.open_connection(host, port)
+            writer.write(
+                _MODBUS_REQUEST.pack(
+                    1,  # Transaction
+                    0,  # Protokoll: Modbus
+                    6,  # Restlänge: Unit + PDU
+                    slave,
+                    _MODBUS_READ_INPUT_REGISTERS,
+                    MODBUS_PROBE_REGISTER,
+                    1,
+                )
+            )
+            await writer.drain()
+            header = await reader.readexactly(_MODBUS_RESPONSE_HEADER.size)
+            _, protocol, _, _, function, byte_count = _MODBUS_RESPONSE_HEADER.unpack(
+                header
+            )
+            if (
+                protocol != 0
+                or function != _MODBUS_READ_INPUT_REGISTERS
+                or byte_count != 2
+            ):
+                return None
+            await reader.readexactly(byte_count)
+    except (TimeoutError, OSError, asyncio.IncompleteReadError):
+        return None
+    finally:
+        if writer is not None:
+            writer.close()
+
+    return time.monotonic() - start
+
+
+async def async_discover_fems(
+    session: aiohttp.ClientSession,
+    hosts: list[str],
+    rest_port: int,
+    modbus_port: int,
+    slave: int,
+    username: str = "x",
+    password: str = "user",
+    concurrency: int = DISCOVERY_CONCURRENCY,
+    timeout: float = DISCOVERY_TIMEOUT,
+) -> list[DiscoveredFems]:
+    """Probe all ``hosts`` concurrently and return matches, fastest first.
+
+    At most ``concurrency`` hosts are probed at the same time; REST and
+    Modbus of one host are probed in parallel, each with ``timeout``.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    auth = aiohttp.BasicAuth(username, password)
+
+    async def _async_probe(host: str) -> DiscoveredFems | None:
+        async with semaphore:
+            rest_latency, modbus_latency = await asyncio.gather(
+                _async_probe_rest(session, host, rest_port, auth, timeout),
+                _async_probe_modbus(host, modbus_port, slave, timeout),
+            )
+        if rest_latency is None and modbus_latency is None:
+            return None
+        return DiscoveredFems(host, rest_latency, modbus_latency)
+
+    start = time.monotonic()
+    results = await asyncio.gather(*(_async_probe(host) for host in hosts))
+    found = [result for result in results if result is not None]
+
+    _LOGGER.debug(
+        "FEMS discovery probed %s hosts in %.1f s, found %s",
+        len(hosts),
+        time.monotonic() - start,
+        [result.host for result in found],
+    )
+
+    # Hosts mit beiden Schnittstellen zuerst, dann nach Antwortzeit
+    return sorted(
+        found,
+        key=lambda result: (
+            result.rest_latency is None or result.modbus_latency is None,
+            result.latency,
+        ),
+    )
@@ -2,10 +2,14 @@
 
 from __future__ import annotations
 
+from functools import lru_cache
+import re
+from typing import Any
+
 from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from .const import DOMAIN, MANUFACTURER, MODEL
+from .const import ATTR_RESTORED, DOMAIN, MANUFACTURER, MODEL
 
 
 _DEVICE_DEFINITIONS: dict[str, dict[str, str]] = {
@@ -25,14 +29,6 @@ _DEVICE_DEFINITIONS: dict[str, dict[str, str]] = {
         "suffix": "cell_diagnose",
         "name": "Cell Diagnostics",
     },
-    "charger0": {
-        "suffix": "charger0",
-        "name": "Charger 0",
-    },
-    "charger1": {
-        "suffix": "charger1",
-        "name": "Charger 1",
-    },
     "energy_management": {
         "suffix": "energy_management",
         "name": "Energy Management",
@@ -40,13 +36,22 @@ _DEVICE_DEFINITIONS: dict[str, dict[str, str]] = {
 }
 
 
+# Zellspannungen und Modul-Spreizungen aller Türme
+CELL_DIAGNOSE_KEY_RE = re.compile(
+    r"tower\d+_module\d+_cell\d+_voltage|(?:tower\d+_)?modul_\d+_spread"
+)
+# Sensoren der erkannten Charger, je Charger ein eigenes Gerät
+CHARGER_KEY_RE = re.compile(r"(charger\d+)_(?:power|voltage|current)")
+
+
+@lru_cache(maxsize=None)
 def _device_key_from_entity_key(entity_key: str) -> str:
     """Map an entity key to a logical Home Assistant device."""
-    if entity_key.startswith("tower0_module"):
+    if CELL_DIAGNOSE_KEY_RE.fullmatch(entity_key):
         return "cell_diagnose"
 
-    if entity_key.startswith("modul_") and entity_key.endswith("_spread"):
-        return "cell_diagnose"
+    if entity_key.startswith("timing_") or entity_key.endswith("poll_interval"):
+        return "system"
 
     if entity_key in {
         "fault_status",
@@ -73,11 +78,8 @@ def _device_key_from_entity_key(entity_key: str) -> str:
     }:
         return "battery_diagnose"
 
-    if entity_key.startswith("charger0_"):
-        return "charger0"
-
-    if entity_key.startswith("charger1_"):
-        return "charger1"
+    if match := CHARGER_KEY_RE.fullmatch(entity_key):
+        return match.group(1)
 
     if entity_key in {
         "ess_power",
@@ -132,64 +134,107 @@ def _device_key_from_entity_key(entity_key: str) -> str:
     return "battery"
 
 
-class FemsCoordinatorEntity(CoordinatorEntity):
-    """Base FEMS entity."""
+def _build_device_infos(entry_id: str) -> dict[str, DeviceInfo]:
+    """Build all logical devices of one config entry."""
+    system_identifier = (DOMAIN, f"{entry_id}_system")
+    battery_identifier = (DOMAIN, f"{entry_id}_battery")
 
-    _attr_has_entity_name = True
-
-    @property
-    def _fems_entity_key(self) -> str:
-        """Return entity key."""
-        description = getattr(self, "entity_description", None)
-        return getattr(description, "key", "")
+    device_infos: dict[str, DeviceInfo] = {}
 
-    @property
-    def _fems_device_key(self) -> str:
-        """Return logical device key."""
-        return _device_key_from_entity_key(self._fems_entity_key)
-
-    @property
-    def device_info(self) -> DeviceInfo:
-        """Return device info."""
-        entry_id = self.coordinator.entry.entry_id
-
-        system_identifier = (DOMAIN, f"{entry_id}_system")
-        battery_identifier = (DOMAIN, f"{entry_id}_battery")
-
-        device_key = self._fems_device_key
-        device_def = _DEVICE_DEFINITIONS[device_key]
+    for device_key, device_def in _DEVICE_DEFINITIONS.items():
         device_identifier = (DOMAIN, f"{entry_id}_{device_def['suffix']}")
 
         if device_key == "system":
-            return DeviceInfo(
+            device_infos[device_key] = DeviceInfo(
                 identifiers={system_identifier},
-                name=_DEVICE_DEFINITIONS["system"]["name"],
+                name=device_def["name"],
                 manufacturer=MANUFACTURER,
                 model=MODEL,
             )
-
-        if device_key == "battery":
-            return DeviceInfo(
+        elif device_key == "battery":
+            device_infos[device_key] = DeviceInfo(
                 identifiers={battery_identifier},
-                name=_DEVICE_DEFINITIONS["battery"]["name"],
+                name=device_def["name"],
                 manufacturer=MANUFACTURER,
                 model=MODEL,
                 via_device=system_identifier,
             )
-
-        if device_key in {"battery_diagnose", "cell_diagnose"}:
-            return DeviceInfo(
+        elif device_key in {"battery_diagnose", "cell_diagnose"}:
+            device_infos[device_key] = DeviceInfo(
                 identifiers={device_identifier},
                 name=device_def["name"],
                 manufacturer=MANUFACTURER,
                 model=MODEL,
                 via_device=battery_identifier,
             )
+        else:
+            device_infos[device_key] = DeviceInfo(
+                identifiers={device_identifier},
+                name=device_def["name"],
+                manufacturer=MANUFACTURER,
+                model=MODEL,
+                via_device=system_identifier,
+            )
+
+    return device_infos
+
+
+def _build_charger_device_info(entry_id: str, device_key: str) -> DeviceInfo:
+    """Build the device of one discovered charger."""
+    return DeviceInfo(
+        identifiers={(DOMAIN, f"{entry_id}_{device_key}")},
+        name=f"Charger {device_key.removeprefix('charger')}",
+        manufacturer=MANUFACTURER,
+        model=MODEL,
+        via_device=(DOMAIN, f"{entry_id}_system"),
+    )
+
+
+class FemsDeviceInfos:
+    """Logical devices of one config entry, shared by all its entities."""
+
+    def __init__(self, entry_id: str) -> None:
+        """Build the fixed devices of the entry."""
+        self.entry_id = entry_id
+        self._device_infos = _build_device_infos(entry_id)
+
+    def get(self, device_key: str) -> DeviceInfo:
+        """Return the device for a logical device key."""
+        device_info = self._device_infos.get(device_key)
+        if device_info is None:
+            # Charger werden erst zur Laufzeit erkannt
+            device_info = self._device_infos[device_key] = (
+                _build_charger_device_info(self.entry_id, device_key)
+            )
+        return device_info
+
+
+class FemsCoordinatorEntity(CoordinatorEntity):
+    """Base FEMS entity."""
+
+    _attr_has_entity_name = True
 
-        return DeviceInfo(
-            identifiers={device_identifier},
-            name=device_def["name"],
-            manufacturer=MANUFACTURER,
-            model=MODEL,
-            via_device=system_identifier,
-        )
+    @property
+    def _fems_entity_key(self) -> str:
+        """Return entity key."""
+        description = getattr(self, "entity_description", None)
+        return getattr(description, "key", "")
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        """Mark values restored from the snapshot until the first live refresh."""
+        data = self.coordinator.data
+        if data is not None and data.stale:
+            return {ATTR_RESTORED: True}
+        return None
+
+    @property
+    def _fems_device_key(self) -> str:
+        """Return logical device key."""
+        return _device_key_from_entity_key(self._fems_entity_key)
+
+    @property
+    def device_info(self) -> DeviceInfo:
+        """Return device info."""
+        device_infos: FemsDeviceInfos = self.coordinator.device_infos
+        return device_infos.get(self._fems_device_key)
@@ -5,28 +5,86 @@ from __future__ import annotations
 import asyncio
 import logging
 import struct
-from typing import Any
+import time
+from typing import TYPE_CHECKING, Any
 
-from pymodbus.client import AsyncModbusTcpClient
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.importlib import async_import_module
+
+if TYPE_CHECKING:
+    from pymodbus.client import AsyncModbusTcpClient
+
+    from .capture import FemsTrafficRecorder
+    from .ratelimit import FemsTokenBucket
+    from .timing import FemsCycleStats
+    from .tracing import FemsRequestTracer
 
 _LOGGER = logging.getLogger(__name__)
 
+async def async_get_client_class(hass: HomeAssistant) -> type[AsyncModbusTcpClient]:
+    """Import pymodbus on first use, off the event loop."""
+    module = await async_import_module(hass, "pymodbus.client")
+    return module.AsyncModbusTcpClient
+
+
+def modbus_client_key(host: str, port: int, slave: int) -> str:
+    """Return the key under which a validated client is handed over."""
+    return f"{host}:{port}/{slave}"
+
+
+def decode_float32(registers: list[int]) -> float:
+    """Decode two big-endian registers to float32."""
+    raw = struct.pack(">HH", registers[0], registers[1])
+    return struct.unpack(">f", raw)[0]
+
+
+def decode_float64(registers: list[int]) -> float:
+    """Decode four big-endian registers to float64."""
+    raw = struct.pack(
+        ">HHHH",
+        registers[0],
+        registers[1],
+        registers[2],
+        registers[3],
+    )
+    return struct.unpack(">d", raw)[0]
+
 
 class FemsModbusApi:
     """Async Modbus TCP client for FEMS."""
 
-    def __init__(self, host: str, port: int, slave: int) -> None:
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        host: str,
+        port: int,
+        slave: int,
+        client: AsyncModbusTcpClient | None = None,
+        recorder: FemsTrafficRecorder | None = None,
+        tracer: FemsRequestTracer | None = None,
+        rate_limit: FemsTokenBucket | None = None,
+    ) -> None:
+        self._hass = hass
         self._host = host
         self._port = port
         self._slave = slave
-        self._client: AsyncModbusTcpClient | None = None
+        self._client = client
+        self.recorder = recorder
+        self.tracer = tracer
+        self.rate_limit = rate_limit
+        self.connects = 0
 
     async def async_connect(self) -> None:
         """Ensure connection to Modbus device."""
         if self._client is None:
-            self._client = AsyncModbusTcpClient(host=self._host, port=self._port)
+            client_class = await async_get_client_class(self._hass)
+            # Kein Hintergrund-Reconnect: der nächste Zyklus verbindet bei Bedarf
+            self._client = client_class(
+                host=self._host, port=self._port, reconnect_delay=0
+            )
 
         if not self._client.connected:
+            self.connects += 1
             await self._client.connect()
 
     async def async_close(self) -> None:
@@ -42,80 +100,110 @@ class FemsModbusApi:
             _LOGGER.debug("Modbus read failed: %s", err)
             return None
 
-    async def async_read_uint16_input(self, address: int) -> int | None:
-        """Read single uint16 input register."""
+    async def _async_read_registers(
+        self,
+        function: str,
+        address: int,
+        count: int,
+        stats: FemsCycleStats | None = None,
+    ) -> list[int] | None:
+        """Read ``count`` input or holding registers, None on any failure."""
         await self.async_connect()
 
         if self._client is None:
             return None
 
-        result = await self._async_safe_read(
-            self._client.read_input_registers(
-                address=address,
-                count=1,
-                device_id=self._slave,
-            )
+        read = (
+            self._client.read_input_registers
+            if function == "input"
+            else self._client.read_holding_registers
         )
+        if self.rate_limit is not None:
+            await self.rate_limit.async_acquire()
 
-        if not result or result.isError() or len(result.registers) != 1:
-            return None
+        target = f"{function}/{address}/{count}"
+        start = time.monotonic()
+        try:
+            result = await self._async_safe_read(
+                read(
+                    address=address,
+                    count=count,
+                    device_id=self._slave,
+                )
+            )
+        except asyncio.CancelledError as err:
+            # Vom Modbus-Timeout des Zyklus abgebrochen: trotzdem tracen
+            latency = time.monotonic() - start
+            if stats is not None:
+                stats.add_request("modbus", 0, latency)
+            if self.tracer is not None:
+                self.tracer.record("modbus", target, "cancelled", latency, 0, None, err)
+            raise
+
+        registers = None
+        size = 0
+        if result and not result.isError() and len(result.registers) == count:
+            registers = result.registers
+            size = 2 * count
+
+        latency = time.monotonic() - start
+        if stats is not None:
+            stats.add_request("modbus", size, latency)
+
+        if self.recorder is not None:
+            await self.recorder.async_record_modbus(
+                function, address, count, registers, latency
+            )
 
-        return result.registers[0]
+        if self.tracer is not None:
+            self.tracer.record(
+                "modbus",
+                target,
+                "ok" if registers is not None else "error",
+                latency,
+                size,
+                registers,
+                None if registers is not None else str(result or "no response"),
+            )
 
-    async def async_read_float32_holding(self, address: int) -> float | None:
-        """Read float32 holding register."""
-        await self.async_connect()
+        return registers
 
-        if self._client is None:
+    async def async_read_uint16_input(
+        self, address: int, stats: FemsCycleStats | None = None
+    ) -> int | None:
+        """Read single uint16 input register."""
+        registers = await self._async_read_registers("input", address, 1, stats)
+        if registers is None:
             return None
 
-        result = await self._async_safe_read(
-            self._client.read_holding_registers(
-                address=address,
-                count=2,
-                device_id=self._slave,
-            )
-        )
+        return registers[0]
 
-        if not result or result.isError() or len(result.registers) != 2:
+    async def async_read_float32_holding(
+        self, address: int, stats: FemsCycleStats | None = None
+    ) -> float | None:
+        """Read float32 holding register."""
+        registers = await self._async_read_registers("holding", address, 2, stats)
+        if registers is None:
             return None
 
-        raw = struct.pack(">HH", result.registers[0], result.registers[1])
-        return struct.unpack(">f", raw)[0]
+        return decode_float32(registers)
 
-    async def async_read_float64_holding(self, address: int) -> float | None:
+    async def async_read_float64_holding(
+        self, address: int, stats: FemsCycleStats | None = None
+    ) -> float | None:
         """Read float64 holding register."""
-        await self.async_connect()
-
-        if self._client is None:
-            return None
-
-        result = await self._async_safe_read(
-            self._client.read_holding_registers(
-                address=address,
-                count=4,
-                device_id=self._slave,
-            )
-        )
-
-        if not result or result.isError() or len(result.registers) != 4:
+        registers = await self._async_read_registers("holding", address, 4, stats)
+        if registers is None:
             return None
 
-        raw = struct.pack(
-            ">HHHH",
-            result.registers[0],
-            result.registers[1],
-            result.registers[2],
-            result.registers[3],
-        )
-        return struct.unpack(">d", raw)[0]
+        return decode_float64(registers)
 
     async def async_read_many_uint16_input(
-        self, registers: dict[str, int]
+        self, registers: dict[str, int], stats: FemsCycleStats | None = None
     ) -> dict[str, int | None]:
         """Read multiple uint16 input registers in parallel."""
         tasks = [
-            self.async_read_uint16_input(address)
+            self.async_read_uint16_input(address, stats)
             for address in registers.values()
         ]
         results = await asyncio.gather(*tasks, return_exceptions=True)
@@ -126,11 +214,11 @@ class FemsModbusApi:
         }
 
     async def async_read_many_float32(
-        self, registers: dict[str, int]
+        self, registers: dict[str, int], stats: FemsCycleStats | None = None
     ) -> dict[str, float | None]:
         """Read multiple float32 registers in parallel."""
         tasks = [
-            self.async_read_float32_holding(address)
+            self.async_read_float32_holding(address, stats)
             for address in registers.values()
         ]
         results = await asyncio.gather(*tasks, return_exceptions=True)
@@ -141,11 +229,11 @@ class FemsModbusApi:
         }
 
     async def async_read_many_float64(
-        self, registers: dict[str, int]
+        self, registers: dict[str, int], stats: FemsCycleStats | None = None
     ) -> dict[str, float | None]:
         """Read multiple float64 registers in parallel."""
         tasks = [
-            self.async_read_float64_holding(address)
+            self.async_read_float64_holding(address, stats)
             for address in registers.values()
         ]
         results = await asyncio.gather(*tasks, return_exceptions=True)
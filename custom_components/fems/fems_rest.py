@@ -3,12 +3,22 @@
 
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
-from typing import Any
+import time
+from typing import TYPE_CHECKING, Any
 
 import aiohttp
 
+from .const import PRIORITY_POWER
+
+if TYPE_CHECKING:
+    from .capture import FemsTrafficRecorder
+    from .ratelimit import FemsTokenBucket
+    from .timing import FemsCycleStats, FemsTimings
+    from .tracing import FemsRequestTracer
+
 _LOGGER = logging.getLogger(__name__)
 
 
@@ -22,41 +32,130 @@ class FemsRestApi:
         username: str,
         password: str,
         session: aiohttp.ClientSession,
+        recorder: FemsTrafficRecorder | None = None,
+        timings: FemsTimings | None = None,
+        tracer: FemsRequestTracer | None = None,
+        rate_limit: FemsTokenBucket | None = None,
     ) -> None:
         """Initialize REST API client."""
         self._host = host
         self._port = port
         self._session = session
         self._auth = aiohttp.BasicAuth(username, password)
+        self.recorder = recorder
+        self.timings = timings
+        self.tracer = tracer
+        self.rate_limit = rate_limit
 
     def _url(self, channel_group: str) -> str:
         """Build endpoint URL."""
         return f"http://{self._host}:{self._port}/rest/channel/{channel_group}"
 
-    async def async_fetch_group(self, channel_group: str) -> dict[str, Any]:
-        """Fetch one grouped channel endpoint and map address -> value."""
+    async def async_fetch_group(
+        self,
+        channel_group: str,
+        priority: int = PRIORITY_POWER,
+        stats: FemsCycleStats | None = None,
+    ) -> dict[str, Any]:
+        """Fetch one grouped channel endpoint and map address -> value.
+
+        ``priority`` orders the request in the shared rate limit queue;
+        ``stats`` collects the latency (without the queue wait) for a cycle.
+        """
         url = self._url(channel_group)
+        if self.rate_limit is not None:
+            waited = await self.rate_limit.async_acquire(priority)
+            if self.timings is not None:
+                self.timings.record("rest_wait", waited)
 
-        async with self._session.get(
-            url,
-            auth=self._auth,
-        ) as response:
-            status = response.status
-            content_type = response.headers.get("Content-Type", "")
-            text = await response.text()
+        start = time.monotonic()
+        status: int | str | None = None
+        size = 0
+        text = ""
+
+        try:
+            async with self._session.get(
+                url,
+                auth=self._auth,
+            ) as response:
+                status = response.status
+                body = await response.read()
+                size = len(body)
+                # JSON ist immer UTF-8 (RFC 8259)
+                text = body.decode("utf-8", errors="replace")
+
+                _LOGGER.debug(
+                    "FEMS REST response | group=%s | status=%s | bytes=%s",
+                    channel_group,
+                    status,
+                    size,
+                )
+
+                if self.recorder is not None:
+                    await self.recorder.async_record_rest(
+                        channel_group, status, text, time.monotonic() - start
+                    )
 
-            _LOGGER.debug(
-                "FEMS REST response | group=%s | status=%s | content_type=%s | body=%s",
+                response.raise_for_status()
+
+            result = self._parse_and_map(channel_group, text)
+        except BaseException as err:
+            # Auch vom Sammel-Timeout abgebrochene Requests tracen
+            latency = self._track(start, size, stats)
+            if self.tracer is not None:
+                if isinstance(err, asyncio.CancelledError):
+                    status = "cancelled"
+                elif isinstance(err, TimeoutError):
+                    status = "timeout"
+                self.tracer.record(
+                    "rest",
+                    channel_group,
+                    status,
+                    latency,
+                    size,
+                    text or None,
+                    err,
+                )
+            raise
+
+        latency = self._track(start, size, stats)
+        if self.tracer is not None:
+            self.tracer.record(
+                "rest",
                 channel_group,
                 status,
-                content_type,
-                text[:1000],
+                latency,
+                size,
+                text,
             )
 
-            response.raise_for_status()
+        return result
+
+    @staticmethod
+    def _track(start: float, size: int, stats: FemsCycleStats | None) -> float:
+        """Return the latency of a request and add it to the cycle statistics."""
+        latency = time.monotonic() - start
+        if stats is not None:
+            stats.add_request("rest", size, latency)
+        return latency
+
+    def _parse_and_map(self, channel_group: str, text: str) -> dict[str, Any]:
+        """Parse a response body and map it to address -> value."""
+        if self.timings is None:
+            return self._map_payload(
+                channel_group, self._parse_payload(channel_group, text)
+            )
 
-        payload = self._parse_payload(channel_group, text)
+        with (
+            self.timings.measure("rest_parse"),
+            self.timings.sync_section("rest_parse"),
+        ):
+            return self._map_payload(
+                channel_group, self._parse_payload(channel_group, text)
+            )
 
+    def _map_payload(self, channel_group: str, payload: Any) -> dict[str, Any]:
+        """Map an OpenEMS channel payload to address -> value."""
         result: dict[str, Any] = {}
 
         if isinstance(payload, list):
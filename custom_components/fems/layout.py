@@ -0,0 +1,257 @@
+"""Battery tower/module/cell layout for FEMS."""
+
+from __future__ import annotations
+
+from array import array
+from collections.abc import Iterable, Iterator, Mapping
+from dataclasses import dataclass
+import logging
+import math
+import re
+from typing import TYPE_CHECKING, Any
+
+from .const import (
+    CONF_BATTERY_MODULE_COUNT,
+    CONF_BATTERY_TOWER_COUNT,
+    CONF_CELLS_PER_MODULE,
+    DEFAULT_BATTERY_MODULE_COUNT,
+    DEFAULT_BATTERY_TOWER_COUNT,
+    DEFAULT_CELLS_PER_MODULE,
+)
+
+if TYPE_CHECKING:
+    from homeassistant.config_entries import ConfigEntry
+
+    from .fems_rest import FemsRestApi
+
+_LOGGER = logging.getLogger(__name__)
+
+# Erste Zelle jedes Moduls zählt Türme/Module, Modul 0 liefert die Zellen je Modul
+CELL_PROBE_CHANNEL = r"Tower\d+Module\d+Cell000Voltage|Tower0Module0Cell\d+Voltage"
+CELL_PROBE_GROUP = f"battery0/({CELL_PROBE_CHANNEL})"
+
+_CELL_VOLTAGE_RE = re.compile(r"battery0/Tower(\d+)Module(\d+)Cell(\d+)Voltage")
+
+
+def cell_voltage_address(tower: int, module: int, cell: int) -> str:
+    """Return the REST address of one cell voltage."""
+    return f"battery0/Tower{tower}Module{module}Cell{cell:03d}Voltage"
+
+
+def module_prefix(tower: int, module: int) -> str:
+    """Return the address prefix shared by all cells of one module."""
+    return f"battery0/Tower{tower}Module{module}Cell"
+
+
+def modules_group(modules: Iterable[tuple[int, int]]) -> str:
+    """Return the REST query for all cell voltages of some modules."""
+    names = "|".join(f"Tower{tower}Module{module}" for tower, module in modules)
+    if "|" in names:
+        names = f"({names})"
+    return f"battery0/{names}Cell\\d+Voltage"
+
+
+@dataclass(frozen=True)
+class BatteryLayout:
+    """Towers × modules per tower × cells per module of one battery."""
+
+    tower_count: int
+    module_count: int
+    cells_per_module: int = DEFAULT_CELLS_PER_MODULE
+
+    @property
+    def cell_count(self) -> int:
+        """Return the number of cells of the whole battery."""
+        return self.tower_count * self.module_count * self.cells_per_module
+
+    def index(self, tower: int, module: int, cell: int) -> int:
+        """Return the flat matrix index of one cell."""
+        return (tower * self.module_count + module) * self.cells_per_module + cell
+
+    def modules(self) -> Iterator[tuple[int, int]]:
+        """Yield (tower, module) for every module."""
+        for tower in range(self.tower_count):
+            for module in range(self.module_count):
+                yield tower, module
+
+    def cells(self) -> Iterator[tuple[int, int, int]]:
+        """Yield (tower, module, cell) for every cell, in matrix order."""
+        for tower, module in self.modules():
+            for cell in range(self.cells_per_module):
+                yield tower, module, cell
+
+    def tower_group(self, tower: int) -> str:
+        """Return the REST query for all cell voltages of one tower.
+
+        The query grows with the module count only; the device answers
+        with exactly the cells it has.
+        """
+        modules = "|".join(str(module) for module in range(self.module_count))
+        return f"battery0/Tower{tower}Module({modules})Cell\\d+Voltage"
+
+    def shards(self, count: int) -> list[tuple[tuple[int, int], ...]]:
+        """Split all modules into ``count`` contiguous, nearly equal shards."""
+        modules = list(self.modules())
+        count = max(1, min(count, len(modules)))
+        size, extra = divmod(len(modules), count)
+        shards = []
+        start = 0
+        for index in range(count):
+            end = start + size + (index < extra)
+            shards.append(tuple(modules[start:end]))
+            start = end
+        return shards
+
+    def as_dict(self) -> dict[str, int]:
+        """Return the layout for diagnostics."""
+        return {
+            "tower_count": self.tower_count,
+            "module_count": self.module_count,
+            "cells_per_module": self.cells_per_module,
+        }
+
+
+def battery_layout_from_entry(entry: ConfigEntry) -> BatteryLayout:
+    """Return the layout stored in the options (or data) of a config entry."""
+
+    def _get(key: str, default: int) -> int:
+        return int(entry.options.get(key, entry.data.get(key, default)))
+
+    return BatteryLayout(
+        tower_count=_get(CONF_BATTERY_TOWER_COUNT, DEFAULT_BATTERY_TOWER_COUNT),
+        module_count=_get(CONF_BATTERY_MODULE_COUNT, DEFAULT_BATTERY_MODULE_COUNT),
+        cells_per_module=_get(CONF_CELLS_PER_MODULE, DEFAULT_CELLS_PER_MODULE),
+    )
+
+
+def battery_layout_from_channels(addresses: Iterable[str]) -> BatteryLayout | None:
+    """Derive the layout from the addresses answering the cell probe.
+
+    Returns None if no cell channel was reported.
+    """
+    towers: set[int] = set()
+    modules: set[int] = set()
+    cells: set[int] = set()
+
+    for address in addresses:
+        if match := _CELL_VOLTAGE_RE.fullmatch(address):
+            towers.add(int(match.group(1)))
+            modules.add(int(match.group(2)))
+            cells.add(int(match.group(3)))
+
+    if not towers:
+        return None
+
+    # Indizes zählen ab 0; eine Lücke bedeutet ein nicht antwortendes Modul.
+    # Nur Cell000 gesehen: Firmware ohne Regex-Alternation, Standard annehmen.
+    cells_per_module = max(cells) + 1
+    if cells_per_module == 1:
+        cells_per_module = DEFAULT_CELLS_PER_MODULE
+
+    return BatteryLayout(
+        tower_count=max(towers) + 1,
+        module_count=max(modules) + 1,
+        cells_per_module=cells_per_module,
+    )
+
+
+async def async_detect_battery_layout(rest_api: FemsRestApi) -> BatteryLayout | None:
+    """Query the cell probe once and derive the layout."""
+    try:
+        channels = await rest_api.async_fetch_group(CELL_PROBE_GROUP)
+    except Exception as err:  # noqa: BLE001
+        _LOGGER.debug("FEMS battery layout probe failed: %r", err)
+        return None
+
+    layout = battery_layout_from_channels(channels)
+    _LOGGER.debug("FEMS battery layout detected: %s", layout)
+    return layout
+
+
+class CellMatrix:
+    """Raw cell voltages of all towers, modules and cells in one flat array.
+
+    Missing cells are stored as NaN, so the matrix needs 8 bytes per cell
+    regardless of how many channels the device reported.
+    """
+
+    __slots__ = ("layout", "_values")
+
+    def __init__(self, layout: BatteryLayout, values: array | None = None) -> None:
+        """Initialize an empty matrix or wrap existing values."""
+        self.layout = layout
+        self._values = (
+            values if values is not None else array("d", [math.nan]) * layout.cell_count
+        )
+
+    @classmethod
+    def from_channels(
+        cls,
+        layout: BatteryLayout,
+        channels: Mapping[str, Any],
+    ) -> CellMatrix:
+        """Fill a matrix from REST channels; cells outside the layout are ignored."""
+        matrix = cls(layout)
+        matrix._apply(channels)
+        return matrix
+
+    def with_modules(
+        self,
+        modules: Iterable[tuple[int, int]],
+        channels: Mapping[str, Any],
+    ) -> CellMatrix:
+        """Return a copy with the cells of ``modules`` replaced by ``channels``."""
+        layout = self.layout
+        matrix = CellMatrix(layout, array("d", self._values))
+        empty = array("d", [math.nan]) * layout.cells_per_module
+        for tower, module in modules:
+            if tower < layout.tower_count and module < layout.module_count:
+                start = layout.index(tower, module, 0)
+                matrix._values[start : start + layout.cells_per_module] = empty
+        matrix._apply(channels)
+        return matrix
+
+    def _apply(self, channels: Mapping[str, Any]) -> None:
+        """Store the cell voltages found in REST channels."""
+        layout = self.layout
+        values = self._values
+
+        for address, value in channels.items():
+            if value is None:
+                continue
+            match = _CELL_VOLTAGE_RE.fullmatch(address)
+            if match is None:
+                continue
+            tower, module, cell = (int(group) for group in match.groups())
+            if (
+                tower < layout.tower_count
+                and module < layout.module_count
+                and cell < layout.cells_per_module
+            ):
+                values[layout.index(tower, module, cell)] = value
+
+    def voltage(self, tower: int, module: int, cell: int) -> float | None:
+        """Return the raw voltage of one cell, None if unknown."""
+        if (
+            tower >= self.layout.tower_count
+            or module >= self.layout.module_count
+            or cell >= self.layout.cells_per_module
+        ):
+            return None
+        value = self._values[self.layout.index(tower, module, cell)]
+        return None if math.isnan(value) else value
+
+    def module_voltages(self, tower: int, module: int) -> list[float]:
+        """Return the known raw voltages of one module."""
+        if tower >= self.layout.tower_count or module >= self.layout.module_count:
+            return []
+        start = self.layout.index(tower, module, 0)
+        return [
+            value
+            for value in self._values[start : start + self.layout.cells_per_module]
+            if not math.isnan(value)
+        ]
+
+    def __len__(self) -> int:
+        """Return the number of known cells."""
+        return sum(1 for value in self._values if not math.isnan(value))
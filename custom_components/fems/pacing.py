@@ -0,0 +1,76 @@
+"""Overrun-aware adaptive poll interval for FEMS coordinators."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from .const import (
+    ADAPTIVE_BACKOFF,
+    ADAPTIVE_MAX_FACTOR,
+    ADAPTIVE_OVERRUN_RATIO,
+    ADAPTIVE_RECOVER_RATIO,
+    ADAPTIVE_RECOVERY,
+    ADAPTIVE_SMOOTHING,
+)
+
+
+def _smooth(previous: float | None, sample: float) -> float:
+    """Return the exponentially weighted average including ``sample``."""
+    if previous is None:
+        return sample
+    return previous + ADAPTIVE_SMOOTHING * (sample - previous)
+
+
+class FemsPollPacer:
+    """Stretch the poll interval while the device struggles.
+
+    A cycle that needs more than ``ADAPTIVE_OVERRUN_RATIO`` of the current
+    interval stretches it; once cycles and device latency drop below
+    ``ADAPTIVE_RECOVER_RATIO``, it shrinks step by step back to the target.
+    """
+
+    def __init__(self, target: float) -> None:
+        """Initialize the pacer at the configured interval."""
+        self.stretched = 0
+        self.reset(target)
+
+    def reset(self, target: float) -> None:
+        """Start over at a new configured interval."""
+        self.target = float(target)
+        self.interval = self.target
+        self.cycle: float | None = None
+        self.latency: float | None = None
+
+    def observe(self, cycle: float, latency: float) -> float:
+        """Add one cycle duration and its slowest request; return the interval."""
+        self.cycle = _smooth(self.cycle, cycle)
+        self.latency = _smooth(self.latency, latency)
+
+        if self.cycle > self.interval * ADAPTIVE_OVERRUN_RATIO:
+            # Mindestens doppelte Zyklusdauer Luft, damit sich nichts aufstaut
+            stretched = min(
+                self.target * ADAPTIVE_MAX_FACTOR,
+                max(self.interval * ADAPTIVE_BACKOFF, self.cycle * 2),
+            )
+            if stretched > self.interval:
+                self.stretched += 1
+                self.interval = stretched
+        elif (
+            self.interval > self.target
+            and max(self.cycle, self.latency) < self.interval * ADAPTIVE_RECOVER_RATIO
+        ):
+            self.interval = max(self.target, self.interval * ADAPTIVE_RECOVERY)
+
+        return self.interval
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the pacing state for diagnostics."""
+        return {
+            "target_s": self.target,
+            "interval_s": round(self.interval, 1),
+            "cycle_ms": round(self.cycle * 1000, 1) if self.cycle is not None else None,
+            "latency_ms": (
+                round(self.latency * 1000, 1) if self.latency is not None else None
+            ),
+            "stretched": self.stretched,
+        }
@@ -0,0 +1,174 @@
+"""Per-device request rate limiting for FEMS."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable, Iterable
+import heapq
+import itertools
+import time
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.core import HomeAssistant, callback
+
+from .const import (
+    CONF_MODBUS_HOST,
+    CONF_REST_HOST,
+    DATA_RATE_LIMITERS,
+    DOMAIN,
+    MODBUS_RATE_BURST,
+    MODBUS_RATE_LIMIT,
+    PRIORITY_DIAGNOSTICS,
+    PRIORITY_POWER,
+    REST_RATE_BURST,
+    REST_RATE_LIMIT,
+)
+from .timing import RollingTiming
+
+
+class FemsTokenBucket:
+    """Token bucket handing out request slots by priority, then arrival order.
+
+    Lower priority values are served first; within a priority the queue
+    stays FIFO.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize a full bucket refilled with ``rate`` tokens per second."""
+        self.rate = rate
+        self.burst = burst
+        self._clock = clock
+        self._tokens = float(burst)
+        self._updated = clock()
+        # (Priorität, Ankunft, Weckereignis): heap[0] ist der nächste Wartende
+        self._waiters: list[tuple[int, int, asyncio.Event]] = []
+        self._arrival = itertools.count()
+        self.waits = RollingTiming()
+        self.acquired = 0
+        self.delayed = 0
+        self.delayed_by_priority: dict[int, int] = {}
+
+    def _refill(self) -> None:
+        """Add the tokens accrued since the last refill."""
+        now = self._clock()
+        self._tokens = min(
+            float(self.burst), self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    def _wake_head(self) -> None:
+        """Let the next waiter check for a token."""
+        if self._waiters:
+            self._waiters[0][2].set()
+
+    def waiting(self, before: int = PRIORITY_DIAGNOSTICS) -> int:
+        """Return the number of queued requests more urgent than ``before``."""
+        return sum(1 for priority, _, _ in self._waiters if priority < before)
+
+    async def async_acquire(self, priority: int = PRIORITY_POWER) -> float:
+        """Wait for one token and return the seconds spent waiting."""
+        start = self._clock()
+        self._refill()
+
+        if not self._waiters and self._tokens >= 1:
+            self._tokens -= 1
+            return self._account(start, priority, delayed=False)
+
+        waiter = (priority, next(self._arrival), asyncio.Event())
+        heapq.heappush(self._waiters, waiter)
+        try:
+            while True:
+                if self._waiters[0] is not waiter:
+                    # Nicht an der Reihe: warten, bis der Vorgänger fertig ist
+                    waiter[2].clear()
+                    await waiter[2].wait()
+                    continue
+                self._refill()
+                if self._tokens >= 1:
+                    break
+                # Ein dringenderer Neuzugang übernimmt nach dem Schlafen die Spitze
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+            self._tokens -= 1
+        finally:
+            head = self._waiters[0] is waiter
+            self._waiters.remove(waiter)
+            heapq.heapify(self._waiters)
+            if head:
+                self._wake_head()
+
+        return self._account(start, priority, delayed=True)
+
+    def _account(self, start: float, priority: int, delayed: bool) -> float:
+        """Record one granted token."""
+        waited = self._clock() - start
+        self.acquired += 1
+        if delayed:
+            self.delayed += 1
+            self.delayed_by_priority[priority] = (
+                self.delayed_by_priority.get(priority, 0) + 1
+            )
+        self.waits.add(waited)
+        return waited
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return budget and wait statistics for diagnostics."""
+        return {
+            "rate_per_s": self.rate,
+            "burst": self.burst,
+            "acquired": self.acquired,
+            "delayed": self.delayed,
+            "delayed_by_priority": dict(sorted(self.delayed_by_priority.items())),
+            "queued": len(self._waiters),
+            "wait_ms": self.waits.summary(),
+        }
+
+
+class FemsRateLimiter:
+    """Separate REST and Modbus budgets of one host."""
+
+    def __init__(self) -> None:
+        """Initialize both buckets with the default budgets."""
+        self.rest = FemsTokenBucket(REST_RATE_LIMIT, REST_RATE_BURST)
+        self.modbus = FemsTokenBucket(MODBUS_RATE_LIMIT, MODBUS_RATE_BURST)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the statistics of both buckets."""
+        return {"rest": self.rest.as_dict(), "modbus": self.modbus.as_dict()}
+
+
+def async_get_rate_limiter(hass: HomeAssistant, host: str) -> FemsRateLimiter:
+    """Return the limiter shared by all clients talking to ``host``."""
+    limiters: dict[str, FemsRateLimiter] = hass.data.setdefault(DATA_RATE_LIMITERS, {})
+    limiter = limiters.get(host)
+    if limiter is None:
+        limiter = limiters[host] = FemsRateLimiter()
+    return limiter
+
+
+@callback
+def async_release_rate_limiters(
+    hass: HomeAssistant, hosts: Iterable[str], entry_id: str | None = None
+) -> None:
+    """Drop the limiters of ``hosts`` no other loaded FEMS entry talks to."""
+    limiters: dict[str, FemsRateLimiter] | None = hass.data.get(DATA_RATE_LIMITERS)
+    if not limiters:
+        return
+    # Einträge im Setup zählen mit: sie halten ihren Limiter schon
+    in_use = {
+        entry.data[key]
+        for entry in hass.config_entries.async_entries(DOMAIN)
+        if entry.entry_id != entry_id
+        and entry.state
+        in (ConfigEntryState.LOADED, ConfigEntryState.SETUP_IN_PROGRESS)
+        for key in (CONF_REST_HOST, CONF_MODBUS_HOST)
+    }
+    for host in set(hosts) - in_use:
+        limiters.pop(host, None)
+    if not limiters:
+        del hass.data[DATA_RATE_LIMITERS]
@@ -0,0 +1,206 @@
+"""Domain-wide refresh phases for FEMS coordinators."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+
+from .const import DATA_SCHEDULER
+
+if TYPE_CHECKING:
+    from datetime import timedelta
+
+    from homeassistant.config_entries import ConfigEntry
+
+    from .timing import FemsTimings
+
+
+class FemsScheduleSlot:
+    """Phase of one coordinator within its own refresh interval."""
+
+    __slots__ = ("coordinator", "cycle_phase", "phase", "publish_phase")
+
+    def __init__(
+        self,
+        coordinator: FemsPhasedRefreshMixin,
+        cycle_phase: str,
+        publish_phase: str,
+    ) -> None:
+        """Initialize a slot at phase 0."""
+        self.coordinator = coordinator
+        self.cycle_phase = cycle_phase
+        self.publish_phase = publish_phase
+        self.phase = 0.0
+
+    def next_refresh(self, now: float, interval: float) -> float:
+        """Return the loop time of the grid point closest to ``now + interval``.
+
+        Grid points lie at ``phase * interval`` plus whole intervals, so the
+        next refresh comes at least half an interval after ``now``.
+        """
+        offset = self.phase * interval
+        return offset + round((now + interval - offset) / interval) * interval
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return phase and load of the coordinator."""
+        coordinator = self.coordinator
+        interval = (
+            coordinator.update_interval.total_seconds()
+            if coordinator.update_interval is not None
+            else None
+        )
+        cycle = coordinator.timings.summary(self.cycle_phase)
+        publish = coordinator.timings.summary(self.publish_phase)
+        return {
+            "interval_s": round(interval, 1) if interval else None,
+            "phase": round(self.phase, 3),
+            "offset_s": round(self.phase * interval, 1) if interval else None,
+            "listeners": coordinator.listener_count,
+            "cycle_p50_ms": cycle["p50"] if cycle else None,
+            "publish_p50_ms": publish["p50"] if publish else None,
+            # Anteil des Intervalls, in dem der Coordinator arbeitet
+            "duty": (
+                round(cycle["p50"] / 1000 / interval, 4)
+                if cycle and interval
+                else None
+            ),
+        }
+
+
+class FemsPhasedRefreshMixin:
+    """Refresh a DataUpdateCoordinator on the phase of its schedule slot.
+
+    Listed before DataUpdateCoordinator in the bases. The timer is kept
+    here and refreshes go through the public ``async_refresh``; without a
+    slot Home Assistant schedules as usual.
+    """
+
+    entry: ConfigEntry
+    hass: HomeAssistant
+    name: str
+    timings: FemsTimings
+    update_interval: timedelta | None
+    schedule_slot: FemsScheduleSlot | None = None
+    listener_count = 0
+    _phase_timer: asyncio.TimerHandle | None = None
+
+    @callback
+    def async_add_listener(
+        self, update_callback: CALLBACK_TYPE, context: Any = None
+    ) -> Callable[[], None]:
+        """Listen for data updates and count the listeners."""
+        add_listener = super().async_add_listener  # type: ignore[misc]
+        remove = add_listener(update_callback, context)
+        self.listener_count += 1
+        removed = False
+
+        @callback
+        def remove_listener() -> None:
+            nonlocal removed
+            if not removed:
+                removed = True
+                self.listener_count -= 1
+            remove()
+
+        return remove_listener
+
+    async def async_refresh(self) -> None:
+        """Refresh now; the refresh replaces the pending scheduled one."""
+        self._async_cancel_phase_timer()
+        await super().async_refresh()  # type: ignore[misc]
+
+    async def async_shutdown(self) -> None:
+        """Cancel the phased timer, then shut down."""
+        self._async_cancel_phase_timer()
+        await super().async_shutdown()  # type: ignore[misc]
+
+    @callback
+    def _schedule_refresh(self) -> None:
+        """Schedule the next refresh on the phase of this coordinator."""
+        slot = self.schedule_slot
+        if slot is None:
+            super()._schedule_refresh()  # type: ignore[misc]
+            return
+        self._async_cancel_phase_timer()
+        if self.update_interval is None or self.entry.pref_disable_polling:
+            return
+        loop = self.hass.loop
+        when = slot.next_refresh(loop.time(), self.update_interval.total_seconds())
+        self._phase_timer = loop.call_at(when, self._async_handle_phase)
+
+    @callback
+    def _async_cancel_phase_timer(self) -> None:
+        """Cancel the pending phased refresh, if any."""
+        if self._phase_timer is not None:
+            self._phase_timer.cancel()
+            self._phase_timer = None
+
+    @callback
+    def _async_handle_phase(self) -> None:
+        """Start the phased refresh in the background of the entry."""
+        self._phase_timer = None
+        self.entry.async_create_background_task(
+            self.hass, self.async_refresh(), f"{self.name} - refresh", eager_start=True
+        )
+
+
+class FemsDomainScheduler:
+    """Spread the refreshes of all FEMS coordinators evenly over time.
+
+    Each registered coordinator gets a phase in [0, 1) of its own interval;
+    the phases are spaced evenly in registration order, so entries and
+    their two coordinators neither acquire nor publish in lockstep. Phases
+    follow each interval as the pacer stretches it. Coordinators with
+    different intervals are only spread within their own interval and can
+    still meet now and then.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty schedule."""
+        self._slots: dict[tuple[str, str], FemsScheduleSlot] = {}
+
+    @callback
+    def async_register(
+        self,
+        entry_id: str,
+        name: str,
+        coordinator: FemsPhasedRefreshMixin,
+        cycle_phase: str,
+        publish_phase: str,
+    ) -> FemsScheduleSlot:
+        """Add a coordinator and rebalance all phases."""
+        slot = FemsScheduleSlot(coordinator, cycle_phase, publish_phase)
+        self._slots[(entry_id, name)] = slot
+        self._rebalance()
+        return slot
+
+    @callback
+    def async_unregister(self, entry_id: str) -> None:
+        """Remove the coordinators of an entry and rebalance the others."""
+        for key in [key for key in self._slots if key[0] == entry_id]:
+            del self._slots[key]
+        self._rebalance()
+
+    def _rebalance(self) -> None:
+        """Space all phases evenly; takes effect with each next refresh."""
+        count = len(self._slots)
+        for index, slot in enumerate(self._slots.values()):
+            slot.phase = index / count
+
+    def as_dict(self) -> dict[str, dict[str, Any]]:
+        """Return phase and load per entry and coordinator."""
+        report: dict[str, dict[str, Any]] = {}
+        for (entry_id, name), slot in self._slots.items():
+            report.setdefault(entry_id, {})[name] = slot.as_dict()
+        return report
+
+
+def async_get_scheduler(hass: HomeAssistant) -> FemsDomainScheduler:
+    """Return the scheduler shared by all FEMS entries."""
+    scheduler: FemsDomainScheduler | None = hass.data.get(DATA_SCHEDULER)
+    if scheduler is None:
+        scheduler = hass.data[DATA_SCHEDULER] = FemsDomainScheduler()
+    return scheduler
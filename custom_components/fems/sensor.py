@@ -20,21 +20,23 @@ from homeassistant.const import (
     UnitOfEnergy,
     UnitOfPower,
     UnitOfTemperature,
+    UnitOfTime,
 )
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
+from .chargers import charger_ids_from_entry
 from .const import (
-    CELLS_PER_MODULE,
-    CONF_BATTERY_MODULE_COUNT,
     CONF_ENABLE_CELL_VOLTAGES,
-    DEFAULT_BATTERY_MODULE_COUNT,
     DEFAULT_ENABLE_CELL_VOLTAGES,
     DOMAIN,
+    SIGNAL_OPTIONS_UPDATED,
 )
 from .coordinator import FemsDataUpdateCoordinator
 from .diagnostics_coordinator import FemsDiagnosticsCoordinator
 from .entity import FemsCoordinatorEntity
+from .layout import battery_layout_from_entry
 
 
 def _rest_available(coordinator: Any) -> bool:
@@ -97,56 +99,39 @@ def _scaled_modbus_value(
     return round(value / divisor, precision)
 
 
-def _cell_voltage_rest_key(module: int, cell: int) -> str:
-    """Return REST key for one cell voltage."""
-    return f"battery0/Tower0Module{module}Cell{cell:03d}Voltage"
+def _cell_voltage_key(tower: int, module: int, cell: int) -> str:
+    """Return entity key for one cell voltage."""
+    return f"tower{tower}_module{module}_cell{cell:03d}_voltage"
 
 
-def _cell_voltage_value_fn(
-    module: int,
-    cell: int,
-) -> Callable[[Any], float | None]:
-    """Create value function for one cell voltage."""
-    rest_key = _cell_voltage_rest_key(module, cell)
+def _module_spread_key(tower: int, module: int) -> str:
+    """Return entity key for one module spread; tower 0 keeps the old key."""
+    if tower == 0:
+        return f"modul_{module}_spread"
+    return f"tower{tower}_modul_{module}_spread"
 
-    def value_fn(coordinator: Any) -> float | None:
-        return _scaled_rest_value(coordinator, rest_key, 1000, 3)
 
-    return value_fn
-
-
-def _module_cell_voltages(
-    coordinator: Any,
-    module: int,
-) -> list[float]:
-    """Return all available cell voltages for one module."""
-    values: list[float] = []
-
-    for cell in range(CELLS_PER_MODULE):
-        value = _scaled_rest_value(
-            coordinator,
-            _cell_voltage_rest_key(module, cell),
-            1000,
-            3,
-        )
-        if value is not None:
-            values.append(value)
-
-    return values
+def _module_spread_value(coordinator: Any, tower: int, module: int) -> float | None:
+    """Return the spread of all known cell voltages of one module in volts."""
+    cells = coordinator.data.cells
+    if cells is None:
+        return None
 
+    values = cells.module_voltages(tower, module)
+    if len(values) < 2:
+        return None
+    return round((max(values) - min(values)) / 1000, 3)
 
-def _module_spread_value_fn(
-    module: int,
-) -> Callable[[Any], float | None]:
-    """Create value function for one module spread."""
 
-    def value_fn(coordinator: Any) -> float | None:
-        values = _module_cell_voltages(coordinator, module)
-        if len(values) < 2:
-            return None
-        return round(max(values) - min(values), 3)
+def _module_refreshed(coordinator: Any, tower: int, module: int) -> bool:
+    """Return True if the last diagnostics refresh covered this module.
 
-    return value_fn
+    After a change of availability every entity writes its state.
+    """
+    if coordinator.publish_all:
+        return True
+    modules = coordinator.data.modules
+    return modules is None or (tower, module) in modules
 
 
 def _battery_cell_voltage_spread(
@@ -348,60 +333,6 @@ BASE_SENSORS: tuple[FemsSensorDescription, ...] = (
         value_fn=lambda c: _scaled_rest_value(c, "battery0/Tower0MaxTemperature", 10, 1),
         available_fn=_rest_available,
     ),
-    FemsSensorDescription(
-        key="charger0_power",
-        translation_key="charger0_power",
-        native_unit_of_measurement=UnitOfPower.WATT,
-        device_class=SensorDeviceClass.POWER,
-        state_class=SensorStateClass.MEASUREMENT,
-        value_fn=lambda c: _rest_value(c, "charger0/ActualPower"),
-        available_fn=_rest_available,
-    ),
-    FemsSensorDescription(
-        key="charger0_voltage",
-        translation_key="charger0_voltage",
-        native_unit_of_measurement=UnitOfElectricPotential.VOLT,
-        device_class=SensorDeviceClass.VOLTAGE,
-        state_class=SensorStateClass.MEASUREMENT,
-        value_fn=lambda c: _scaled_rest_value(c, "charger0/Voltage", 1000, 1),
-        available_fn=_rest_available,
-    ),
-    FemsSensorDescription(
-        key="charger0_current",
-        translation_key="charger0_current",
-        native_unit_of_measurement=UnitOfElectricCurrent.AMPERE,
-        device_class=SensorDeviceClass.CURRENT,
-        state_class=SensorStateClass.MEASUREMENT,
-        value_fn=lambda c: _scaled_rest_value(c, "charger0/Current", 1000, 1),
-        available_fn=_rest_available,
-    ),
-    FemsSensorDescription(
-        key="charger1_power",
-        translation_key="charger1_power",
-        native_unit_of_measurement=UnitOfPower.WATT,
-        device_class=SensorDeviceClass.POWER,
-        state_class=SensorStateClass.MEASUREMENT,
-        value_fn=lambda c: _rest_value(c, "charger1/ActualPower"),
-        available_fn=_rest_available,
-    ),
-    FemsSensorDescription(
-        key="charger1_voltage",
-        translation_key="charger1_voltage",
-        native_unit_of_measurement=UnitOfElectricPotential.VOLT,
-        device_class=SensorDeviceClass.VOLTAGE,
-        state_class=SensorStateClass.MEASUREMENT,
-        value_fn=lambda c: _scaled_rest_value(c, "charger1/Voltage", 1000, 1),
-        available_fn=_rest_available,
-    ),
-    FemsSensorDescription(
-        key="charger1_current",
-        translation_key="charger1_current",
-        native_unit_of_measurement=UnitOfElectricCurrent.AMPERE,
-        device_class=SensorDeviceClass.CURRENT,
-        state_class=SensorStateClass.MEASUREMENT,
-        value_fn=lambda c: _scaled_rest_value(c, "charger1/Current", 1000, 1),
-        available_fn=_rest_available,
-    ),
     FemsSensorDescription(
         key="battery_run_failed",
         translation_key="battery_run_failed",
@@ -744,25 +675,40 @@ BASE_SENSORS: tuple[FemsSensorDescription, ...] = (
 )
 
 
-def _build_module_spread_sensors(module_count: int) -> list[FemsSensorDescription]:
-    """Build module spread sensors dynamically."""
-    sensors: list[FemsSensorDescription] = []
-
-    for module in range(module_count):
-        sensors.append(
-            FemsSensorDescription(
-                key=f"modul_{module}_spread",
-                translation_key=f"modul_{module}_spread",
-                native_unit_of_measurement=UnitOfElectricPotential.VOLT,
-                device_class=SensorDeviceClass.VOLTAGE,
-                state_class=SensorStateClass.MEASUREMENT,
-                entity_category=EntityCategory.DIAGNOSTIC,
-                value_fn=_module_spread_value_fn(module),
-                available_fn=_diagnostics_rest_available,
-            )
-        )
+def _build_charger_sensors(charger: int) -> tuple[FemsSensorDescription, ...]:
+    """Build the sensors of one discovered charger."""
+    component = f"charger{charger}"
+
+    return (
+        FemsSensorDescription(
+            key=f"{component}_power",
+            translation_key="charger_power",
+            native_unit_of_measurement=UnitOfPower.WATT,
+            device_class=SensorDeviceClass.POWER,
+            state_class=SensorStateClass.MEASUREMENT,
+            value_fn=lambda c: _rest_value(c, f"{component}/ActualPower"),
+            available_fn=_rest_available,
+        ),
+        FemsSensorDescription(
+            key=f"{component}_voltage",
+            translation_key="charger_voltage",
+            native_unit_of_measurement=UnitOfElectricPotential.VOLT,
+            device_class=SensorDeviceClass.VOLTAGE,
+            state_class=SensorStateClass.MEASUREMENT,
+            value_fn=lambda c: _scaled_rest_value(c, f"{component}/Voltage", 1000, 1),
+            available_fn=_rest_available,
+        ),
+        FemsSensorDescription(
+            key=f"{component}_current",
+            translation_key="charger_current",
+            native_unit_of_measurement=UnitOfElectricCurrent.AMPERE,
+            device_class=SensorDeviceClass.CURRENT,
+            state_class=SensorStateClass.MEASUREMENT,
+            value_fn=lambda c: _scaled_rest_value(c, f"{component}/Current", 1000, 1),
+            available_fn=_rest_available,
+        ),
+    )
 
-    return sensors
 
 def _evaluate_spread(
     spread: float | None,
@@ -794,30 +740,96 @@ def _evaluate_spread(
 
     return "critical"
 
-def _build_cell_voltage_sensors(
-    module_count: int,
-    enabled_default: bool,
-) -> list[FemsSensorDescription]:
-    """Build cell voltage sensors dynamically."""
-    sensors: list[FemsSensorDescription] = []
-
-    for module in range(module_count):
-        for cell in range(CELLS_PER_MODULE):
-            sensors.append(
-                FemsSensorDescription(
-                    key=f"tower0_module{module}_cell{cell:03d}_voltage",
-                    translation_key=f"tower0_module{module}_cell{cell:03d}_voltage",
-                    native_unit_of_measurement=UnitOfElectricPotential.VOLT,
-                    device_class=SensorDeviceClass.VOLTAGE,
-                    state_class=SensorStateClass.MEASUREMENT,
-                    entity_category=EntityCategory.DIAGNOSTIC,
-                    entity_registry_enabled_default=enabled_default,
-                    value_fn=_cell_voltage_value_fn(module, cell),
-                    available_fn=_diagnostics_rest_available,
-                )
+@dataclass(frozen=True, kw_only=True)
+class FemsCellVoltageSensorDescription(SensorEntityDescription):
+    """Describe the cell voltage sensor shared by all cell slots."""
+
+    available_fn: Callable[[Any], bool] | None = None
+
+
+CELL_VOLTAGE_SENSOR = FemsCellVoltageSensorDescription(
+    key="cell_voltage",
+    translation_key="cell_voltage",
+    native_unit_of_measurement=UnitOfElectricPotential.VOLT,
+    device_class=SensorDeviceClass.VOLTAGE,
+    state_class=SensorStateClass.MEASUREMENT,
+    entity_category=EntityCategory.DIAGNOSTIC,
+    entity_registry_enabled_default=False,
+    available_fn=_diagnostics_rest_available,
+)
+
+MODULE_SPREAD_SENSOR = FemsCellVoltageSensorDescription(
+    key="module_spread",
+    translation_key="module_spread",
+    native_unit_of_measurement=UnitOfElectricPotential.VOLT,
+    device_class=SensorDeviceClass.VOLTAGE,
+    state_class=SensorStateClass.MEASUREMENT,
+    entity_category=EntityCategory.DIAGNOSTIC,
+    available_fn=_diagnostics_rest_available,
+)
+
+
+TIMING_SENSOR = SensorEntityDescription(
+    key="acquisition_timing",
+    translation_key="acquisition_timing",
+    native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+    device_class=SensorDeviceClass.DURATION,
+    state_class=SensorStateClass.MEASUREMENT,
+    entity_category=EntityCategory.DIAGNOSTIC,
+    entity_registry_enabled_default=False,
+)
+
+POLL_INTERVAL_SENSOR = SensorEntityDescription(
+    key="poll_interval",
+    translation_key="poll_interval",
+    native_unit_of_measurement=UnitOfTime.SECONDS,
+    device_class=SensorDeviceClass.DURATION,
+    state_class=SensorStateClass.MEASUREMENT,
+    entity_category=EntityCategory.DIAGNOSTIC,
+)
+
+DIAGNOSTICS_POLL_INTERVAL_SENSOR = SensorEntityDescription(
+    key="diagnostics_poll_interval",
+    translation_key="diagnostics_poll_interval",
+    native_unit_of_measurement=UnitOfTime.SECONDS,
+    device_class=SensorDeviceClass.DURATION,
+    state_class=SensorStateClass.MEASUREMENT,
+    entity_category=EntityCategory.DIAGNOSTIC,
+)
+
+
+def _build_diagnostics_slots(
+    entry: ConfigEntry,
+) -> dict[str, tuple[str, int, int, int | None]]:
+    """Return dynamic diagnostics sensors keyed by entity key.
+
+    Each slot is ("spread", tower, module, None) or ("cell", tower, module,
+    cell); the entities share MODULE_SPREAD_SENSOR and CELL_VOLTAGE_SENSOR.
+    """
+    layout = battery_layout_from_entry(entry)
+    enable_cell_voltages = entry.options.get(
+        CONF_ENABLE_CELL_VOLTAGES,
+        entry.data.get(
+            CONF_ENABLE_CELL_VOLTAGES,
+            DEFAULT_ENABLE_CELL_VOLTAGES,
+        ),
+    )
+
+    slots: dict[str, tuple[str, int, int, int | None]] = {
+        _module_spread_key(tower, module): ("spread", tower, module, None)
+        for tower, module in layout.modules()
+    }
+
+    if enable_cell_voltages:
+        for tower, module, cell in layout.cells():
+            slots[_cell_voltage_key(tower, module, cell)] = (
+                "cell",
+                tower,
+                module,
+                cell,
             )
 
-    return sensors
+    return slots
 
 
 async def async_setup_entry(
@@ -831,44 +843,82 @@ async def async_setup_entry(
         f"{entry.entry_id}_diagnostics"
     ]
 
-    module_count = entry.options.get(
-        CONF_BATTERY_MODULE_COUNT,
-        entry.data.get(
-            CONF_BATTERY_MODULE_COUNT,
-            DEFAULT_BATTERY_MODULE_COUNT,
-        ),
-    )
-    enable_cell_voltages = entry.options.get(
-        CONF_ENABLE_CELL_VOLTAGES,
-        entry.data.get(
-            CONF_ENABLE_CELL_VOLTAGES,
-            DEFAULT_ENABLE_CELL_VOLTAGES,
-        ),
-    )
-
-    base_entities = [
+    base_entities: list[SensorEntity] = [
         FemsSensorEntity(coordinator, description)
         for description in BASE_SENSORS
     ]
+    base_entities.extend(
+        FemsTimingSensorEntity(timed_coordinator, phase)
+        for timed_coordinator in (coordinator, diagnostics_coordinator)
+        for phase in timed_coordinator.timing_phases
+    )
+    base_entities.extend(
+        (
+            FemsPollIntervalSensorEntity(coordinator, POLL_INTERVAL_SENSOR),
+            FemsPollIntervalSensorEntity(
+                diagnostics_coordinator, DIAGNOSTICS_POLL_INTERVAL_SENSOR
+            ),
+        )
+    )
 
-    diagnostics_descriptions = [
-        *_build_module_spread_sensors(module_count),
-    ]
+    added_keys: set[str] = set()
+
+    def _build_new_dynamic_entities() -> list[SensorEntity]:
+        """Return charger and diagnostics entities that are not yet added."""
+        slots = _build_diagnostics_slots(entry)
+        chargers = {
+            description.key: description
+            for charger in charger_ids_from_entry(entry)
+            for description in _build_charger_sensors(charger)
+        }
+
+        # Entfernte Entities wurden bereits über die Registry bereinigt
+        added_keys.intersection_update(slots.keys() | chargers.keys())
+
+        new_entities: list[SensorEntity] = [
+            FemsSensorEntity(coordinator, description)
+            for key, description in chargers.items()
+            if key not in added_keys
+        ]
+        added_keys.update(chargers)
+
+        for key, (kind, tower, module, cell) in slots.items():
+            if key in added_keys:
+                continue
+            if kind == "cell":
+                new_entities.append(
+                    FemsCellVoltageSensorEntity(
+                        diagnostics_coordinator, tower, module, cell
+                    )
+                )
+            else:
+                new_entities.append(
+                    FemsModuleSpreadSensorEntity(diagnostics_coordinator, tower, module)
+                )
 
-    if enable_cell_voltages:
-        diagnostics_descriptions.extend(
-            _build_cell_voltage_sensors(
-                module_count=module_count,
-                enabled_default=False,
-            )
+        added_keys.update(slots)
+        return new_entities
+
+    @callback
+    def _async_options_updated() -> None:
+        """Add dynamic entities enabled by an options change."""
+        with coordinator.timings.sync_section("sensor_options_update"):
+            new_entities = _build_new_dynamic_entities()
+        if new_entities:
+            async_add_entities(new_entities)
+
+    entry.async_on_unload(
+        async_dispatcher_connect(
+            hass,
+            SIGNAL_OPTIONS_UPDATED.format(entry.entry_id),
+            _async_options_updated,
         )
+    )
 
-    diagnostics_entities = [
-        FemsSensorEntity(diagnostics_coordinator, description)
-        for description in diagnostics_descriptions
-    ]
+    with coordinator.timings.sync_section("sensor_setup"):
+        dynamic_entities = _build_new_dynamic_entities()
 
-    async_add_entities([*base_entities, *diagnostics_entities])
+    async_add_entities([*base_entities, *dynamic_entities])
 
 
 class FemsSensorEntity(FemsCoordinatorEntity, SensorEntity):
@@ -896,4 +946,192 @@ class FemsSensorEntity(FemsCoordinatorEntity, SensorEntity):
         """Return sensor availability."""
         if self.entity_description.available_fn is not None:
             return self.entity_description.available_fn(self.coordinator)
-        return super().available
\ No newline at end of file
+        return super().available
+
+
+class FemsCellVoltageSensorEntity(FemsCoordinatorEntity, SensorEntity):
+    """Representation of one cell voltage slot."""
+
+    entity_description: FemsCellVoltageSensorDescription
+
+    def __init__(
+        self,
+        coordinator: FemsDiagnosticsCoordinator,
+        tower: int,
+        module: int,
+        cell: int,
+    ) -> None:
+        """Initialize the cell voltage sensor."""
+        super().__init__(coordinator)
+        self.entity_description = CELL_VOLTAGE_SENSOR
+        self._slot = (tower, module, cell)
+        self._cell_key = _cell_voltage_key(tower, module, cell)
+        self._attr_unique_id = f"{coordinator.entry.entry_id}_{self._cell_key}"
+        # Einturm-Anlagen behalten die bisherigen Namen ohne Turm
+        if tower:
+            self._attr_translation_key = "tower_cell_voltage"
+        self._attr_translation_placeholders = {
+            "tower": str(tower),
+            "module": str(module),
+            "cell": str(cell),
+        }
+
+    @property
+    def _fems_entity_key(self) -> str:
+        """Return entity key."""
+        return self._cell_key
+
+    @property
+    def _fems_device_key(self) -> str:
+        """Return logical device key."""
+        return "cell_diagnose"
+
+    @property
+    def native_value(self) -> float | None:
+        """Return the cell voltage in volts."""
+        cells = self.coordinator.data.cells
+        if cells is None:
+            return None
+        value = cells.voltage(*self._slot)
+        if value is None:
+            return None
+        return round(value / 1000, 3)
+
+    @property
+    def available(self) -> bool:
+        """Return sensor availability."""
+        return _diagnostics_rest_available(self.coordinator)
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the state only when the shard of this cell was refreshed."""
+        if _module_refreshed(self.coordinator, *self._slot[:2]):
+            super()._handle_coordinator_update()
+
+
+class FemsModuleSpreadSensorEntity(FemsCoordinatorEntity, SensorEntity):
+    """Voltage spread between the cells of one module."""
+
+    entity_description: FemsCellVoltageSensorDescription
+
+    def __init__(
+        self,
+        coordinator: FemsDiagnosticsCoordinator,
+        tower: int,
+        module: int,
+    ) -> None:
+        """Initialize the module spread sensor."""
+        super().__init__(coordinator)
+        self.entity_description = MODULE_SPREAD_SENSOR
+        self._tower = tower
+        self._module = module
+        self._spread_key = _module_spread_key(tower, module)
+        self._attr_unique_id = f"{coordinator.entry.entry_id}_{self._spread_key}"
+        if tower:
+            self._attr_translation_key = "tower_module_spread"
+        self._attr_translation_placeholders = {
+            "tower": str(tower),
+            "module": str(module),
+        }
+
+    @property
+    def _fems_entity_key(self) -> str:
+        """Return entity key."""
+        return self._spread_key
+
+    @property
+    def _fems_device_key(self) -> str:
+        """Return logical device key."""
+        return "cell_diagnose"
+
+    @property
+    def native_value(self) -> float | None:
+        """Return the module spread in volts."""
+        return _module_spread_value(self.coordinator, self._tower, self._module)
+
+    @property
+    def available(self) -> bool:
+        """Return sensor availability."""
+        return _diagnostics_rest_available(self.coordinator)
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the state only when the shard of this module was refreshed."""
+        if _module_refreshed(self.coordinator, self._tower, self._module):
+            super()._handle_coordinator_update()
+
+
+class FemsTimingSensorEntity(FemsCoordinatorEntity, SensorEntity):
+    """Rolling p95 duration of one acquisition phase."""
+
+    entity_description = TIMING_SENSOR
+
+    def __init__(
+        self,
+        coordinator: FemsDataUpdateCoordinator | FemsDiagnosticsCoordinator,
+        phase: str,
+    ) -> None:
+        """Initialize the timing sensor."""
+        super().__init__(coordinator)
+        self._phase = phase
+        self._attr_unique_id = f"{coordinator.entry.entry_id}_timing_{phase}"
+        self._attr_translation_placeholders = {"phase": phase}
+
+    @property
+    def _fems_entity_key(self) -> str:
+        """Return entity key."""
+        return f"timing_{self._phase}"
+
+    @property
+    def native_value(self) -> float | None:
+        """Return the rolling p95 duration in milliseconds."""
+        summary = self.coordinator.timings.summary(self._phase)
+        return summary["p95"] if summary else None
+
+    @property
+    def extra_state_attributes(self) -> dict[str, float] | None:
+        """Return p50, max and the number of samples."""
+        summary = self.coordinator.timings.summary(self._phase)
+        if not summary:
+            return None
+        return {
+            "p50": summary["p50"],
+            "max": summary["max"],
+            "samples": summary["samples"],
+        }
+
+    @property
+    def available(self) -> bool:
+        """Timings stay available while the device itself is failing."""
+        return self.coordinator.timings.summary(self._phase) is not None
+
+
+class FemsPollIntervalSensorEntity(FemsCoordinatorEntity, SensorEntity):
+    """Effective poll interval of a coordinator after adaptive stretching."""
+
+    def __init__(
+        self,
+        coordinator: FemsDataUpdateCoordinator | FemsDiagnosticsCoordinator,
+        description: SensorEntityDescription,
+    ) -> None:
+        """Initialize the interval sensor."""
+        super().__init__(coordinator)
+        self.entity_description = description
+        self._attr_unique_id = f"{coordinator.entry.entry_id}_{description.key}"
+
+    @property
+    def native_value(self) -> float:
+        """Return the interval until the next refresh in seconds."""
+        return round(self.coordinator.pacer.interval, 1)
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return the target interval and the smoothed cycle and latency."""
+        pacing = self.coordinator.pacer.as_dict()
+        del pacing["interval_s"]
+        return pacing
+
+    @property
+    def available(self) -> bool:
+        """The interval is known even while the device is failing."""
+        return True
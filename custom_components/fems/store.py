@@ -0,0 +1,65 @@
+"""Snapshot persistence for FEMS coordinators."""
+
+from __future__ import annotations
+
+import logging
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN, SNAPSHOT_SAVE_DELAY, STORAGE_VERSION
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class FemsSnapshotStore:
+    """Persist the last coordinator snapshot for instant startup values."""
+
+    def __init__(self, hass: HomeAssistant, entry_id: str, name: str) -> None:
+        """Initialize snapshot store."""
+        self._store: Store[dict[str, Any]] = Store(
+            hass,
+            STORAGE_VERSION,
+            f"{DOMAIN}.{entry_id}.{name}",
+        )
+        self._pending: dict[str, Any] = {}
+
+    async def async_load(self) -> dict[str, Any] | None:
+        """Load the last persisted snapshot."""
+        try:
+            data = await self._store.async_load()
+        except Exception as err:  # noqa: BLE001
+            _LOGGER.debug("Could not load FEMS snapshot: %r", err)
+            return None
+
+        if not isinstance(data, dict):
+            return None
+
+        self._pending = data
+        return data
+
+    def async_schedule_save(self, data: dict[str, Any]) -> None:
+        """Schedule a debounced write of the latest snapshot."""
+        self._pending = data
+        self._store.async_delay_save(self._data_to_save, SNAPSHOT_SAVE_DELAY)
+
+    def async_schedule_merge(self, sections: dict[str, dict[str, Any]]) -> None:
+        """Schedule a save that updates the last snapshot value by value.
+
+        Values a partial cycle did not fetch keep their last known value.
+        """
+        self.async_schedule_save(
+            {
+                name: self._pending.get(name, {}) | values
+                for name, values in sections.items()
+            }
+        )
+
+    def _data_to_save(self) -> dict[str, Any]:
+        """Return the snapshot to write."""
+        return self._pending
+
+    async def async_remove(self) -> None:
+        """Remove the persisted snapshot."""
+        await self._store.async_remove()
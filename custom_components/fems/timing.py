@@ -0,0 +1,160 @@
+"""Rolling acquisition timings for FEMS coordinators."""
+
+from __future__ import annotations
+
+from collections import deque
+from collections.abc import Iterator
+from contextlib import contextmanager
+import logging
+import math
+import time
+
+from .const import LOOP_BLOCKING_THRESHOLD, TIMING_WINDOW
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class RollingTiming:
+    """Keep the last samples of one phase and summarise them."""
+
+    __slots__ = ("_samples",)
+
+    def __init__(self, window: int = TIMING_WINDOW) -> None:
+        """Initialize rolling window."""
+        self._samples: deque[float] = deque(maxlen=window)
+
+    def add(self, seconds: float) -> None:
+        """Add one duration in seconds."""
+        self._samples.append(seconds)
+
+    def summary(self) -> dict[str, float] | None:
+        """Return p50/p95/max in milliseconds, or None without samples."""
+        if not self._samples:
+            return None
+
+        ordered = sorted(self._samples)
+
+        def _rank(percentile: int) -> float:
+            # Nearest-rank: kein Interpolieren, Wert stammt immer aus dem Fenster
+            index = max(math.ceil(percentile / 100 * len(ordered)) - 1, 0)
+            return round(ordered[index] * 1000, 1)
+
+        return {
+            "p50": _rank(50),
+            "p95": _rank(95),
+            "max": round(ordered[-1] * 1000, 1),
+            "last": round(self._samples[-1] * 1000, 1),
+            "samples": len(ordered),
+        }
+
+
+class FemsCycleStats:
+    """Request statistics of one coordinator cycle.
+
+    Each cycle passes its own instance to the API calls, so overlapping
+    cycles of the coordinators sharing a client do not mix their numbers.
+    """
+
+    __slots__ = ("bytes", "slowest_latency")
+
+    def __init__(self) -> None:
+        """Initialize empty statistics."""
+        self.bytes: dict[str, int] = {}
+        self.slowest_latency = 0.0
+
+    def add_request(self, kind: str, size: int, latency: float) -> None:
+        """Account one finished request of ``kind`` (rest/modbus)."""
+        self.bytes[kind] = self.bytes.get(kind, 0) + size
+        self.slowest_latency = max(self.slowest_latency, latency)
+
+
+class FemsTimings:
+    """Per-phase rolling timings shared by the coordinators of one entry."""
+
+    def __init__(
+        self,
+        window: int = TIMING_WINDOW,
+        blocking_threshold: float = LOOP_BLOCKING_THRESHOLD,
+    ) -> None:
+        """Initialize timings."""
+        self._window = window
+        self._phases: dict[str, RollingTiming] = {}
+        self.detect_blocking = False
+        self.blocking_threshold = blocking_threshold
+        self._slow_sections: dict[str, list[float]] = {}
+        self._counters: dict[str, dict[str, int]] = {}
+
+    def record(self, phase: str, seconds: float) -> None:
+        """Record one duration for a phase."""
+        timing = self._phases.get(phase)
+        if timing is None:
+            timing = self._phases[phase] = RollingTiming(self._window)
+        timing.add(seconds)
+
+    def count(self, scope: str, outcome: str) -> None:
+        """Count one request outcome (e.g. ``ok``, ``failed``, ``timeout``)."""
+        outcomes = self._counters.setdefault(scope, {})
+        outcomes[outcome] = outcomes.get(outcome, 0) + 1
+
+    def counters(self) -> dict[str, dict[str, int]]:
+        """Return request outcome counters per scope."""
+        return {scope: dict(outcomes) for scope, outcomes in sorted(self._counters.items())}
+
+    @contextmanager
+    def measure(self, phase: str) -> Iterator[None]:
+        """Measure the wrapped block, including failures and cancellation."""
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.record(phase, time.monotonic() - start)
+
+    @contextmanager
+    def sync_section(self, name: str) -> Iterator[None]:
+        """Warn if a synchronous section holds the event loop too long.
+
+        Only wrap code without ``await``; otherwise the time spent waiting
+        would be reported as blocking.
+        """
+        if not self.detect_blocking:
+            yield
+            return
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            if elapsed > self.blocking_threshold:
+                stats = self._slow_sections.setdefault(name, [0, 0.0])
+                stats[0] += 1
+                stats[1] = max(stats[1], elapsed)
+                _LOGGER.warning(
+                    "FEMS section %s blocked the event loop for %.1f ms",
+                    name,
+                    elapsed * 1000,
+                )
+
+    def slow_sections(self) -> dict[str, object]:
+        """Return slow synchronous sections counted since startup."""
+        return {
+            "enabled": self.detect_blocking,
+            "threshold_ms": round(self.blocking_threshold * 1000, 1),
+            "sections": {
+                name: {"count": int(count), "max_ms": round(worst * 1000, 1)}
+                for name, (count, worst) in sorted(self._slow_sections.items())
+            },
+        }
+
+    def summary(self, phase: str) -> dict[str, float] | None:
+        """Return the summary of one phase."""
+        timing = self._phases.get(phase)
+        return timing.summary() if timing is not None else None
+
+    def as_dict(self) -> dict[str, dict[str, float]]:
+        """Return summaries of all recorded phases."""
+        return {
+            phase: summary
+            for phase, timing in sorted(self._phases.items())
+            if (summary := timing.summary()) is not None
+        }
@@ -0,0 +1,66 @@
+"""Sampled request tracing for FEMS REST and Modbus calls."""
+
+from __future__ import annotations
+
+from collections import deque
+import random
+import time
+from typing import Any
+
+from .const import TRACE_BUFFER_SIZE, TRACE_PAYLOAD_LIMIT, TRACE_PAYLOAD_SAMPLE_RATE
+
+
+class FemsRequestTracer:
+    """Keep metadata of recent requests in a fixed-size ring buffer.
+
+    Every call is traced with target, status, latency and size. The payload
+    is only kept for failed calls and a sampled fraction of the others.
+    """
+
+    def __init__(
+        self,
+        size: int = TRACE_BUFFER_SIZE,
+        payload_sample_rate: float = TRACE_PAYLOAD_SAMPLE_RATE,
+        payload_limit: int = TRACE_PAYLOAD_LIMIT,
+    ) -> None:
+        """Initialize tracer."""
+        self.payload_sample_rate = payload_sample_rate
+        self.payload_limit = payload_limit
+        self._traces: deque[dict[str, Any]] = deque(maxlen=size)
+
+    def record(
+        self,
+        kind: str,
+        target: str,
+        status: int | str | None,
+        latency: float,
+        size: int,
+        payload: Any = None,
+        error: BaseException | str | None = None,
+    ) -> None:
+        """Trace one call; ``payload`` is a lazy reference, copied only if kept."""
+        trace: dict[str, Any] = {
+            "time": round(time.time(), 3),
+            "kind": kind,
+            "target": target,
+            "status": status,
+            "latency_ms": round(latency * 1000, 1),
+            "bytes": size,
+        }
+
+        if error is not None:
+            trace["error"] = error if isinstance(error, str) else repr(error)
+
+        if payload is not None and (
+            error is not None or random.random() < self.payload_sample_rate
+        ):
+            if isinstance(payload, str):
+                trace["payload"] = payload[: self.payload_limit]
+            else:
+                trace["payload"] = payload
+
+        self._traces.append(trace)
+
+    def as_list(self) -> list[dict[str, Any]]:
+        """Return all buffered traces, oldest first."""
+        return list(self._traces)
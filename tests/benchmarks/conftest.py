@@ -0,0 +1,5 @@
+"""Fixtures for FEMS benchmarks."""
+
+from __future__ import annotations
+
+from tests.components.fems.conftest import mock_setup_coordinators  # noqa: F401
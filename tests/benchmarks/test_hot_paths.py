@@ -0,0 +1,233 @@
+"""Benchmarks for the FEMS acquisition and entity-update hot paths.
+
+Run with ``pytest tests/benchmarks --benchmark-enable --benchmark-autosave``
+to store results under ``.benchmarks`` and compare them between releases.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Generator
+import re
+from typing import Any
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_registry as er
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+from pytest_homeassistant_custom_component.test_util.aiohttp import (
+    AiohttpClientMocker,
+)
+
+from custom_components.fems.const import (
+    CONF_BATTERY_MODULE_COUNT,
+    CONF_ENABLE_CELL_VOLTAGES,
+    DEFAULT_CELLS_PER_MODULE,
+    DOMAIN,
+    MODBUS_FLOAT32_HOLDING_REGISTERS,
+    MODBUS_FLOAT64_HOLDING_REGISTERS,
+)
+from custom_components.fems.coordinator import FemsData, FemsDataUpdateCoordinator
+from custom_components.fems.fems_modbus import decode_float32, decode_float64
+from custom_components.fems.fems_rest import FemsRestApi
+from tests.components.fems.conftest import MOCK_CONFIG, MOCK_OPTIONS
+from tests.standin.channels import (
+    battery_channels,
+    cell_voltage_channels,
+    charger_channels,
+    modbus_registers,
+    rest_body,
+)
+from tests.standin.fixtures import FemsStandin
+
+CELL_GROUP = "battery0/Tower0Module(0|...)Cell\\d+Voltage"
+MODULE_COUNT = 10
+
+
+def _disable_rate_limit(coordinator: FemsDataUpdateCoordinator) -> None:
+    """Measure the cycle itself, not the token bucket between back-to-back rounds."""
+    coordinator.rest_api.rate_limit = None
+    coordinator.modbus_api.rate_limit = None
+
+
+class _FakeModbusResponse:
+    """Minimal pymodbus read response."""
+
+    def __init__(self, registers: list[int]) -> None:
+        self.registers = registers
+
+    def isError(self) -> bool:  # noqa: N802
+        return False
+
+
+class _FakeModbusClient:
+    """In-process stand-in for AsyncModbusTcpClient."""
+
+    registers = modbus_registers()
+
+    def __init__(self, host: str, port: int, **kwargs: Any) -> None:
+        self.connected = False
+
+    async def connect(self) -> bool:
+        self.connected = True
+        return True
+
+    def close(self) -> None:
+        self.connected = False
+
+    async def read_input_registers(
+        self, address: int, count: int, device_id: int
+    ) -> _FakeModbusResponse:
+        return _FakeModbusResponse(self.registers[address][:count])
+
+    read_holding_registers = read_input_registers
+
+
+@pytest.fixture
+def fake_modbus_client() -> Generator[None, None, None]:
+    """Serve Modbus reads from the synthetic register map."""
+    with patch(
+        "custom_components.fems.fems_modbus.async_get_client_class",
+        new=AsyncMock(return_value=_FakeModbusClient),
+    ):
+        yield
+
+
+def test_rest_parse_cell_payload(benchmark) -> None:
+    """Benchmark parsing a 140-cell OpenEMS response."""
+    api = FemsRestApi("127.0.0.1", 8084, "x", "user", MagicMock())
+    text = rest_body(cell_voltage_channels())
+
+    result = benchmark(
+        lambda: api._map_payload(CELL_GROUP, api._parse_payload(CELL_GROUP, text))
+    )
+
+    assert len(result) == MODULE_COUNT * DEFAULT_CELLS_PER_MODULE
+
+
+def test_modbus_decode_register_map(benchmark) -> None:
+    """Benchmark decoding the full float register map."""
+    registers = modbus_registers()
+    float32 = [
+        registers[address] for address in MODBUS_FLOAT32_HOLDING_REGISTERS.values()
+    ]
+    float64 = [
+        registers[address] for address in MODBUS_FLOAT64_HOLDING_REGISTERS.values()
+    ]
+
+    def _decode() -> list[float]:
+        return [decode_float32(item) for item in float32] + [
+            decode_float64(item) for item in float64
+        ]
+
+    result = benchmark(_decode)
+
+    assert len(result) == len(float32) + len(float64)
+
+
+def test_update_cycle(
+    benchmark,
+    hass: HomeAssistant,
+    aioclient_mock: AiohttpClientMocker,
+    fake_modbus_client: None,
+) -> None:
+    """Benchmark one full _async_update_data cycle against stand-ins."""
+    aioclient_mock.get(re.compile(r"/battery0/"), text=rest_body(battery_channels()))
+    aioclient_mock.get(
+        re.compile(r"/charger"),
+        text=rest_body(charger_channels(0) | charger_channels(1)),
+    )
+
+    entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG, options=MOCK_OPTIONS)
+    entry.add_to_hass(hass)
+    coordinator = FemsDataUpdateCoordinator(hass, entry)
+    _disable_rate_limit(coordinator)
+
+    data = benchmark(
+        lambda: hass.loop.run_until_complete(coordinator._async_update_data())
+    )
+
+    assert data.rest["battery0/Soc"] == 78
+    assert data.rest["charger1/ActualPower"] == 2450
+    assert data.modbus["ess_soc"] == 78
+    assert None not in data.modbus.values()
+
+
+def test_state_write_fanout(
+    benchmark,
+    hass: HomeAssistant,
+    mock_setup_coordinators: None,
+) -> None:
+    """Benchmark publishing new data to all entities of one entry."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data=MOCK_CONFIG,
+        options={
+            **MOCK_OPTIONS,
+            CONF_BATTERY_MODULE_COUNT: MODULE_COUNT,
+            CONF_ENABLE_CELL_VOLTAGES: True,
+        },
+        version=2,
+    )
+    entry.add_to_hass(hass)
+
+    # Zellspannungen sind standardmäßig deaktiviert; für den Benchmark aktivieren
+    entity_registry = er.async_get(hass)
+    for module in range(MODULE_COUNT):
+        for cell in range(DEFAULT_CELLS_PER_MODULE):
+            entity_registry.async_get_or_create(
+                "sensor",
+                DOMAIN,
+                f"{entry.entry_id}_tower0_module{module}_cell{cell:03d}_voltage",
+                config_entry=entry,
+            )
+
+    assert hass.loop.run_until_complete(hass.config_entries.async_setup(entry.entry_id))
+    hass.loop.run_until_complete(hass.async_block_till_done())
+
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    diagnostics_coordinator = hass.data[DOMAIN][f"{entry.entry_id}_diagnostics"]
+    data = FemsData(rest=battery_channels(), modbus={"ess_soc": 78})
+    diagnostics_data = diagnostics_coordinator._build_data(
+        cell_voltage_channels(MODULE_COUNT), stale=False
+    )
+
+    async def _publish() -> None:
+        coordinator.async_set_updated_data(data)
+        diagnostics_coordinator.async_set_updated_data(diagnostics_data)
+        await hass.async_block_till_done()
+
+    benchmark(lambda: hass.loop.run_until_complete(_publish()))
+
+    assert len(hass.states.async_entity_ids()) >= 200
+    hass.loop.run_until_complete(hass.config_entries.async_unload(entry.entry_id))
+
+
+def test_update_cycle_standin(
+    benchmark,
+    hass: HomeAssistant,
+    fems_standin: FemsStandin,
+) -> None:
+    """Benchmark one full update cycle over TCP against the local stand-ins."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data=fems_standin.config,
+        options=MOCK_OPTIONS,
+        version=2,
+    )
+    entry.add_to_hass(hass)
+
+    async def _create() -> FemsDataUpdateCoordinator:
+        # Die echte Client-Session muss im laufenden Event-Loop entstehen
+        return FemsDataUpdateCoordinator(hass, entry)
+
+    coordinator = hass.loop.run_until_complete(_create())
+    coordinator.snapshot_store = MagicMock()
+    _disable_rate_limit(coordinator)
+
+    data = benchmark(
+        lambda: hass.loop.run_until_complete(coordinator._async_update_data())
+    )
+
+    assert "battery0/Soc" in data.rest
+    assert None not in data.modbus.values()
@@ -73,9 +73,17 @@ def mock_setup_coordinators() -> Generator[None, None, None]:
             new=AsyncMock(),
         ),
         patch(
-            "custom_components.fems.FemsDiagnosticsCoordinator.async_config_entry_first_refresh",
+            "custom_components.fems.FemsDiagnosticsCoordinator.async_refresh",
             new=AsyncMock(),
         ),
+        patch(
+            "custom_components.fems.FemsDataUpdateCoordinator.async_restore_snapshot",
+            new=AsyncMock(return_value=False),
+        ),
+        patch(
+            "custom_components.fems.FemsDiagnosticsCoordinator.async_restore_snapshot",
+            new=AsyncMock(return_value=False),
+        ),
     ):
         yield
 
@@ -0,0 +1,123 @@
+"""Tests for recording and replaying raw FEMS traffic."""
+
+from __future__ import annotations
+
+import io
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import ServiceValidationError
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.fems.capture import (
+    KIND_MODBUS,
+    KIND_REST,
+    TrafficFrame,
+    decode_frames,
+    encode_frame,
+    read_frames,
+)
+from custom_components.fems.const import (
+    CAPTURE_DIRECTORY,
+    DOMAIN,
+    SERVICE_START_CAPTURE,
+)
+from custom_components.fems.coordinator import FemsDataUpdateCoordinator
+from tests.components.fems.conftest import MOCK_OPTIONS
+from tests.standin.fixtures import FemsStandin
+from tests.standin.replay import FemsTrafficReplay, async_attach_replay
+
+
+def test_frames_round_trip_and_stop_at_truncated_record() -> None:
+    """Test frames decode back and a torn trailing record is ignored."""
+    frames = [
+        TrafficFrame(KIND_REST, 1.5, 0.25, 200, "battery0/Soc", b"[]"),
+        TrafficFrame(KIND_MODBUS, 2.0, 0.5, 0, "input/302/1", b"\x00\x4e"),
+    ]
+    data = b"".join(encode_frame(frame) for frame in frames)
+
+    assert list(decode_frames(io.BytesIO(data))) == frames
+    assert list(decode_frames(io.BytesIO(data[:-1]))) == frames[:1]
+
+
+async def test_capture_and_replay_cycle(
+    hass: HomeAssistant,
+    fems_standin: FemsStandin,
+    tmp_path: Path,
+) -> None:
+    """Test a recorded cycle replays to the same coordinator data offline."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data=fems_standin.config,
+        options=MOCK_OPTIONS,
+        version=2,
+    )
+    entry.add_to_hass(hass)
+    coordinator = FemsDataUpdateCoordinator(hass, entry)
+    coordinator.snapshot_store = MagicMock()
+    path = tmp_path / "capture.bin.gz"
+
+    await coordinator.async_start_capture(str(path))
+    live = await coordinator._async_update_data()
+    frames = await coordinator.async_stop_capture()
+
+    recorded = await hass.async_add_executor_job(read_frames, path)
+    assert len(recorded) == frames
+    assert {frame.kind for frame in recorded} == {KIND_REST, KIND_MODBUS}
+
+    # Stand-ins abschalten: die Wiedergabe darf kein Netzwerk benötigen
+    await fems_standin.rest.async_stop()
+    await fems_standin.modbus.async_stop()
+
+    replay = await FemsTrafficReplay.async_load(path, speed=0)
+    diagnostics = MagicMock()
+    hass.data.setdefault(DOMAIN, {})[f"{entry.entry_id}_diagnostics"] = diagnostics
+    live_client = coordinator.modbus_api._client
+    await async_attach_replay(coordinator, replay)
+    assert not live_client.connected
+    assert diagnostics.rest_api is coordinator.rest_api
+    replayed = await coordinator._async_update_data()
+
+    assert replayed == live
+    assert replay.remaining == 0
+
+
+async def test_start_capture_service_stays_in_capture_directory(
+    hass: HomeAssistant,
+    mock_config_entry: MockConfigEntry,
+    mock_setup_coordinators: None,
+) -> None:
+    """Test the capture file name cannot leave the capture directory."""
+    mock_config_entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(mock_config_entry.entry_id)
+    await hass.async_block_till_done()
+    coordinator = hass.data[DOMAIN][mock_config_entry.entry_id]
+
+    with (
+        patch.object(coordinator, "async_start_capture", new=AsyncMock()) as start,
+        patch("custom_components.fems.os.makedirs"),
+    ):
+        for filename in ("../secrets.yaml", "/tmp/capture.bin", ".."):
+            with pytest.raises(ServiceValidationError):
+                await hass.services.async_call(
+                    DOMAIN,
+                    SERVICE_START_CAPTURE,
+                    {
+                        "config_entry_id": mock_config_entry.entry_id,
+                        "filename": filename,
+                    },
+                    blocking=True,
+                )
+        start.assert_not_awaited()
+
+        await hass.services.async_call(
+            DOMAIN,
+            SERVICE_START_CAPTURE,
+            {"config_entry_id": mock_config_entry.entry_id, "filename": "cap.bin"},
+            blocking=True,
+        )
+    start.assert_awaited_once_with(hass.config.path(CAPTURE_DIRECTORY, "cap.bin"))
+
+    assert await hass.config_entries.async_unload(mock_config_entry.entry_id)
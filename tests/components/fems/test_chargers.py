@@ -0,0 +1,170 @@
+"""Tests for the FEMS charger discovery."""
+
+from __future__ import annotations
+
+from homeassistant import data_entry_flow
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_registry as er
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.fems.chargers import CHARGER_GROUP, charger_ids_from_channels
+from custom_components.fems.const import (
+    CHARGER_MISSING_CYCLES,
+    CONF_CHARGERS,
+    CONF_RESCAN_CHARGERS,
+    DOMAIN,
+)
+from tests.components.fems.conftest import MOCK_OPTIONS
+from tests.standin.fixtures import FemsStandin
+
+
+def test_charger_ids_from_channels() -> None:
+    """Test charger numbers are collected from the returned addresses."""
+    assert charger_ids_from_channels(
+        [
+            "charger2/ActualPower",
+            "charger0/Voltage",
+            "charger0/ActualPower",
+            "battery0/Soc",
+        ]
+    ) == (0, 2)
+    assert charger_ids_from_channels([]) == ()
+
+
+async def _async_setup(
+    hass: HomeAssistant, fems_standin: FemsStandin, **data: object
+) -> MockConfigEntry:
+    """Set up an entry against the stand-ins."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data=fems_standin.config | data,
+        options=MOCK_OPTIONS,
+        version=2,
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    return entry
+
+
+def _charger_unique_ids(hass: HomeAssistant, entry: MockConfigEntry) -> set[str]:
+    """Return the registered charger sensor unique IDs of an entry."""
+    return {
+        registry_entry.unique_id.removeprefix(f"{entry.entry_id}_")
+        for registry_entry in er.async_entries_for_config_entry(
+            er.async_get(hass), entry.entry_id
+        )
+        if registry_entry.unique_id.startswith(f"{entry.entry_id}_charger")
+    }
+
+
+async def test_three_chargers_in_one_request(
+    hass: HomeAssistant,
+    fems_standin: FemsStandin,
+) -> None:
+    """Test all chargers are discovered and read with a single query."""
+    fems_standin.model.charger_count = 3
+
+    entry = await _async_setup(hass, fems_standin)
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+
+    assert entry.data[CONF_CHARGERS] == [0, 1, 2]
+    assert coordinator.query_plan()["rest_groups"][1] == CHARGER_GROUP
+    assert _charger_unique_ids(hass, entry) == {
+        f"charger{charger}_{channel}"
+        for charger in range(3)
+        for channel in ("power", "voltage", "current")
+    }
+    assert hass.states.get("sensor.charger_2_power") is not None
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+
+
+async def test_system_without_chargers_skips_the_query(
+    hass: HomeAssistant,
+    fems_standin: FemsStandin,
+) -> None:
+    """Test a system without chargers keeps no charger entities or requests."""
+    fems_standin.model.charger_count = 0
+
+    # Neuer Eintrag aus dem Config Flow: noch keine Charger bekannt
+    entry = await _async_setup(hass, fems_standin, **{CONF_CHARGERS: []})
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+
+    assert entry.data[CONF_CHARGERS] == []
+    assert _charger_unique_ids(hass, entry) == set()
+    # Ein einzelnes 404 kann ein noch startendes Gerät sein: weiter fragen
+    assert coordinator.charger_ids is None
+
+    for _ in range(CHARGER_MISSING_CYCLES - 1):
+        await coordinator.async_refresh()
+    assert coordinator.charger_ids == ()
+
+    requests = fems_standin.rest.faults.requests
+    await coordinator.async_refresh()
+
+    assert coordinator.last_update_success
+    # Nur noch die Batterie-Gruppe
+    assert fems_standin.rest.faults.requests - requests == 1
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+
+
+async def test_missing_charger_is_removed_after_several_cycles(
+    hass: HomeAssistant,
+    fems_standin: FemsStandin,
+) -> None:
+    """Test new chargers are added at once and missing ones only later."""
+    entry = await _async_setup(hass, fems_standin)
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    assert entry.data[CONF_CHARGERS] == [0, 1]
+
+    fems_standin.model.charger_count = 3
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+    assert entry.data[CONF_CHARGERS] == [0, 1, 2]
+
+    fems_standin.model.charger_count = 1
+    for _ in range(CHARGER_MISSING_CYCLES - 1):
+        await coordinator.async_refresh()
+    await hass.async_block_till_done()
+    assert entry.data[CONF_CHARGERS] == [0, 1, 2]
+
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+    assert entry.data[CONF_CHARGERS] == [0]
+    assert _charger_unique_ids(hass, entry) == {
+        "charger0_power",
+        "charger0_voltage",
+        "charger0_current",
+    }
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+
+
+async def test_rescan_chargers_option_removes_at_once(
+    hass: HomeAssistant,
+    fems_standin: FemsStandin,
+) -> None:
+    """Test an explicit rescan takes the current chargers without waiting."""
+    fems_standin.model.charger_count = 3
+    entry = await _async_setup(hass, fems_standin)
+    fems_standin.model.charger_count = 1
+
+    result = await hass.config_entries.options.async_init(entry.entry_id)
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"],
+        user_input=dict(MOCK_OPTIONS) | {CONF_RESCAN_CHARGERS: True},
+    )
+    await hass.async_block_till_done()
+
+    assert result["type"] == data_entry_flow.FlowResultType.CREATE_ENTRY
+    assert CONF_RESCAN_CHARGERS not in entry.options
+    assert entry.data[CONF_CHARGERS] == [0]
+    assert _charger_unique_ids(hass, entry) == {
+        "charger0_power",
+        "charger0_voltage",
+        "charger0_current",
+    }
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
@@ -2,9 +2,12 @@
 
 from __future__ import annotations
 
-from unittest.mock import AsyncMock, patch
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
 
 from homeassistant import config_entries, data_entry_flow
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import ConfigEntryNotReady
 
 from custom_components.fems.config_flow import (
     CannotConnect,
@@ -13,6 +16,9 @@ from custom_components.fems.config_flow import (
 )
 from custom_components.fems.const import (
     CONF_BATTERY_MODULE_COUNT,
+    CONF_BATTERY_TOWER_COUNT,
+    CONF_CELLS_PER_MODULE,
+    CONF_CHARGERS,
     CONF_DIAGNOSTICS_INTERVAL,
     CONF_ENABLE_CELL_VOLTAGES,
     CONF_MODBUS_HOST,
@@ -23,12 +29,15 @@ from custom_components.fems.const import (
     CONF_REST_PORT,
     CONF_SCAN_INTERVAL,
     CONF_USERNAME,
+    DATA_MODBUS_CLIENTS,
     DEFAULT_DIAGNOSTICS_INTERVAL,
     DEFAULT_ENABLE_CELL_VOLTAGES,
     DEFAULT_SCAN_INTERVAL,
     DOMAIN,
 )
+from custom_components.fems.fems_modbus import FemsModbusApi
 from tests.components.fems.conftest import MOCK_CONFIG
+from tests.standin.fixtures import FemsStandin
 
 
 async def test_config_flow_success(hass) -> None:
@@ -38,7 +47,7 @@ async def test_config_flow_success(hass) -> None:
     with (
         patch(
             "custom_components.fems.config_flow._validate_input",
-            new=AsyncMock(),
+            new=AsyncMock(return_value=({}, None, None)),
         ),
         patch(
             "custom_components.fems.async_setup_entry",
@@ -50,9 +59,16 @@ async def test_config_flow_success(hass) -> None:
             context={"source": config_entries.SOURCE_USER},
         )
 
-        assert result["type"] == data_entry_flow.FlowResultType.FORM
+        assert result["type"] == data_entry_flow.FlowResultType.MENU
         assert result["step_id"] == "user"
 
+        result = await hass.config_entries.flow.async_configure(
+            result["flow_id"],
+            {"next_step_id": "manual"},
+        )
+        assert result["type"] == data_entry_flow.FlowResultType.FORM
+        assert result["step_id"] == "manual"
+
         result2 = await hass.config_entries.flow.async_configure(
             result["flow_id"],
             user_input=user_input,
@@ -68,6 +84,9 @@ async def test_config_flow_success(hass) -> None:
         CONF_MODBUS_PORT: 502,
         CONF_MODBUS_SLAVE: 1,
         CONF_BATTERY_MODULE_COUNT: 7,
+        CONF_BATTERY_TOWER_COUNT: 1,
+        CONF_CELLS_PER_MODULE: 14,
+        CONF_CHARGERS: [],
         CONF_USERNAME: "x",
         CONF_PASSWORD: "user",
     }
@@ -76,15 +95,25 @@ async def test_config_flow_success(hass) -> None:
         CONF_SCAN_INTERVAL: DEFAULT_SCAN_INTERVAL,
         CONF_DIAGNOSTICS_INTERVAL: DEFAULT_DIAGNOSTICS_INTERVAL,
         CONF_BATTERY_MODULE_COUNT: 7,
+        CONF_BATTERY_TOWER_COUNT: 1,
+        CONF_CELLS_PER_MODULE: 14,
         CONF_ENABLE_CELL_VOLTAGES: DEFAULT_ENABLE_CELL_VOLTAGES,
     }
 
 
 async def test_config_flow_invalid_auth(hass) -> None:
-    """Test config flow invalid auth error."""
-    with patch(
-        "custom_components.fems.config_flow._validate_input",
-        new=AsyncMock(side_effect=InvalidAuth),
+    """Test invalid auth is reported on the password and the probe client closed."""
+    client = MagicMock()
+
+    with (
+        patch(
+            "custom_components.fems.config_flow._validate_rest",
+            new=AsyncMock(side_effect=InvalidAuth),
+        ),
+        patch(
+            "custom_components.fems.config_flow._validate_modbus",
+            new=AsyncMock(return_value=client),
+        ),
     ):
         result = await hass.config_entries.flow.async_init(
             DOMAIN,
@@ -93,14 +122,32 @@ async def test_config_flow_invalid_auth(hass) -> None:
         )
 
     assert result["type"] == data_entry_flow.FlowResultType.FORM
-    assert result["errors"] == {"base": "invalid_auth"}
+    assert result["errors"] == {CONF_PASSWORD: "invalid_auth"}
+    client.close.assert_called_once()
+    assert not hass.data.get(DATA_MODBUS_CLIENTS)
 
 
-async def test_config_flow_rest_cannot_connect(hass) -> None:
-    """Test config flow REST connection error."""
-    with patch(
-        "custom_components.fems.config_flow._validate_input",
-        new=AsyncMock(side_effect=CannotConnect),
+async def test_config_flow_probes_run_concurrently(hass) -> None:
+    """Test both probes start together and a failure cancels the other."""
+    rest_started = asyncio.Event()
+    rest_cancelled = asyncio.Event()
+
+    async def _rest(**kwargs) -> None:
+        rest_started.set()
+        try:
+            await asyncio.sleep(30)
+        except asyncio.CancelledError:
+            rest_cancelled.set()
+            raise
+
+    async def _modbus(**kwargs) -> None:
+        # Liefe die Validierung sequenziell, würde REST nie gestartet
+        await asyncio.wait_for(rest_started.wait(), 1)
+        raise ModbusConnectionError
+
+    with (
+        patch("custom_components.fems.config_flow._validate_rest", new=_rest),
+        patch("custom_components.fems.config_flow._validate_modbus", new=_modbus),
     ):
         result = await hass.config_entries.flow.async_init(
             DOMAIN,
@@ -109,14 +156,21 @@ async def test_config_flow_rest_cannot_connect(hass) -> None:
         )
 
     assert result["type"] == data_entry_flow.FlowResultType.FORM
-    assert result["errors"] == {"base": "cannot_connect"}
+    assert result["errors"] == {CONF_MODBUS_HOST: "cannot_connect_modbus"}
+    assert rest_cancelled.is_set()
 
 
 async def test_config_flow_modbus_cannot_connect(hass) -> None:
     """Test config flow Modbus connection error."""
-    with patch(
-        "custom_components.fems.config_flow._validate_input",
-        new=AsyncMock(side_effect=ModbusConnectionError),
+    with (
+        patch(
+            "custom_components.fems.config_flow._validate_rest",
+            new=AsyncMock(),
+        ),
+        patch(
+            "custom_components.fems.config_flow._validate_modbus",
+            new=AsyncMock(side_effect=ModbusConnectionError),
+        ),
     ):
         result = await hass.config_entries.flow.async_init(
             DOMAIN,
@@ -125,7 +179,102 @@ async def test_config_flow_modbus_cannot_connect(hass) -> None:
         )
 
     assert result["type"] == data_entry_flow.FlowResultType.FORM
-    assert result["errors"] == {"base": "cannot_connect_modbus"}
+    assert result["errors"] == {CONF_MODBUS_HOST: "cannot_connect_modbus"}
+
+
+async def test_config_flow_hands_modbus_client_to_coordinator(
+    hass: HomeAssistant,
+    fems_standin: FemsStandin,
+) -> None:
+    """Test the validated Modbus connection and battery layout are reused."""
+    # Eingegeben werden 7 Module, das Gerät meldet nur 5
+    fems_standin.model.module_count = 5
+
+    result = await hass.config_entries.flow.async_init(
+        DOMAIN,
+        context={"source": config_entries.SOURCE_USER},
+        data=fems_standin.config | {CONF_BATTERY_MODULE_COUNT: 7},
+    )
+    assert result["type"] == data_entry_flow.FlowResultType.CREATE_ENTRY
+    await hass.async_block_till_done()
+
+    entry = result["result"]
+    assert entry.data[CONF_BATTERY_MODULE_COUNT] == 5
+    assert entry.options[CONF_BATTERY_MODULE_COUNT] == 5
+    assert entry.options[CONF_BATTERY_TOWER_COUNT] == 1
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    assert coordinator.last_update_success
+    assert coordinator.data.modbus
+    assert coordinator.modbus_api.connects == 0
+    assert not hass.data[DATA_MODBUS_CLIENTS]
+
+    # Die Verbindung bleibt über die Zyklen offen
+    await coordinator.async_refresh()
+    assert coordinator.modbus_api.connects == 0
+    client = coordinator.modbus_api._client
+    assert client.connected
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    assert not client.connected
+
+
+async def test_config_flow_closes_client_not_taken_over(hass) -> None:
+    """Test a parked Modbus client is closed when no setup takes it over."""
+    client = MagicMock()
+
+    with (
+        patch(
+            "custom_components.fems.config_flow._validate_input",
+            new=AsyncMock(return_value=({}, client, None)),
+        ),
+        patch(
+            "custom_components.fems.async_setup_entry",
+            new=AsyncMock(return_value=True),
+        ),
+    ):
+        result = await hass.config_entries.flow.async_init(
+            DOMAIN,
+            context={"source": config_entries.SOURCE_USER},
+            data=dict(MOCK_CONFIG),
+        )
+
+    assert result["type"] == data_entry_flow.FlowResultType.CREATE_ENTRY
+    client.close.assert_called_once()
+    assert not hass.data[DATA_MODBUS_CLIENTS]
+
+
+async def test_failed_setup_closes_handed_over_client(
+    hass: HomeAssistant,
+    fems_standin: FemsStandin,
+) -> None:
+    """Test the handed-over client is closed when the entry fails to load."""
+    closed = []
+    close = FemsModbusApi.async_close
+
+    async def _async_close(api: FemsModbusApi) -> None:
+        closed.append(api._client)
+        await close(api)
+
+    with (
+        patch(
+            "custom_components.fems.FemsDataUpdateCoordinator.async_config_entry_first_refresh",
+            new=AsyncMock(side_effect=ConfigEntryNotReady("boom")),
+        ),
+        patch.object(FemsModbusApi, "async_close", new=_async_close),
+    ):
+        result = await hass.config_entries.flow.async_init(
+            DOMAIN,
+            context={"source": config_entries.SOURCE_USER},
+            data=fems_standin.config,
+        )
+        await hass.async_block_till_done()
+
+    entry = result["result"]
+    assert entry.state is config_entries.ConfigEntryState.SETUP_RETRY
+    assert not hass.data[DATA_MODBUS_CLIENTS]
+    [client] = closed
+    assert client is not None
+    assert not client.connected
 
 
 async def test_config_flow_unknown_error(hass) -> None:
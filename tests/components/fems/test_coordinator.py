@@ -2,12 +2,16 @@
 
 from __future__ import annotations
 
+import time
 from unittest.mock import AsyncMock, MagicMock, patch
 
+from homeassistant.helpers.update_coordinator import UpdateFailed
+
 from custom_components.fems.coordinator import FemsDataUpdateCoordinator
 from custom_components.fems.diagnostics_coordinator import (
     FemsDiagnosticsCoordinator,
 )
+from custom_components.fems.timing import FemsTimings
 
 
 async def test_data_coordinator_returns_combined_mock_data(hass, mock_config_entry) -> None:
@@ -115,4 +119,142 @@ async def test_diagnostics_coordinator_returns_mock_data(hass, mock_config_entry
 
     assert "battery0/Tower0Module0Cell000Voltage" in data.rest
     assert data.rest["battery0/Tower0Module0Cell001Voltage"] == 3283
-    fake_rest_api.async_fetch_group.assert_awaited_once()
\ No newline at end of file
+    fake_rest_api.async_fetch_group.assert_awaited_once()
+
+
+async def test_data_coordinator_restores_snapshot_as_stale(
+    hass,
+    mock_config_entry,
+) -> None:
+    """Test the main coordinator restores the persisted snapshot."""
+    mock_config_entry.add_to_hass(hass)
+
+    with (
+        patch(
+            "custom_components.fems.coordinator.async_get_clientsession",
+            return_value=MagicMock(),
+        ),
+        patch("custom_components.fems.coordinator.FemsRestApi"),
+        patch("custom_components.fems.coordinator.FemsModbusApi"),
+    ):
+        coordinator = FemsDataUpdateCoordinator(hass, mock_config_entry)
+
+    with patch.object(
+        coordinator.snapshot_store,
+        "async_load",
+        new=AsyncMock(
+            return_value={
+                "rest": {"battery0/Soc": 78},
+                "modbus": {"ess_soc": 78},
+            }
+        ),
+    ):
+        assert await coordinator.async_restore_snapshot() is True
+
+    assert coordinator.data.stale is True
+    assert coordinator.data.rest == {"battery0/Soc": 78}
+    assert coordinator.data.modbus == {"ess_soc": 78}
+
+    with (
+        patch.object(
+            coordinator,
+            "_async_fetch_rest_data",
+            new=AsyncMock(return_value={"battery0/Soc": 79}),
+        ),
+        patch.object(
+            coordinator,
+            "_async_fetch_modbus_data",
+            new=AsyncMock(return_value={"ess_soc": 79}),
+        ),
+        patch.object(coordinator.snapshot_store._store, "async_delay_save"),
+    ):
+        data = await coordinator._async_update_data()
+
+    assert data.stale is False
+    assert coordinator.snapshot_store._data_to_save() == {
+        "rest": {"battery0/Soc": 79},
+        "modbus": {"ess_soc": 79},
+    }
+
+    # Ein Teilzyklus ohne Modbus behält die letzten Modbus-Werte im Snapshot
+    with (
+        patch.object(
+            coordinator,
+            "_async_fetch_rest_data",
+            new=AsyncMock(return_value={"battery0/Soc": 80}),
+        ),
+        patch.object(
+            coordinator,
+            "_async_fetch_modbus_data",
+            new=AsyncMock(side_effect=UpdateFailed("Modbus update timed out")),
+        ),
+        patch.object(coordinator.snapshot_store._store, "async_delay_save"),
+    ):
+        data = await coordinator._async_update_data()
+
+    assert data.modbus == {}
+    assert coordinator.snapshot_store._data_to_save() == {
+        "rest": {"battery0/Soc": 80},
+        "modbus": {"ess_soc": 79},
+    }
+
+
+def test_rolling_timing_percentiles() -> None:
+    """Test nearest-rank percentiles over the rolling window."""
+    timings = FemsTimings(window=100)
+    for millis in range(1, 201):
+        timings.record("cycle", millis / 1000)
+
+    # Nur die letzten 100 Werte (101..200 ms) zählen
+    assert timings.summary("cycle") == {
+        "p50": 150.0,
+        "p95": 195.0,
+        "max": 200.0,
+        "last": 200.0,
+        "samples": 100,
+    }
+    assert timings.summary("modbus_connect") is None
+
+
+async def test_data_coordinator_records_phase_timings(hass, mock_config_entry) -> None:
+    """Test one update cycle records every acquisition phase."""
+    mock_config_entry.add_to_hass(hass)
+
+    with patch(
+        "custom_components.fems.coordinator.async_get_clientsession",
+        return_value=MagicMock(),
+    ):
+        coordinator = FemsDataUpdateCoordinator(hass, mock_config_entry)
+    coordinator.snapshot_store = MagicMock()
+    coordinator.rest_api.async_fetch_group = AsyncMock(return_value={"battery0/Soc": 78})
+    coordinator.modbus_api = MagicMock()
+    coordinator.modbus_api.async_connect = AsyncMock()
+    coordinator.modbus_api.async_close = AsyncMock()
+    coordinator.modbus_api.async_read_many_uint16_input = AsyncMock(return_value={})
+    coordinator.modbus_api.async_read_many_float32 = AsyncMock(return_value={})
+    coordinator.modbus_api.async_read_many_float64 = AsyncMock(return_value={})
+
+    await coordinator._async_update_data()
+
+    recorded = coordinator.timings.as_dict()
+    assert set(coordinator.timing_phases) - {"rest_parse"} <= set(recorded)
+
+
+def test_sync_section_counts_slow_sections(caplog) -> None:
+    """Test slow synchronous sections are warned about and counted."""
+    timings = FemsTimings(blocking_threshold=0.01)
+
+    with timings.sync_section("publish"):
+        time.sleep(0.02)
+    assert timings.slow_sections()["sections"] == {}
+
+    timings.detect_blocking = True
+    with timings.sync_section("publish"):
+        time.sleep(0.02)
+    with timings.sync_section("rest_merge"):
+        pass
+
+    sections = timings.slow_sections()["sections"]
+    assert list(sections) == ["publish"]
+    assert sections["publish"]["count"] == 1
+    assert "FEMS section publish blocked the event loop" in caplog.text
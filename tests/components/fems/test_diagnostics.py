@@ -2,8 +2,11 @@
 
 from __future__ import annotations
 
+import json
 from unittest.mock import MagicMock
 
+from homeassistant.core import HomeAssistant
+
 from pytest_homeassistant_custom_component.common import MockConfigEntry
 
 from custom_components.fems.const import (
@@ -17,7 +20,12 @@ from custom_components.fems.const import (
     CONF_USERNAME,
     DOMAIN,
 )
+from custom_components.fems.coordinator import FemsDataUpdateCoordinator
 from custom_components.fems.diagnostics import async_get_config_entry_diagnostics
+from custom_components.fems.diagnostics_coordinator import FemsDiagnosticsCoordinator
+from custom_components.fems.timing import FemsTimings
+from tests.components.fems.conftest import MOCK_OPTIONS
+from tests.standin.fixtures import FemsStandin
 
 
 async def test_get_config_entry_diagnostics_redacts_password(hass) -> None:
@@ -52,6 +60,8 @@ async def test_get_config_entry_diagnostics_redacts_password(hass) -> None:
         "ess_soc": 78,
         "ess_active_power": 1234.0,
     }
+    coordinator.timings = FemsTimings()
+    coordinator.timings.record("cycle", 0.25)
 
     hass.data.setdefault(DOMAIN, {})
     hass.data[DOMAIN][entry.entry_id] = coordinator
@@ -71,4 +81,66 @@ async def test_get_config_entry_diagnostics_redacts_password(hass) -> None:
     assert result["data"]["modbus"] == {
         "ess_soc": 78,
         "ess_active_power": 1234.0,
-    }
\ No newline at end of file
+    }
+    performance = result["performance"]
+    assert performance["main"]["last_refresh_ms"] == 250.0
+    assert performance["timings_ms"] == {
+        "cycle": {
+            "p50": 250.0,
+            "p95": 250.0,
+            "max": 250.0,
+            "last": 250.0,
+            "samples": 1,
+        }
+    }
+    assert "diagnostics" not in performance
+    assert performance["slow_sections"] == {
+        "enabled": False,
+        "threshold_ms": 50.0,
+        "sections": {},
+    }
+
+
+async def test_diagnostics_performance_section(
+    hass: HomeAssistant,
+    fems_standin: FemsStandin,
+) -> None:
+    """Test the performance section after one cycle against the stand-ins."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data=fems_standin.config,
+        options=MOCK_OPTIONS,
+        version=2,
+    )
+    entry.add_to_hass(hass)
+    coordinator = FemsDataUpdateCoordinator(hass, entry)
+    diagnostics_coordinator = FemsDiagnosticsCoordinator(
+        hass, entry, coordinator.rest_api, coordinator.timings
+    )
+    for item in (coordinator, diagnostics_coordinator):
+        item.snapshot_store = MagicMock()
+        await item.async_refresh()
+
+    hass.data.setdefault(DOMAIN, {})
+    hass.data[DOMAIN][entry.entry_id] = coordinator
+    hass.data[DOMAIN][f"{entry.entry_id}_diagnostics"] = diagnostics_coordinator
+
+    result = await async_get_config_entry_diagnostics(hass, entry)
+    performance = result["performance"]
+
+    assert performance["requests"] == {
+        "modbus": {"ok": 1},
+        "rest_battery0": {"ok": 1},
+        "rest_cells": {"ok": 1},
+        "rest_chargers": {"ok": 1},
+    }
+    assert performance["modbus_connects"] == 1
+    assert performance["main"]["last_refresh_ms"] > 0
+    assert performance["main"]["last_cycle_bytes"]["rest"] > 0
+    assert performance["main"]["last_cycle_bytes"]["modbus"] > 0
+    assert len(performance["main"]["query_plan"]["rest_groups"]) == 2
+    assert performance["diagnostics"]["last_cycle_bytes"]["rest"] > 0
+    assert performance["diagnostics"]["query_plan"]["module_count"] == 7
+    assert len(result["data"]["diagnostics_rest"]) == 7 * 14
+    assert [trace["kind"] for trace in result["traces"]].count("rest") == 3
+    json.dumps(result)
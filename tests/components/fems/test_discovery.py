@@ -0,0 +1,156 @@
+"""Tests for the FEMS subnet discovery."""
+
+from __future__ import annotations
+
+import time
+from unittest.mock import AsyncMock, patch
+
+import pytest
+import pytest_socket
+from homeassistant import config_entries, data_entry_flow
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+
+from custom_components.fems.const import (
+    CONF_MODBUS_HOST,
+    CONF_MODBUS_PORT,
+    CONF_MODBUS_SLAVE,
+    CONF_REST_HOST,
+    CONF_REST_PORT,
+    DEFAULT_MODBUS_SLAVE,
+    DOMAIN,
+)
+from custom_components.fems.discovery import async_discover_fems, subnet_hosts
+from tests.standin.fixtures import FemsStandin
+
+
+@pytest.fixture
+def loopback_subnet(socket_enabled: None) -> None:
+    """Allow connects to all of 127.0.0.0/24, not only 127.0.0.1."""
+    pytest_socket.socket_allow_hosts(subnet_hosts("127.0.0.0/24"))
+
+
+def test_subnet_hosts() -> None:
+    """Test subnets are expanded to hosts and oversized scans refused."""
+    assert subnet_hosts("192.168.1.7/30") == ["192.168.1.5", "192.168.1.6"]
+    assert len(subnet_hosts("10.0.0.0/24")) == 254
+    with pytest.raises(ValueError):
+        subnet_hosts("10.0.0.0/16")
+    with pytest.raises(ValueError):
+        subnet_hosts("not-a-subnet")
+
+
+async def test_discover_standin_in_a_slash_24(
+    hass: HomeAssistant,
+    loopback_subnet: None,
+    fems_standin: FemsStandin,
+) -> None:
+    """Test a full /24 is probed quickly and only the stand-in is found."""
+    start = time.monotonic()
+    found = await async_discover_fems(
+        async_get_clientsession(hass),
+        subnet_hosts("127.0.0.0/24"),
+        rest_port=fems_standin.rest.port,
+        modbus_port=fems_standin.modbus.port,
+        slave=DEFAULT_MODBUS_SLAVE,
+    )
+
+    assert time.monotonic() - start < 5
+    [device] = found
+    assert device.host == "127.0.0.1"
+    assert device.rest_latency is not None
+    assert device.modbus_latency is not None
+
+
+async def test_discover_ranks_complete_hosts_first(
+    hass: HomeAssistant,
+    loopback_subnet: None,
+    fems_standin: FemsStandin,
+) -> None:
+    """Test a host answering only one probe ranks behind complete ones."""
+    with patch(
+        "custom_components.fems.discovery._async_probe_modbus",
+        new=AsyncMock(
+            side_effect=lambda host, *args: {"127.0.0.1": 0.5, "127.0.0.2": 0.001}[host]
+        ),
+    ):
+        found = await async_discover_fems(
+            async_get_clientsession(hass),
+            ["127.0.0.2", "127.0.0.1"],
+            rest_port=fems_standin.rest.port,
+            modbus_port=fems_standin.modbus.port,
+            slave=DEFAULT_MODBUS_SLAVE,
+        )
+
+    # 127.0.0.2 antwortet schneller, hat aber kein REST
+    assert [device.host for device in found] == ["127.0.0.1", "127.0.0.2"]
+
+
+async def test_discovery_flow_prefills_manual_step(
+    hass: HomeAssistant,
+    loopback_subnet: None,
+    fems_standin: FemsStandin,
+) -> None:
+    """Test scanning, picking a device and finishing the manual step."""
+    with patch(
+        "homeassistant.components.network.async_get_source_ip",
+        new=AsyncMock(return_value="127.0.0.1"),
+    ):
+        result = await hass.config_entries.flow.async_init(
+            DOMAIN,
+            context={"source": config_entries.SOURCE_USER},
+        )
+        result = await hass.config_entries.flow.async_configure(
+            result["flow_id"],
+            {"next_step_id": "discovery"},
+        )
+        assert result["step_id"] == "discovery"
+
+        discovery_input = {
+            CONF_REST_PORT: fems_standin.rest.port,
+            CONF_MODBUS_PORT: fems_standin.modbus.port,
+            CONF_MODBUS_SLAVE: DEFAULT_MODBUS_SLAVE,
+        }
+        result = await hass.config_entries.flow.async_configure(
+            result["flow_id"],
+            {"subnet": "127.0.0.0/16", **discovery_input},
+        )
+        assert result["errors"] == {"subnet": "invalid_subnet"}
+
+        result = await hass.config_entries.flow.async_configure(
+            result["flow_id"],
+            {"subnet": "127.0.0.4/30", **discovery_input},
+        )
+        assert result["errors"] == {"base": "no_devices_found"}
+
+        result = await hass.config_entries.flow.async_configure(
+            result["flow_id"],
+            {"subnet": "127.0.0.0/30", **discovery_input},
+        )
+
+    assert result["step_id"] == "pick_device"
+    [label] = result["data_schema"].schema["host"].container.values()
+    assert label.startswith("127.0.0.1 (REST ")
+
+    result = await hass.config_entries.flow.async_configure(
+        result["flow_id"],
+        {"host": "127.0.0.1"},
+    )
+    assert result["step_id"] == "manual"
+    suggested = {
+        str(key): key.description["suggested_value"]
+        for key in result["data_schema"].schema
+        if key.description
+    }
+    assert suggested[CONF_REST_HOST] == "127.0.0.1"
+    assert suggested[CONF_MODBUS_HOST] == "127.0.0.1"
+    assert suggested[CONF_REST_PORT] == fems_standin.rest.port
+
+    result = await hass.config_entries.flow.async_configure(
+        result["flow_id"],
+        fems_standin.config,
+    )
+    assert result["type"] == data_entry_flow.FlowResultType.CREATE_ENTRY
+    await hass.async_block_till_done()
+
+    assert await hass.config_entries.async_unload(result["result"].entry_id)
@@ -0,0 +1,111 @@
+"""Tests for the modules and import cost of the FEMS integration."""
+
+from __future__ import annotations
+
+import json
+import subprocess
+import sys
+
+from tests.conftest import ROOT
+
+# Home Assistant itself is imported first so only our own modules are listed
+# and timed; its import time is the baseline our own cost is measured against.
+_IMPORT_PROBE = """
+import json
+import sys
+
+import homeassistant.components.binary_sensor
+import homeassistant.components.sensor
+import homeassistant.config_entries
+import homeassistant.helpers.update_coordinator
+
+before = set(sys.modules)
+
+import custom_components.fems
+import custom_components.fems.binary_sensor
+import custom_components.fems.config_flow
+import custom_components.fems.diagnostics
+import custom_components.fems.sensor
+
+print(json.dumps({"modules": sorted(set(sys.modules) - before)}))
+"""
+
+
+# Share of the Home Assistant baseline; measured at about 5-8 %
+MAX_IMPORT_SHARE = 0.25
+
+
+def _run_import_probe() -> dict:
+    """Import the integration in a fresh interpreter and report the result.
+
+    ``-X importtime`` reports the cumulative time of every top-level import,
+    so the cost of our modules, including what they pull in, is compared
+    with the Home Assistant imports of the same run instead of the clock.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _IMPORT_PROBE],
+        capture_output=True,
+        check=True,
+        cwd=ROOT,
+        text=True,
+    )
+    probe = json.loads(result.stdout.strip().splitlines()[-1])
+    cumulative = {"custom_components": 0, "homeassistant": 0}
+    for line in result.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        if not line.startswith("import time:"):
+            continue
+        _, total, name = line.removeprefix("import time:").split("|")
+        # Nur Top-Level-Importe; verschachtelte sind weiter eingerückt
+        if name.startswith("  ") or not total.strip().isdigit():
+            continue
+        package = name.strip().split(".")[0]
+        if package in cumulative:
+            cumulative[package] += int(total)
+    probe["import_us"] = cumulative
+    return probe
+
+
+def test_integration_import_does_not_load_pymodbus() -> None:
+    """Test pymodbus is only imported when a Modbus client is created."""
+    probe = _run_import_probe()
+
+    assert not [
+        module for module in probe["modules"] if module.split(".")[0] == "pymodbus"
+    ]
+    assert {
+        module
+        for module in probe["modules"]
+        if module.startswith("custom_components.fems")
+    } == {
+        "custom_components.fems",
+        "custom_components.fems.binary_sensor",
+        "custom_components.fems.capture",
+        "custom_components.fems.chargers",
+        "custom_components.fems.config_flow",
+        "custom_components.fems.const",
+        "custom_components.fems.coordinator",
+        "custom_components.fems.diagnostics",
+        "custom_components.fems.diagnostics_coordinator",
+        "custom_components.fems.discovery",
+        "custom_components.fems.entity",
+        "custom_components.fems.fems_modbus",
+        "custom_components.fems.fems_rest",
+        "custom_components.fems.layout",
+        "custom_components.fems.pacing",
+        "custom_components.fems.ratelimit",
+        "custom_components.fems.scheduler",
+        "custom_components.fems.sensor",
+        "custom_components.fems.store",
+        "custom_components.fems.timing",
+        "custom_components.fems.tracing",
+    }
+
+
+def test_integration_import_cost_relative_to_home_assistant() -> None:
+    """Test importing the integration stays cheap next to Home Assistant."""
+    import_us = _run_import_probe()["import_us"]
+
+    assert import_us["homeassistant"] > 0
+    share = import_us["custom_components"] / import_us["homeassistant"]
+    assert share < MAX_IMPORT_SHARE, import_us
@@ -4,11 +4,21 @@ from __future__ import annotations
 
 from unittest.mock import AsyncMock, MagicMock, patch
 
+from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.helpers import entity_registry as er
+import pytest
 from pytest_homeassistant_custom_component.common import MockConfigEntry
 
-from custom_components.fems import async_migrate_entry, async_setup_entry, async_unload_entry
+from custom_components.fems import (
+    _async_cleanup_dynamic_entities,
+    _async_update_listener,
+    async_migrate_entry,
+    async_setup_entry,
+    async_unload_entry,
+)
 from custom_components.fems.const import (
     CONF_BATTERY_MODULE_COUNT,
+    CONF_ENABLE_CELL_VOLTAGES,
     CONF_MODBUS_HOST,
     CONF_MODBUS_PORT,
     CONF_MODBUS_SLAVE,
@@ -58,9 +68,12 @@ async def test_setup_and_unload_entry_smoke(
 
     mock_main_coordinator = MagicMock()
     mock_main_coordinator.async_config_entry_first_refresh = AsyncMock()
+    mock_main_coordinator.async_restore_snapshot = AsyncMock(return_value=False)
+    mock_main_coordinator.async_stop_capture = AsyncMock(return_value=0)
 
     mock_diag_coordinator = MagicMock()
-    mock_diag_coordinator.async_config_entry_first_refresh = AsyncMock()
+    mock_diag_coordinator.async_refresh = AsyncMock()
+    mock_diag_coordinator.async_restore_snapshot = AsyncMock(return_value=False)
 
     with (
         patch(
@@ -78,8 +91,185 @@ async def test_setup_and_unload_entry_smoke(
     assert f"{mock_config_entry.entry_id}_diagnostics" in hass.data[DOMAIN]
 
     mock_main_coordinator.async_config_entry_first_refresh.assert_awaited_once()
-    mock_diag_coordinator.async_config_entry_first_refresh.assert_awaited_once()
+    mock_diag_coordinator.async_refresh.assert_awaited_once()
 
     assert await async_unload_entry(hass, mock_config_entry) is True
     assert mock_config_entry.entry_id not in hass.data[DOMAIN]
-    assert f"{mock_config_entry.entry_id}_diagnostics" not in hass.data[DOMAIN]
\ No newline at end of file
+    assert f"{mock_config_entry.entry_id}_diagnostics" not in hass.data[DOMAIN]
+    mock_main_coordinator.async_stop_capture.assert_awaited_once()
+
+
+async def test_setup_entry_uses_restored_snapshot(
+    hass,
+    mock_config_entry,
+    mock_forward_entry_setups,
+) -> None:
+    """Test setup does not block on the first refresh when a snapshot exists."""
+    mock_config_entry.add_to_hass(hass)
+
+    mock_main_coordinator = MagicMock()
+    mock_main_coordinator.async_config_entry_first_refresh = AsyncMock()
+    mock_main_coordinator.async_restore_snapshot = AsyncMock(return_value=True)
+    mock_main_coordinator.async_refresh = AsyncMock()
+
+    mock_diag_coordinator = MagicMock()
+    mock_diag_coordinator.async_restore_snapshot = AsyncMock(return_value=True)
+    mock_diag_coordinator.async_refresh = AsyncMock()
+
+    with (
+        patch(
+            "custom_components.fems.FemsDataUpdateCoordinator",
+            return_value=mock_main_coordinator,
+        ),
+        patch(
+            "custom_components.fems.FemsDiagnosticsCoordinator",
+            return_value=mock_diag_coordinator,
+        ),
+    ):
+        assert await async_setup_entry(hass, mock_config_entry) is True
+        await hass.async_block_till_done()
+
+    mock_main_coordinator.async_config_entry_first_refresh.assert_not_awaited()
+    mock_main_coordinator.async_refresh.assert_awaited_once()
+    mock_diag_coordinator.async_refresh.assert_awaited_once()
+
+
+async def test_setup_entry_continues_when_diagnostics_refresh_fails(
+    hass,
+    mock_config_entry,
+    mock_forward_entry_setups,
+) -> None:
+    """Test a failing diagnostics refresh does not block setup."""
+    mock_config_entry.add_to_hass(hass)
+
+    mock_main_coordinator = MagicMock()
+    mock_main_coordinator.async_config_entry_first_refresh = AsyncMock()
+    mock_main_coordinator.async_restore_snapshot = AsyncMock(return_value=False)
+
+    mock_diag_coordinator = MagicMock()
+    mock_diag_coordinator.async_refresh = AsyncMock()
+    mock_diag_coordinator.async_restore_snapshot = AsyncMock(return_value=False)
+    mock_diag_coordinator.last_update_success = False
+
+    with (
+        patch(
+            "custom_components.fems.FemsDataUpdateCoordinator",
+            return_value=mock_main_coordinator,
+        ),
+        patch(
+            "custom_components.fems.FemsDiagnosticsCoordinator",
+            return_value=mock_diag_coordinator,
+        ),
+    ):
+        assert await async_setup_entry(hass, mock_config_entry) is True
+
+    assert f"{mock_config_entry.entry_id}_diagnostics" in hass.data[DOMAIN]
+
+
+async def test_setup_entry_not_ready_when_main_refresh_fails(
+    hass,
+    mock_config_entry,
+) -> None:
+    """Test a failing main refresh still raises ConfigEntryNotReady."""
+    mock_config_entry.add_to_hass(hass)
+
+    mock_main_coordinator = MagicMock()
+    mock_main_coordinator.async_config_entry_first_refresh = AsyncMock(
+        side_effect=RuntimeError("boom")
+    )
+    mock_main_coordinator.async_restore_snapshot = AsyncMock(return_value=False)
+
+    mock_diag_coordinator = MagicMock()
+    mock_diag_coordinator.async_refresh = AsyncMock()
+    mock_diag_coordinator.async_restore_snapshot = AsyncMock(return_value=False)
+
+    with (
+        patch(
+            "custom_components.fems.FemsDataUpdateCoordinator",
+            return_value=mock_main_coordinator,
+        ),
+        patch(
+            "custom_components.fems.FemsDiagnosticsCoordinator",
+            return_value=mock_diag_coordinator,
+        ),
+        pytest.raises(ConfigEntryNotReady),
+    ):
+        await async_setup_entry(hass, mock_config_entry)
+
+    mock_diag_coordinator.async_refresh.assert_awaited_once()
+
+
+async def test_cleanup_removes_only_stale_dynamic_entities(hass) -> None:
+    """Test cleanup removes dynamic entities beyond the configured modules."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        title="FEMS (192.168.11.104)",
+        data={CONF_BATTERY_MODULE_COUNT: 2},
+        options={
+            CONF_BATTERY_MODULE_COUNT: 2,
+            CONF_ENABLE_CELL_VOLTAGES: True,
+        },
+        entry_id="cleanup-entry",
+    )
+    entry.add_to_hass(hass)
+
+    entity_registry = er.async_get(hass)
+    unique_ids = (
+        "cleanup-entry_battery_soc",
+        "cleanup-entry_modul_1_spread",
+        "cleanup-entry_modul_2_spread",
+        "cleanup-entry_tower0_module1_cell013_voltage",
+        "cleanup-entry_tower0_module2_cell000_voltage",
+    )
+    for unique_id in unique_ids:
+        entity_registry.async_get_or_create(
+            "sensor",
+            DOMAIN,
+            unique_id,
+            config_entry=entry,
+        )
+
+    await _async_cleanup_dynamic_entities(hass, entry)
+
+    remaining = {
+        registry_entry.unique_id
+        for registry_entry in er.async_entries_for_config_entry(
+            entity_registry, entry.entry_id
+        )
+    }
+    assert remaining == {
+        "cleanup-entry_battery_soc",
+        "cleanup-entry_modul_1_spread",
+        "cleanup-entry_tower0_module1_cell013_voltage",
+    }
+
+
+async def test_update_listener_applies_options_without_reload(
+    hass,
+    mock_config_entry,
+) -> None:
+    """Test option changes are applied to the running coordinators."""
+    mock_config_entry.add_to_hass(hass)
+
+    mock_main_coordinator = MagicMock()
+    mock_diag_coordinator = MagicMock()
+    mock_diag_coordinator.async_apply_options.return_value = True
+    mock_diag_coordinator.async_request_refresh = AsyncMock()
+
+    hass.data.setdefault(DOMAIN, {})
+    hass.data[DOMAIN][mock_config_entry.entry_id] = mock_main_coordinator
+    hass.data[DOMAIN][f"{mock_config_entry.entry_id}_diagnostics"] = (
+        mock_diag_coordinator
+    )
+
+    with (
+        patch.object(hass.config_entries, "async_reload") as mock_reload,
+        patch("custom_components.fems.async_dispatcher_send") as mock_send,
+    ):
+        await _async_update_listener(hass, mock_config_entry)
+
+    mock_reload.assert_not_called()
+    mock_main_coordinator.async_apply_options.assert_called_once()
+    mock_diag_coordinator.async_apply_options.assert_called_once()
+    mock_diag_coordinator.async_request_refresh.assert_awaited_once()
+    mock_send.assert_called_once()
@@ -0,0 +1,241 @@
+"""Tests for the FEMS battery layout detection."""
+
+from __future__ import annotations
+
+from unittest.mock import MagicMock, patch
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.fems.const import (
+    CONF_BATTERY_MODULE_COUNT,
+    CONF_BATTERY_TOWER_COUNT,
+    CONF_CELLS_PER_MODULE,
+    CONF_DIAGNOSTICS_INTERVAL,
+    DOMAIN,
+)
+from custom_components.fems.diagnostics_coordinator import FemsDiagnosticsCoordinator
+from custom_components.fems.fems_rest import FemsRestApi
+from custom_components.fems.layout import (
+    BatteryLayout,
+    CellMatrix,
+    async_detect_battery_layout,
+    battery_layout_from_channels,
+    modules_group,
+)
+from custom_components.fems.sensor import FemsModuleSpreadSensorEntity
+from custom_components.fems.tracing import FemsRequestTracer
+from tests.standin.fixtures import FemsStandin
+
+
+def _rest_api(hass: HomeAssistant, fems_standin: FemsStandin) -> FemsRestApi:
+    """Return a traced REST client pointing at the stand-in."""
+    return FemsRestApi(
+        fems_standin.rest.host,
+        fems_standin.rest.port,
+        "x",
+        "user",
+        async_get_clientsession(hass),
+        tracer=FemsRequestTracer(),
+    )
+
+
+def test_layout_from_channels() -> None:
+    """Test towers and modules are counted from the probe addresses."""
+    assert battery_layout_from_channels(
+        [
+            "battery0/Tower0Module0Cell000Voltage",
+            "battery0/Tower0Module11Cell000Voltage",
+            "battery0/Tower1Module3Cell000Voltage",
+            "battery0/Tower1Module3Cell001Voltage",
+            "battery0/Soc",
+        ]
+    ) == BatteryLayout(tower_count=2, module_count=12, cells_per_module=2)
+    # Nur Cell000 gemeldet: Standardzahl Zellen annehmen
+    assert battery_layout_from_channels(
+        ["battery0/Tower0Module0Cell000Voltage"]
+    ) == BatteryLayout(tower_count=1, module_count=1)
+    assert battery_layout_from_channels(["battery0/Soc"]) is None
+
+
+def test_cell_matrix() -> None:
+    """Test the matrix stores cells by tower/module/cell and ignores the rest."""
+    layout = BatteryLayout(tower_count=2, module_count=3, cells_per_module=4)
+    matrix = CellMatrix.from_channels(
+        layout,
+        {
+            "battery0/Tower0Module0Cell000Voltage": 3300,
+            "battery0/Tower1Module2Cell003Voltage": 3310,
+            "battery0/Tower1Module2Cell001Voltage": None,
+            "battery0/Tower2Module0Cell000Voltage": 3320,
+            "battery0/Tower0Module0Cell009Voltage": 3330,
+            "battery0/Soc": 78,
+        },
+    )
+
+    assert len(matrix) == 2
+    assert matrix.voltage(0, 0, 0) == 3300
+    assert matrix.voltage(1, 2, 3) == 3310
+    assert matrix.voltage(1, 2, 1) is None
+    assert matrix.voltage(2, 0, 0) is None
+    assert matrix.module_voltages(1, 2) == [3310]
+    assert matrix.module_voltages(5, 0) == []
+    assert [layout.index(*cell) for cell in layout.cells()] == list(
+        range(layout.cell_count)
+    )
+
+
+async def test_detect_layout_with_one_request(
+    hass: HomeAssistant,
+    fems_standin: FemsStandin,
+) -> None:
+    """Test the probe sends a single query and matches the stand-in."""
+    fems_standin.model.module_count = 4
+    fems_standin.model.tower_count = 2
+    fems_standin.model.cells_per_module = 16
+    rest_api = _rest_api(hass, fems_standin)
+
+    layout = await async_detect_battery_layout(rest_api)
+
+    assert layout == BatteryLayout(tower_count=2, module_count=4, cells_per_module=16)
+    # Cell000 je Modul plus die Zellen von Modul 0, nicht alle 128 Zellen
+    assert rest_api.tracer.as_list()[-1]["bytes"] < (2 * 4 + 15) * 200
+
+    fems_standin.rest.faults.error_rate = 1
+    assert await async_detect_battery_layout(rest_api) is None
+
+
+async def test_diagnostics_fetch_per_tower(
+    hass: HomeAssistant,
+    fems_standin: FemsStandin,
+) -> None:
+    """Test cells are queried per tower and a failed tower keeps its values."""
+    fems_standin.model.module_count = 3
+    fems_standin.model.tower_count = 2
+    fems_standin.model.cells_per_module = 8
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data=fems_standin.config,
+        options={
+            CONF_BATTERY_MODULE_COUNT: 3,
+            CONF_BATTERY_TOWER_COUNT: 2,
+            CONF_CELLS_PER_MODULE: 8,
+        },
+    )
+    entry.add_to_hass(hass)
+    coordinator = FemsDiagnosticsCoordinator(hass, entry, _rest_api(hass, fems_standin))
+
+    assert coordinator.query_plan()["rest_groups"] == [
+        "battery0/Tower0Module(0|1|2)Cell\\d+Voltage",
+        "battery0/Tower1Module(0|1|2)Cell\\d+Voltage",
+    ]
+
+    coordinator.data = await coordinator._async_update_data()
+    assert len(coordinator.data.rest) == 2 * 3 * 8
+    assert len(coordinator.data.cells) == 2 * 3 * 8
+    assert coordinator.data.cells.voltage(1, 2, 7) is not None
+
+    # Turm 1 antwortet nicht mehr: seine Werte bleiben, Turm 0 wird aktualisiert
+    fems_standin.model.cells_per_module = 4
+    fetch_group = coordinator.rest_api.async_fetch_group
+
+    async def _fetch_group(group: str, *args) -> dict:
+        if group.startswith("battery0/Tower1"):
+            raise TimeoutError
+        return await fetch_group(group, *args)
+
+    with patch.object(coordinator.rest_api, "async_fetch_group", _fetch_group):
+        data = await coordinator._async_update_data()
+
+    assert data.cells.voltage(0, 0, 5) is None
+    assert data.cells.voltage(1, 2, 7) == coordinator.data.cells.voltage(1, 2, 7)
+
+
+def test_layout_shards() -> None:
+    """Test modules are split into contiguous, nearly equal shards."""
+    layout = BatteryLayout(tower_count=2, module_count=5)
+
+    shards = layout.shards(4)
+    assert [len(shard) for shard in shards] == [3, 3, 2, 2]
+    assert [module for shard in shards for module in shard] == list(layout.modules())
+    assert len(layout.shards(100)) == 10
+    assert layout.shards(0) == [tuple(layout.modules())]
+
+    assert modules_group([(1, 4)]) == "battery0/Tower1Module4Cell\\d+Voltage"
+    assert (
+        modules_group(shards[1])
+        == "battery0/(Tower0Module3|Tower0Module4|Tower1Module0)Cell\\d+Voltage"
+    )
+
+
+async def test_diagnostics_refresh_one_shard_at_a_time(
+    hass: HomeAssistant,
+    fems_standin: FemsStandin,
+) -> None:
+    """Test each refresh reads and publishes one module after a complete read."""
+    fems_standin.model.module_count = 3
+    fems_standin.model.tower_count = 2
+    fems_standin.model.cells_per_module = 8
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data=fems_standin.config,
+        options={
+            CONF_BATTERY_MODULE_COUNT: 3,
+            CONF_BATTERY_TOWER_COUNT: 2,
+            CONF_CELLS_PER_MODULE: 8,
+            CONF_DIAGNOSTICS_INTERVAL: 30,
+        },
+    )
+    entry.add_to_hass(hass)
+    coordinator = FemsDiagnosticsCoordinator(hass, entry, _rest_api(hass, fems_standin))
+
+    # 30 s / 6 Module: alle 5 s ein Modul
+    assert coordinator.update_interval.total_seconds() == 5
+    assert coordinator.query_plan()["shard_groups"][4] == (
+        "battery0/Tower1Module1Cell\\d+Voltage"
+    )
+
+    coordinator.data = await coordinator._async_update_data()
+    assert coordinator.data.modules is None
+    full_bytes = coordinator.last_cycle_bytes["rest"]
+
+    fems_standin.model.cells_per_module = 4
+    for tower, module in coordinator.layout.modules():
+        data = await coordinator._async_update_data()
+        assert data.modules == {(tower, module)}
+        assert data.cells.voltage(tower, module, 5) is None
+        assert coordinator.last_cycle_bytes["rest"] < full_bytes / 4
+        coordinator.data = data
+
+    assert len(coordinator.data.cells) == 6 * 4
+    assert len(coordinator.data.rest) == 6 * 4
+
+    # Nur die Entities der abgefragten Scheibe schreiben ihren Zustand
+    entity = FemsModuleSpreadSensorEntity(coordinator, 1, 2)
+    entity.hass = hass
+    entity.async_write_ha_state = MagicMock()
+    coordinator.data.modules = frozenset({(0, 2)})
+    entity._handle_coordinator_update()
+    entity.async_write_ha_state.assert_not_called()
+    coordinator.data.modules = frozenset({(1, 2)})
+    entity._handle_coordinator_update()
+    entity.async_write_ha_state.assert_called_once()
+
+    # Wechselt die Verfügbarkeit, schreiben alle Entities ihren Zustand,
+    # nicht nur die der fehlgeschlagenen bzw. nächsten Scheibe
+    coordinator.async_add_listener(entity._handle_coordinator_update)
+    fems_standin.rest.faults.error_rate = 1
+    await coordinator.async_refresh()
+    assert not coordinator.last_update_success
+    assert entity.async_write_ha_state.call_count == 2
+
+    fems_standin.rest.faults.error_rate = 0
+    await coordinator.async_refresh()
+    assert coordinator.last_update_success
+    assert coordinator.data.modules != {(1, 2)}
+    assert entity.async_write_ha_state.call_count == 3
+
+    # Weitere Scheiben schreiben wieder nur ihre eigenen Entities
+    await coordinator.async_refresh()
+    assert entity.async_write_ha_state.call_count == 3
@@ -3,22 +3,28 @@
 from __future__ import annotations
 
 from homeassistant import data_entry_flow
+from homeassistant.core import HomeAssistant
 from pytest_homeassistant_custom_component.common import MockConfigEntry
 
 from custom_components.fems.const import (
     CONF_BATTERY_MODULE_COUNT,
+    CONF_BATTERY_TOWER_COUNT,
+    CONF_DETECT_LOOP_BLOCKING,
     CONF_DIAGNOSTICS_INTERVAL,
     CONF_ENABLE_CELL_VOLTAGES,
     CONF_MODBUS_HOST,
     CONF_MODBUS_PORT,
     CONF_MODBUS_SLAVE,
     CONF_PASSWORD,
+    CONF_RESCAN_BATTERY_LAYOUT,
     CONF_REST_HOST,
     CONF_REST_PORT,
     CONF_SCAN_INTERVAL,
     CONF_USERNAME,
     DOMAIN,
 )
+from tests.components.fems.conftest import MOCK_OPTIONS
+from tests.standin.fixtures import FemsStandin
 
 
 async def test_options_flow_init(hass) -> None:
@@ -87,6 +93,7 @@ async def test_options_flow_update(hass) -> None:
             CONF_DIAGNOSTICS_INTERVAL: 300,
             CONF_BATTERY_MODULE_COUNT: 5,
             CONF_ENABLE_CELL_VOLTAGES: False,
+            CONF_DETECT_LOOP_BLOCKING: True,
         },
     )
 
@@ -96,4 +103,59 @@ async def test_options_flow_update(hass) -> None:
         CONF_DIAGNOSTICS_INTERVAL: 300,
         CONF_BATTERY_MODULE_COUNT: 5,
         CONF_ENABLE_CELL_VOLTAGES: False,
-    }
\ No newline at end of file
+        CONF_DETECT_LOOP_BLOCKING: True,
+    }
+
+async def test_options_flow_rescan_battery_layout(
+    hass: HomeAssistant,
+    fems_standin: FemsStandin,
+) -> None:
+    """Test the rescan action replaces the module count with the detected one."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data=fems_standin.config,
+        options={**MOCK_OPTIONS, CONF_BATTERY_MODULE_COUNT: 2},
+        version=2,
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    result = await hass.config_entries.options.async_init(entry.entry_id)
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"],
+        user_input={
+            CONF_SCAN_INTERVAL: 30,
+            CONF_DIAGNOSTICS_INTERVAL: 120,
+            CONF_BATTERY_MODULE_COUNT: 2,
+            CONF_ENABLE_CELL_VOLTAGES: False,
+            CONF_DETECT_LOOP_BLOCKING: False,
+            CONF_RESCAN_BATTERY_LAYOUT: True,
+        },
+    )
+    await hass.async_block_till_done()
+
+    assert result["type"] == data_entry_flow.FlowResultType.CREATE_ENTRY
+    assert entry.options[CONF_BATTERY_MODULE_COUNT] == fems_standin.model.module_count
+    assert entry.options[CONF_BATTERY_TOWER_COUNT] == 1
+    assert CONF_RESCAN_BATTERY_LAYOUT not in entry.options
+
+    diagnostics_coordinator = hass.data[DOMAIN][f"{entry.entry_id}_diagnostics"]
+    assert diagnostics_coordinator.battery_module_count == fems_standin.model.module_count
+
+    # Ohne geladene Integration gibt es keinen REST-Client zum Proben
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    result = await hass.config_entries.options.async_init(entry.entry_id)
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"],
+        user_input={
+            CONF_SCAN_INTERVAL: 30,
+            CONF_DIAGNOSTICS_INTERVAL: 120,
+            CONF_BATTERY_MODULE_COUNT: 2,
+            CONF_ENABLE_CELL_VOLTAGES: False,
+            CONF_DETECT_LOOP_BLOCKING: False,
+            CONF_RESCAN_BATTERY_LAYOUT: True,
+        },
+    )
+    assert result["type"] == data_entry_flow.FlowResultType.FORM
+    assert result["errors"] == {"base": "layout_not_detected"}
@@ -0,0 +1,84 @@
+"""Tests for the FEMS adaptive poll interval."""
+
+from __future__ import annotations
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_registry as er
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.fems.const import (
+    ADAPTIVE_MAX_FACTOR,
+    DEFAULT_SCAN_INTERVAL,
+    DOMAIN,
+)
+from custom_components.fems.pacing import FemsPollPacer
+from tests.components.fems.conftest import MOCK_OPTIONS
+from tests.standin.fixtures import FemsStandin
+
+
+def test_pacer_stretches_and_recovers() -> None:
+    """Test overruns stretch the interval and fast cycles shrink it again."""
+    pacer = FemsPollPacer(10)
+
+    assert pacer.observe(cycle=1.0, latency=0.5) == 10
+
+    # Zyklen von 8 s: geglättet ab dem zweiten über der Hälfte des Intervalls
+    intervals = [pacer.observe(cycle=8.0, latency=7.0) for _ in range(6)]
+    assert intervals == sorted(intervals)
+    assert intervals[-1] > 10
+    assert max(intervals) <= 10 * ADAPTIVE_MAX_FACTOR
+    assert pacer.stretched >= 1
+
+    # Gerät erholt sich: schrittweise zurück, nie unter das Ziel
+    recovered = [pacer.observe(cycle=0.5, latency=0.2) for _ in range(30)]
+    assert recovered == sorted(recovered, reverse=True)
+    assert recovered[-1] == 10
+
+    pacer.reset(20)
+    assert pacer.as_dict()["interval_s"] == 20
+    assert pacer.as_dict()["cycle_ms"] is None
+
+
+async def test_interval_sensor_reports_stretched_interval(
+    hass: HomeAssistant,
+    fems_standin: FemsStandin,
+) -> None:
+    """Test a struggling device stretches the refresh and shows it."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data=fems_standin.config,
+        options=MOCK_OPTIONS,
+        version=2,
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    entity_id = er.async_get(hass).async_get_entity_id(
+        "sensor", DOMAIN, f"{entry.entry_id}_poll_interval"
+    )
+    assert float(hass.states.get(entity_id).state) == DEFAULT_SCAN_INTERVAL
+
+    for _ in range(3):
+        coordinator._pace(cycle=DEFAULT_SCAN_INTERVAL * 0.9, latency=10.0)
+    coordinator.async_update_listeners()
+
+    interval = coordinator.update_interval.total_seconds()
+    assert interval > DEFAULT_SCAN_INTERVAL
+    state = hass.states.get(entity_id)
+    assert float(state.state) == round(interval, 1)
+    assert state.attributes["target_s"] == DEFAULT_SCAN_INTERVAL
+    assert state.attributes["stretched"] >= 1
+
+    # Ohne Intervall (z. B. im Soak-Test) wird nicht gepaced
+    coordinator.update_interval = None
+    await coordinator.async_refresh()
+    assert coordinator.last_update_success
+    assert coordinator.update_interval is None
+
+    # Neue Optionen setzen das Intervall auf das Ziel zurück
+    coordinator.async_apply_options()
+    assert coordinator.update_interval.total_seconds() == DEFAULT_SCAN_INTERVAL
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
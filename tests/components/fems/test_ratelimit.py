@@ -0,0 +1,191 @@
+"""Tests for the FEMS per-host rate limiter."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.fems.const import (
+    CONF_REST_HOST,
+    DATA_RATE_LIMITERS,
+    DOMAIN,
+    MAX_DEFERRED_DIAGNOSTICS,
+    PRIORITY_DIAGNOSTICS,
+    PRIORITY_POWER,
+    PRIORITY_SAFETY,
+)
+from custom_components.fems.coordinator import FemsDataUpdateCoordinator
+from custom_components.fems.diagnostics_coordinator import FemsDiagnosticsCoordinator
+from custom_components.fems.pacing import FemsPollPacer
+from custom_components.fems.ratelimit import FemsTokenBucket, async_get_rate_limiter
+from tests.components.fems.conftest import MOCK_CONFIG, MOCK_OPTIONS
+from tests.standin.fixtures import FemsStandin
+
+
+async def test_token_bucket_is_fifo_and_limits_rate() -> None:
+    """Test bursts beyond the budget wait and are served in arrival order."""
+    bucket = FemsTokenBucket(rate=20, burst=2)
+    served: list[int] = []
+
+    async def _request(index: int) -> float:
+        waited = await bucket.async_acquire()
+        served.append(index)
+        return waited
+
+    start = time.monotonic()
+    waits = await asyncio.gather(*(_request(index) for index in range(6)))
+
+    # 2 sofort aus dem Burst, 4 weitere mit 20/s
+    assert time.monotonic() - start >= 4 / 20 * 0.9
+    assert served == list(range(6))
+    assert max(waits[:2]) < 0.01
+    assert waits[2:] == sorted(waits[2:])
+    assert bucket.acquired == 6
+    assert bucket.delayed == 4
+    assert bucket.as_dict()["wait_ms"]["samples"] == 6
+
+
+async def test_token_bucket_serves_safety_before_diagnostics() -> None:
+    """Test urgent requests overtake queued diagnostics requests."""
+    bucket = FemsTokenBucket(rate=20, burst=1)
+    served: list[str] = []
+
+    async def _request(name: str, priority: int) -> None:
+        await bucket.async_acquire(priority)
+        served.append(name)
+
+    await bucket.async_acquire(PRIORITY_DIAGNOSTICS)
+    diagnostics = [
+        asyncio.create_task(_request(f"cells{index}", PRIORITY_DIAGNOSTICS))
+        for index in range(2)
+    ]
+    await asyncio.sleep(0)
+    assert bucket.waiting(PRIORITY_DIAGNOSTICS) == 0
+
+    urgent = [
+        asyncio.create_task(_request("power", PRIORITY_POWER)),
+        asyncio.create_task(_request("fault", PRIORITY_SAFETY)),
+    ]
+    await asyncio.sleep(0)
+    assert bucket.waiting(PRIORITY_DIAGNOSTICS) == 2
+
+    await asyncio.gather(*diagnostics, *urgent)
+
+    assert served == ["fault", "power", "cells0", "cells1"]
+    assert bucket.as_dict()["delayed_by_priority"] == {
+        PRIORITY_SAFETY: 1,
+        PRIORITY_POWER: 1,
+        PRIORITY_DIAGNOSTICS: 2,
+    }
+    assert bucket.as_dict()["queued"] == 0
+
+
+async def test_diagnostics_defer_while_main_cycle_is_slow(
+    hass: HomeAssistant,
+    mock_config_entry,
+) -> None:
+    """Test cell refreshes yield to a slow main cycle, but not forever."""
+    mock_config_entry.add_to_hass(hass)
+    rest_api = MagicMock(rate_limit=FemsTokenBucket(rate=10, burst=5))
+    rest_api.async_fetch_group = AsyncMock(
+        return_value={"battery0/Tower0Module0Cell000Voltage": 3300}
+    )
+    coordinator = FemsDiagnosticsCoordinator(hass, mock_config_entry, rest_api)
+    previous = coordinator.data = coordinator._build_data(
+        {"battery0/Tower0Module0Cell000Voltage": 3280}
+    )
+
+    # Hauptzyklus braucht 80 % des Scan-Intervalls
+    coordinator.timings.record("cycle", coordinator.scan_interval * 0.8)
+
+    for _ in range(MAX_DEFERRED_DIAGNOSTICS):
+        assert await coordinator._async_update_data() is previous
+    rest_api.async_fetch_group.assert_not_awaited()
+    assert coordinator.timings.counters()["rest_cells"] == {
+        "deferred": MAX_DEFERRED_DIAGNOSTICS
+    }
+
+    data = await coordinator._async_update_data()
+
+    assert data.rest["battery0/Tower0Module0Cell000Voltage"] == 3300
+    assert rest_api.async_fetch_group.await_args.args[1] == PRIORITY_DIAGNOSTICS
+    assert coordinator.deferred == 0
+
+
+async def test_diagnostics_budget_follows_stretched_main_interval(
+    hass: HomeAssistant,
+    mock_config_entry,
+) -> None:
+    """Test the deferral budget is the current, not the configured interval."""
+    mock_config_entry.add_to_hass(hass)
+    rest_api = MagicMock(rate_limit=None)
+    main_pacer = FemsPollPacer(30)
+    coordinator = FemsDiagnosticsCoordinator(
+        hass, mock_config_entry, rest_api, main_pacer=main_pacer
+    )
+
+    # 20 s sind mehr als die Hälfte von 30 s ...
+    coordinator.timings.record("cycle", 20)
+    assert coordinator._cycle_budget_at_risk()
+
+    # ... aber nicht von den gestreckten 60 s
+    main_pacer.interval = 60
+    assert not coordinator._cycle_budget_at_risk()
+
+
+async def test_limiter_is_shared_per_host(hass: HomeAssistant) -> None:
+    """Test entries on one host share budgets; REST and Modbus stay separate."""
+    coordinators = []
+    for index in range(2):
+        entry = MockConfigEntry(
+            domain=DOMAIN,
+            data=MOCK_CONFIG,
+            options=MOCK_OPTIONS,
+            entry_id=f"entry-{index}",
+        )
+        entry.add_to_hass(hass)
+        with patch(
+            "custom_components.fems.coordinator.async_get_clientsession",
+            return_value=MagicMock(),
+        ):
+            coordinators.append(FemsDataUpdateCoordinator(hass, entry))
+
+    first, second = coordinators
+    limiter = async_get_rate_limiter(hass, MOCK_CONFIG[CONF_REST_HOST])
+
+    assert first.rest_api.rate_limit is second.rest_api.rate_limit is limiter.rest
+    assert first.modbus_api.rate_limit is second.modbus_api.rate_limit
+    assert limiter.rest is not limiter.modbus
+    assert async_get_rate_limiter(hass, "192.168.11.105") is not limiter
+
+
+async def test_limiter_is_dropped_with_the_last_entry_of_its_host(
+    hass: HomeAssistant,
+    fems_standin: FemsStandin,
+) -> None:
+    """Test a host keeps its limiter until its last entry unloads."""
+    entries = []
+    for index in range(2):
+        entry = MockConfigEntry(
+            domain=DOMAIN,
+            data=fems_standin.config,
+            options=MOCK_OPTIONS,
+            version=2,
+            entry_id=f"entry-{index}",
+        )
+        entry.add_to_hass(hass)
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        entries.append(entry)
+    await hass.async_block_till_done()
+    host = fems_standin.config[CONF_REST_HOST]
+    limiter = async_get_rate_limiter(hass, host)
+
+    assert await hass.config_entries.async_unload(entries[0].entry_id)
+    assert async_get_rate_limiter(hass, host) is limiter
+
+    assert await hass.config_entries.async_unload(entries[1].entry_id)
+    assert DATA_RATE_LIMITERS not in hass.data
@@ -0,0 +1,98 @@
+"""Tests for the FEMS domain refresh scheduler."""
+
+from __future__ import annotations
+
+from datetime import timedelta
+from unittest.mock import MagicMock
+
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.fems.const import DOMAIN
+from custom_components.fems.diagnostics import async_get_config_entry_diagnostics
+from custom_components.fems.scheduler import FemsDomainScheduler, async_get_scheduler
+from tests.components.fems.conftest import MOCK_OPTIONS
+from tests.standin.fixtures import FemsStandin
+
+
+def test_phases_are_spread_evenly() -> None:
+    """Test phases are spaced evenly and refreshes land on their grid."""
+    scheduler = FemsDomainScheduler()
+    slots = [
+        scheduler.async_register(
+            entry_id,
+            name,
+            MagicMock(update_interval=timedelta(seconds=30)),
+            "cycle",
+            "publish",
+        )
+        for entry_id in ("a", "b")
+        for name in ("data", "diagnostics")
+    ]
+    assert [slot.phase for slot in slots] == [0, 0.25, 0.5, 0.75]
+
+    for now in (1000.0, 1007.3, 1029.9):
+        for slot in slots:
+            next_refresh = slot.next_refresh(now, 30)
+            assert 15 <= next_refresh - now <= 45
+            assert round((next_refresh - slot.phase * 30) % 30, 6) in (0, 30)
+
+    # Der Versatz folgt dem eigenen Intervall, wenn der Pacer es streckt
+    slots[1].coordinator.update_interval = timedelta(seconds=60)
+    assert round(slots[1].next_refresh(1000.0, 60) % 60, 6) == 15
+    assert slots[1].as_dict()["offset_s"] == 15
+
+    # Ohne Intervall (z. B. im Soak-Test) bleibt der Bericht gültig
+    slots[0].coordinator.update_interval = None
+    report = slots[0].as_dict()
+    assert report["interval_s"] is None
+    assert report["duty"] is None
+
+    scheduler.async_unregister("a")
+    assert [slot.phase for slot in slots[2:]] == [0, 0.5]
+    assert set(scheduler.as_dict()) == {"b"}
+
+
+async def test_entries_refresh_on_distinct_phases(
+    hass: HomeAssistant,
+    fems_standin: FemsStandin,
+) -> None:
+    """Test two entries are scheduled out of lockstep and report their load."""
+    entries = []
+    for index in range(2):
+        entry = MockConfigEntry(
+            domain=DOMAIN,
+            data=fems_standin.config,
+            options=MOCK_OPTIONS,
+            version=2,
+            entry_id=f"entry-{index}",
+        )
+        entry.add_to_hass(hass)
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        entries.append(entry)
+    await hass.async_block_till_done()
+
+    offsets = set()
+    for entry in entries:
+        coordinator = hass.data[DOMAIN][entry.entry_id]
+        await coordinator.async_refresh()
+        slot = coordinator.schedule_slot
+        interval = coordinator.update_interval.total_seconds()
+        # Der Coordinator plant selbst auf seinem Raster
+        next_refresh = coordinator._phase_timer.when()
+        offset = round((next_refresh - slot.phase * interval) % interval, 3)
+        assert offset in (0, interval)
+        offsets.add(slot.phase)
+    assert len(offsets) == 2
+
+    result = await async_get_config_entry_diagnostics(hass, entries[0])
+    load = result["performance"]["domain_load"]
+    assert set(load) == {"entry-0", "entry-1"}
+    assert [slot["phase"] for slot in load["entry-1"].values()] == [0.5, 0.75]
+    assert load["entry-0"]["data"]["listeners"] > 0
+    assert load["entry-0"]["data"]["cycle_p50_ms"] is not None
+    assert load["entry-0"]["data"]["duty"] < 1
+
+    assert await hass.config_entries.async_unload(entries[0].entry_id)
+    assert set(async_get_scheduler(hass).as_dict()) == {"entry-1"}
+    assert await hass.config_entries.async_unload(entries[1].entry_id)
@@ -2,10 +2,12 @@
 
 from __future__ import annotations
 
+import tracemalloc
 from unittest.mock import AsyncMock, MagicMock, patch
 
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.dispatcher import async_dispatcher_send
 from pytest_homeassistant_custom_component.common import MockConfigEntry
 
 from custom_components.fems.const import (
@@ -20,9 +22,19 @@ from custom_components.fems.const import (
     CONF_REST_PORT,
     CONF_SCAN_INTERVAL,
     CONF_USERNAME,
+    DEFAULT_CELLS_PER_MODULE,
     DOMAIN,
+    SIGNAL_OPTIONS_UPDATED,
+)
+from custom_components.fems.entity import FemsDeviceInfos
+from custom_components.fems.layout import BatteryLayout, CellMatrix
+from custom_components.fems.sensor import (
+    CELL_VOLTAGE_SENSOR,
+    FemsCellVoltageSensorEntity,
+    FemsSensorDescription,
+    FemsSensorEntity,
+    async_setup_entry,
 )
-from custom_components.fems.sensor import async_setup_entry
 
 
 def _build_entry(
@@ -92,6 +104,9 @@ def _build_diagnostics_coordinator(
         rest_data = {}
 
     coordinator.data.rest = rest_data
+    coordinator.data.cells = CellMatrix.from_channels(
+        BatteryLayout(1, battery_module_count), rest_data
+    )
     coordinator.data.modbus = {}
     coordinator.last_update_success = True
     return coordinator
@@ -169,4 +184,180 @@ async def test_only_configured_modules_create_cell_entities(hass: HomeAssistant)
 
     assert any("tower0_module0_cell000_voltage" in unique_id.lower() for unique_id in entity_unique_ids)
     assert any("tower0_module1_cell000_voltage" in unique_id.lower() for unique_id in entity_unique_ids)
-    assert not any("tower0_module2_" in unique_id.lower() for unique_id in entity_unique_ids)
\ No newline at end of file
+    assert not any("tower0_module2_" in unique_id.lower() for unique_id in entity_unique_ids)
+
+
+async def test_options_update_adds_only_new_dynamic_entities(
+    hass: HomeAssistant,
+) -> None:
+    """Test an options change adds entities for new modules only."""
+    entry = _build_entry(enable_cell_voltages=False, battery_module_count=2)
+    entry.add_to_hass(hass)
+
+    hass.data.setdefault(DOMAIN, {})
+    hass.data[DOMAIN][entry.entry_id] = _build_main_coordinator()
+    hass.data[DOMAIN][f"{entry.entry_id}_diagnostics"] = _build_diagnostics_coordinator(
+        battery_module_count=3,
+        include_cell_voltages=True,
+    )
+
+    added_batches = []
+
+    def _capture_add_entities(entities):
+        added_batches.append(list(entities))
+
+    await async_setup_entry(hass, entry, _capture_add_entities)
+
+    hass.config_entries.async_update_entry(
+        entry,
+        options={**entry.options, CONF_BATTERY_MODULE_COUNT: 3},
+    )
+    async_dispatcher_send(hass, SIGNAL_OPTIONS_UPDATED.format(entry.entry_id))
+    await hass.async_block_till_done()
+
+    assert len(added_batches) == 2
+    assert len(added_batches[1]) == 1
+    assert added_batches[1][0].unique_id.endswith("_modul_2_spread")
+
+
+async def test_device_info_is_shared_per_device(hass: HomeAssistant) -> None:
+    """Test entities of the same device share one DeviceInfo object."""
+    entry = _build_entry(enable_cell_voltages=True, battery_module_count=1)
+    entry.add_to_hass(hass)
+
+    main_coordinator = _build_main_coordinator()
+    main_coordinator.entry.entry_id = entry.entry_id
+    diagnostics_coordinator = _build_diagnostics_coordinator(battery_module_count=1)
+    diagnostics_coordinator.entry.entry_id = entry.entry_id
+    main_coordinator.device_infos = diagnostics_coordinator.device_infos = (
+        FemsDeviceInfos(entry.entry_id)
+    )
+
+    hass.data.setdefault(DOMAIN, {})
+    hass.data[DOMAIN][entry.entry_id] = main_coordinator
+    hass.data[DOMAIN][f"{entry.entry_id}_diagnostics"] = diagnostics_coordinator
+
+    added_entities = []
+
+    def _capture_add_entities(entities):
+        added_entities.extend(entities)
+
+    await async_setup_entry(hass, entry, _capture_add_entities)
+
+    entities = {
+        entity.unique_id.removeprefix(f"{entry.entry_id}_"): entity
+        for entity in added_entities
+    }
+
+    soc_device = entities["battery_soc"].device_info
+    assert soc_device is entities["battery_soh"].device_info
+    assert soc_device["identifiers"] == {(DOMAIN, f"{entry.entry_id}_battery")}
+
+    cell_device = entities["tower0_module0_cell000_voltage"].device_info
+    assert cell_device is entities["modul_0_spread"].device_info
+    assert cell_device["via_device"] == (DOMAIN, f"{entry.entry_id}_battery")
+
+
+async def test_restored_values_are_marked_until_live_refresh(
+    hass: HomeAssistant,
+) -> None:
+    """Test entities flag snapshot values until the first live refresh."""
+    entry = _build_entry(enable_cell_voltages=True, battery_module_count=1)
+    entry.add_to_hass(hass)
+
+    main_coordinator = _build_main_coordinator()
+    main_coordinator.entry.entry_id = entry.entry_id
+    main_coordinator.data.stale = True
+    diagnostics_coordinator = _build_diagnostics_coordinator(battery_module_count=1)
+    diagnostics_coordinator.entry.entry_id = entry.entry_id
+    diagnostics_coordinator.data.stale = True
+
+    hass.data.setdefault(DOMAIN, {})
+    hass.data[DOMAIN][entry.entry_id] = main_coordinator
+    hass.data[DOMAIN][f"{entry.entry_id}_diagnostics"] = diagnostics_coordinator
+
+    added_entities = []
+    await async_setup_entry(hass, entry, added_entities.extend)
+    entities = {
+        entity.unique_id.removeprefix(f"{entry.entry_id}_"): entity
+        for entity in added_entities
+    }
+
+    soc = entities["battery_soc"]
+    cell = entities["tower0_module0_cell000_voltage"]
+    assert soc.extra_state_attributes == {"restored": True}
+    assert cell.extra_state_attributes == {"restored": True}
+
+    main_coordinator.data.stale = False
+    assert soc.extra_state_attributes is None
+    assert cell.extra_state_attributes == {"restored": True}
+
+
+FOOTPRINT_MODULE_COUNT = 10
+
+
+def _legacy_cell_voltage_entities(coordinator: MagicMock) -> list[FemsSensorEntity]:
+    """Build cell entities the old way: one description and closure per cell."""
+
+    def _value_fn(module: int, cell: int):
+        rest_key = f"battery0/Tower0Module{module}Cell{cell:03d}Voltage"
+
+        def value_fn(coordinator):
+            return coordinator.data.rest.get(rest_key)
+
+        return value_fn
+
+    return [
+        FemsSensorEntity(
+            coordinator,
+            FemsSensorDescription(
+                key=f"tower0_module{module}_cell{cell:03d}_voltage",
+                translation_key=f"tower0_module{module}_cell{cell:03d}_voltage",
+                native_unit_of_measurement=CELL_VOLTAGE_SENSOR.native_unit_of_measurement,
+                device_class=CELL_VOLTAGE_SENSOR.device_class,
+                state_class=CELL_VOLTAGE_SENSOR.state_class,
+                entity_category=CELL_VOLTAGE_SENSOR.entity_category,
+                entity_registry_enabled_default=False,
+                value_fn=_value_fn(module, cell),
+                available_fn=CELL_VOLTAGE_SENSOR.available_fn,
+            ),
+        )
+        for module in range(FOOTPRINT_MODULE_COUNT)
+        for cell in range(DEFAULT_CELLS_PER_MODULE)
+    ]
+
+
+def _cell_voltage_entities(coordinator: MagicMock) -> list[FemsCellVoltageSensorEntity]:
+    """Build cell entities sharing one description."""
+    return [
+        FemsCellVoltageSensorEntity(coordinator, 0, module, cell)
+        for module in range(FOOTPRINT_MODULE_COUNT)
+        for cell in range(DEFAULT_CELLS_PER_MODULE)
+    ]
+
+
+def _traced_footprint(build) -> int:
+    """Return bytes still allocated after building entities."""
+    coordinator = _build_diagnostics_coordinator(FOOTPRINT_MODULE_COUNT)
+    coordinator.entry.entry_id = "fems-test-entry"
+
+    tracemalloc.start()
+    try:
+        entities = build(coordinator)
+        size, _peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert len(entities) == FOOTPRINT_MODULE_COUNT * DEFAULT_CELLS_PER_MODULE
+    return size // len(entities)
+
+
+def test_cell_voltage_entity_footprint() -> None:
+    """Test shared cell descriptions shrink the per-entity footprint."""
+    legacy_per_entity = _traced_footprint(_legacy_cell_voltage_entities)
+    per_entity = _traced_footprint(_cell_voltage_entities)
+
+    assert per_entity < legacy_per_entity, (
+        f"cell voltage entity footprint at {FOOTPRINT_MODULE_COUNT} modules: "
+        f"before={legacy_per_entity} B, after={per_entity} B"
+    )
@@ -0,0 +1,94 @@
+"""Tests for sampled FEMS request tracing."""
+
+from __future__ import annotations
+
+import asyncio
+import re
+
+import aiohttp
+import pytest
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+from pytest_homeassistant_custom_component.test_util.aiohttp import (
+    AiohttpClientMocker,
+)
+
+from custom_components.fems.const import DOMAIN, SERVICE_DUMP_TRACES
+from custom_components.fems.tracing import FemsRequestTracer
+
+
+def test_tracer_keeps_payloads_only_for_errors_and_samples() -> None:
+    """Test the ring buffer is bounded and payloads are kept selectively."""
+    tracer = FemsRequestTracer(size=3, payload_sample_rate=0, payload_limit=4)
+
+    for index in range(4):
+        tracer.record("rest", f"group{index}", 200, 0.01, 10, "[1, 2, 3]")
+    tracer.record("rest", "broken", 503, 0.02, 10, "Service Unavailable", "HTTP 503")
+
+    traces = tracer.as_list()
+    assert [trace["target"] for trace in traces] == ["group2", "group3", "broken"]
+    assert "payload" not in traces[0]
+    assert traces[-1]["payload"] == "Serv"
+    assert traces[-1]["error"] == "HTTP 503"
+
+    tracer.payload_sample_rate = 1
+    tracer.record("modbus", "input/302/1", "ok", 0.001, 2, [78])
+    assert tracer.as_list()[-1]["payload"] == [78]
+
+
+async def test_dump_traces_service(
+    hass: HomeAssistant,
+    aioclient_mock: AiohttpClientMocker,
+    mock_config_entry: MockConfigEntry,
+    mock_setup_coordinators: None,
+) -> None:
+    """Test failed REST calls are traced with payload and can be dumped."""
+    mock_config_entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(mock_config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    aioclient_mock.get(re.compile(r"/charger0/"), status=503, text="overloaded")
+    coordinator = hass.data[DOMAIN][mock_config_entry.entry_id]
+    with pytest.raises(aiohttp.ClientResponseError):
+        await coordinator.rest_api.async_fetch_group("charger0/ActualPower")
+
+    response = await hass.services.async_call(
+        DOMAIN,
+        SERVICE_DUMP_TRACES,
+        {"config_entry_id": mock_config_entry.entry_id},
+        blocking=True,
+        return_response=True,
+    )
+
+    [trace] = response["traces"]
+    assert trace["kind"] == "rest"
+    assert trace["target"] == "charger0/ActualPower"
+    assert trace["status"] == 503
+    assert trace["bytes"] == len("overloaded")
+    assert trace["payload"] == "overloaded"
+
+    assert await hass.config_entries.async_unload(mock_config_entry.entry_id)
+
+
+async def test_cancelled_request_is_traced(
+    hass: HomeAssistant,
+    aioclient_mock: AiohttpClientMocker,
+    mock_config_entry: MockConfigEntry,
+    mock_setup_coordinators: None,
+) -> None:
+    """Test a REST call cancelled by the collection timeout still leaves a trace."""
+    mock_config_entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(mock_config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    aioclient_mock.get(re.compile(r"/charger0/"), exc=asyncio.CancelledError())
+    coordinator = hass.data[DOMAIN][mock_config_entry.entry_id]
+    with pytest.raises(asyncio.CancelledError):
+        await coordinator.rest_api.async_fetch_group("charger0/ActualPower")
+
+    [trace] = coordinator.rest_api.tracer.as_list()
+    assert trace["target"] == "charger0/ActualPower"
+    assert trace["status"] == "cancelled"
+    assert trace["error"] == "CancelledError()"
+
+    assert await hass.config_entries.async_unload(mock_config_entry.entry_id)
@@ -12,6 +12,18 @@ ROOT = Path(__file__).resolve().parent.parent
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
+pytest_plugins = ["tests.standin.fixtures"]
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    """Register command line options of the FEMS test suite."""
+    parser.addoption(
+        "--soak-cycles",
+        type=int,
+        default=0,
+        help="Run the soak test in tests/soak for this many update cycles.",
+    )
+
 
 @pytest.fixture(autouse=True)
 def auto_enable_custom_integrations(enable_custom_integrations):
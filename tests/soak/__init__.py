@@ -0,0 +1 @@
+"""Soak tests for the FEMS integration."""
@@ -0,0 +1,158 @@
+"""Resource sampling for long FEMS soak runs."""
+
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+import os
+from pathlib import Path
+import resource
+import tracemalloc
+
+MIB = 1024 * 1024
+
+# Erlaubtes Wachstum zwischen Basislinie (nach dem Warmlauf) und Ende
+MAX_RSS_GROWTH = 32 * MIB
+MAX_TRACED_GROWTH = 4 * MIB
+MAX_TASK_GROWTH = 0
+MAX_SOCKET_GROWTH = 2
+MAX_LOOP_LAG = 0.5
+
+LAG_PROBE_INTERVAL = 0.05
+TOP_ALLOCATIONS = 10
+
+
+@dataclass(frozen=True)
+class SoakSample:
+    """Resource usage after one cycle."""
+
+    cycle: int
+    rss: int
+    traced: int
+    tasks: int
+    sockets: int | None
+    loop_lag: float
+
+
+def _rss_bytes() -> int:
+    """Return the resident set size of this process."""
+    statm = Path("/proc/self/statm")
+    if statm.exists():
+        return int(statm.read_text().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    # Kein procfs (macOS): nur der Spitzenwert ist verfügbar
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _open_sockets() -> int | None:
+    """Return the number of open sockets, or None without procfs."""
+    fd_dir = Path("/proc/self/fd")
+    if not fd_dir.exists():
+        return None
+
+    sockets = 0
+    for fd in fd_dir.iterdir():
+        try:
+            if os.readlink(fd).startswith("socket:"):
+                sockets += 1
+        except OSError:
+            continue
+    return sockets
+
+
+class SoakMonitor:
+    """Sample RSS, traced memory, tasks, sockets and loop lag over a run."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop) -> None:
+        self._loop = loop
+        self._lag_task: asyncio.Task | None = None
+        self._lag_max = 0.0
+        self._started_tracemalloc = False
+        self._baseline_snapshot: tracemalloc.Snapshot | None = None
+        self.baseline: SoakSample | None = None
+        self.samples: list[SoakSample] = []
+
+    async def async_start(self) -> None:
+        """Start tracemalloc and the loop lag probe."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(1)
+            self._started_tracemalloc = True
+        self._lag_task = self._loop.create_task(self._async_probe_lag())
+
+    async def async_stop(self) -> None:
+        """Stop probing."""
+        if self._lag_task is not None:
+            self._lag_task.cancel()
+            await asyncio.gather(self._lag_task, return_exceptions=True)
+            self._lag_task = None
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+
+    async def _async_probe_lag(self) -> None:
+        """Measure how late a short sleep wakes up."""
+        while True:
+            start = self._loop.time()
+            await asyncio.sleep(LAG_PROBE_INTERVAL)
+            lag = self._loop.time() - start - LAG_PROBE_INTERVAL
+            self._lag_max = max(self._lag_max, lag)
+
+    def sample(self, cycle: int) -> SoakSample:
+        """Record current usage; loop lag is the maximum since the last sample."""
+        current = SoakSample(
+            cycle=cycle,
+            rss=_rss_bytes(),
+            traced=tracemalloc.get_traced_memory()[0],
+            # Der Lag-Probe-Task selbst wird nicht mitgezählt
+            tasks=len(asyncio.all_tasks(self._loop)) - 1,
+            sockets=_open_sockets(),
+            loop_lag=self._lag_max,
+        )
+        self._lag_max = 0.0
+        self.samples.append(current)
+        return current
+
+    def set_baseline(self, cycle: int) -> SoakSample:
+        """Sample and remember the state after the warm-up."""
+        self.baseline = self.sample(cycle)
+        self._baseline_snapshot = tracemalloc.take_snapshot()
+        return self.baseline
+
+    def growth_failures(self) -> list[str]:
+        """Compare the last sample with the baseline and list violations."""
+        assert self.baseline is not None and self.samples
+        base = self.baseline
+        last = self.samples[-1]
+        failures: list[str] = []
+
+        if last.rss - base.rss > MAX_RSS_GROWTH:
+            failures.append(
+                f"RSS grew by {(last.rss - base.rss) / MIB:.1f} MiB "
+                f"between cycle {base.cycle} and {last.cycle}"
+            )
+        if last.traced - base.traced > MAX_TRACED_GROWTH:
+            failures.append(
+                f"Traced memory grew by {(last.traced - base.traced) / MIB:.1f} MiB"
+            )
+        if last.tasks - base.tasks > MAX_TASK_GROWTH:
+            failures.append(f"Task count grew from {base.tasks} to {last.tasks}")
+        if (
+            base.sockets is not None
+            and last.sockets is not None
+            and last.sockets - base.sockets > MAX_SOCKET_GROWTH
+        ):
+            failures.append(f"Open sockets grew from {base.sockets} to {last.sockets}")
+
+        worst_lag = max(sample.loop_lag for sample in self.samples)
+        if worst_lag > MAX_LOOP_LAG:
+            failures.append(f"Event loop lagged {worst_lag * 1000:.0f} ms")
+
+        return failures
+
+    def top_allocations(self) -> list[str]:
+        """Return the allocation sites that grew most since the baseline."""
+        if self._baseline_snapshot is None or not tracemalloc.is_tracing():
+            return []
+
+        stats = tracemalloc.take_snapshot().compare_to(
+            self._baseline_snapshot, "lineno"
+        )
+        return [str(stat) for stat in stats[:TOP_ALLOCATIONS]]
@@ -0,0 +1,104 @@
+"""Soak test running the coordinators against the stand-ins for many cycles.
+
+Skipped unless a cycle count is given, e.g.::
+
+    pytest tests/soak --soak-cycles 200000
+
+Cycles run back to back instead of waiting for the poll interval; one
+cycle against the local stand-ins takes a few hundred milliseconds, so a
+month of polling at the default interval (~90000 cycles) runs overnight.
+"""
+
+from __future__ import annotations
+
+import logging
+
+import pytest
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.fems.const import DOMAIN
+from tests.components.fems.conftest import MOCK_OPTIONS
+from tests.soak.monitor import SoakMonitor
+from tests.standin.fixtures import FemsStandin
+
+WARMUP_CYCLES = 20
+# Diese Logger schreiben jeden Zyklus (Debug, Fehlerinjektion); pytest würde
+# alle Records bis zum Testende aufheben und so selbst ein Leck erzeugen.
+QUIET_LOGGERS = (
+    "aiohttp.access",
+    "asyncio",
+    "custom_components.fems",
+    "pymodbus",
+)
+SAMPLES = 50
+DIAGNOSTICS_EVERY = 2
+
+
+async def test_soak_resources_stay_flat(
+    hass: HomeAssistant,
+    fems_standin: FemsStandin,
+    request: pytest.FixtureRequest,
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    """Test memory, tasks, sockets and loop lag do not grow over a long run."""
+    cycles = request.config.getoption("--soak-cycles")
+    if not cycles:
+        pytest.skip("pass --soak-cycles N to run the soak test")
+
+    caplog.set_level(logging.WARNING)
+    for logger in QUIET_LOGGERS:
+        caplog.set_level(logging.CRITICAL, logger)
+
+    # Fehlerpfade (HTTP-Fehler, Modbus-Exceptions) gehören zum Dauerbetrieb
+    fems_standin.rest.faults.error_rate = 0.02
+    fems_standin.modbus.faults.error_rate = 0.01
+
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data=fems_standin.config,
+        options=MOCK_OPTIONS,
+        version=2,
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    diagnostics_coordinator = hass.data[DOMAIN][f"{entry.entry_id}_diagnostics"]
+    # Der Test treibt die Zyklen selbst; keine überlappenden Timer-Refreshes
+    coordinator.update_interval = None
+    diagnostics_coordinator.update_interval = None
+    # Zyklen laufen ohne Pause; der Token Bucket würde sie auf Echtzeit bremsen
+    coordinator.rest_api.rate_limit = None
+    coordinator.modbus_api.rate_limit = None
+
+    # Lazy Caches (Registry, Übersetzungen, Zustandsobjekte) vor der Basislinie füllen
+    warmup = min(max(WARMUP_CYCLES, cycles // 10), cycles)
+    sample_every = max((cycles - warmup) // SAMPLES, 1)
+    monitor = SoakMonitor(hass.loop)
+    await monitor.async_start()
+
+    try:
+        for cycle in range(1, cycles + 1):
+            await coordinator.async_refresh()
+            if cycle % DIAGNOSTICS_EVERY == 0:
+                await diagnostics_coordinator.async_refresh()
+            await hass.async_block_till_done()
+
+            if cycle == warmup:
+                monitor.set_baseline(cycle)
+            elif cycle > warmup and (
+                cycle % sample_every == 0 or cycle == cycles
+            ):
+                monitor.sample(cycle)
+
+        failures = monitor.growth_failures() if cycles > warmup else []
+        report = monitor.top_allocations()
+    finally:
+        await monitor.async_stop()
+
+    assert not failures, "\n".join([*failures, "Top allocation growth:", *report])
+    assert coordinator.last_update_success
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
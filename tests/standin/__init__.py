@@ -0,0 +1 @@
+"""Local FEMS stand-in servers for offline benchmarks and soak tests."""
@@ -0,0 +1,189 @@
+"""Synthetic OpenEMS REST channels and Modbus registers."""
+
+from __future__ import annotations
+
+import json
+import math
+import struct
+import time
+from typing import Any
+
+from custom_components.fems.const import (
+    DEFAULT_CELLS_PER_MODULE,
+    MODBUS_FLOAT32_HOLDING_REGISTERS,
+    MODBUS_FLOAT64_HOLDING_REGISTERS,
+    MODBUS_UINT16_INPUT_REGISTERS,
+)
+
+BATTERY_CHANNELS: dict[str, Any] = {
+    "Soc": 78,
+    "Soh": 96,
+    "Current": -12,
+    "Voltage": 364,
+    "Tower0PackVoltage": 3645,
+    "Tower0NoOfCycles": 123,
+    "Capacity": 10200,
+    "State": 0,
+    "StateMachine": 1,
+    "StartStop": 1,
+    "RunFailed": 0,
+    "ModbusCommunicationFailed": 0,
+    "MinCellVoltage": 3280,
+    "MaxCellVoltage": 3290,
+    "MinCellTemperature": 18,
+    "MaxCellTemperature": 21,
+    "Tower0MinCellVoltage": 3280,
+    "Tower0MaxCellVoltage": 3290,
+    "Tower0MinTemperature": 180,
+    "Tower0MaxTemperature": 210,
+    "StatusFault": 0,
+    "StatusWarning": 0,
+    "StatusAlarm": 0,
+    "Tower0StatusFault": 0,
+    "Tower0StatusWarning": 0,
+    "Tower0StatusAlarm": 0,
+}
+
+CHARGER_CHANNELS: dict[str, Any] = {
+    "ActualPower": 2450,
+    "Voltage": 412000,
+    "Current": 5900,
+}
+
+
+def channel_item(address: str, value: Any) -> dict[str, Any]:
+    """Return one channel as OpenEMS reports it."""
+    return {
+        "address": address,
+        "type": "INTEGER",
+        "accessMode": "RO",
+        "text": "",
+        "unit": "",
+        "value": value,
+    }
+
+
+def cell_voltage_channels(
+    module_count: int = 10,
+    tower_count: int = 1,
+    cells_per_module: int = DEFAULT_CELLS_PER_MODULE,
+) -> dict[str, int]:
+    """Return synthetic cell voltages for all towers and modules."""
+    return {
+        f"battery0/Tower{tower}Module{module}Cell{cell:03d}Voltage": 3280 + (cell % 7)
+        for tower in range(tower_count)
+        for module in range(module_count)
+        for cell in range(cells_per_module)
+    }
+
+
+def battery_channels() -> dict[str, Any]:
+    """Return the main coordinator battery channels."""
+    return {f"battery0/{name}": value for name, value in BATTERY_CHANNELS.items()}
+
+
+def charger_channels(charger: int) -> dict[str, Any]:
+    """Return the channels of one charger."""
+    return {
+        f"charger{charger}/{name}": value for name, value in CHARGER_CHANNELS.items()
+    }
+
+
+def rest_body(channels: dict[str, Any]) -> str:
+    """Serialize channels as an OpenEMS REST response body."""
+    return json.dumps(
+        [channel_item(address, value) for address, value in channels.items()]
+    )
+
+
+def _float32_registers(value: float) -> list[int]:
+    """Encode a float32 as two big-endian registers."""
+    return list(struct.unpack(">HH", struct.pack(">f", value)))
+
+
+def _float64_registers(value: float) -> list[int]:
+    """Encode a float64 as four big-endian registers."""
+    return list(struct.unpack(">HHHH", struct.pack(">d", value)))
+
+
+def modbus_registers() -> dict[int, list[int]]:
+    """Return raw registers for the full Modbus register map."""
+    registers: dict[int, list[int]] = {}
+
+    for index, address in enumerate(MODBUS_UINT16_INPUT_REGISTERS.values()):
+        registers[address] = [78 + index]
+
+    for index, address in enumerate(MODBUS_FLOAT32_HOLDING_REGISTERS.values()):
+        registers[address] = _float32_registers(1000.5 + index)
+
+    for index, address in enumerate(MODBUS_FLOAT64_HOLDING_REGISTERS.values()):
+        registers[address] = _float64_registers(123456.789 + index)
+
+    return registers
+
+
+class FemsDeviceModel:
+    """Plausible, time-varying FEMS state shared by REST and Modbus stand-ins."""
+
+    def __init__(
+        self,
+        module_count: int = 7,
+        charger_count: int = 2,
+        clock=time.monotonic,
+        tower_count: int = 1,
+        cells_per_module: int = DEFAULT_CELLS_PER_MODULE,
+    ) -> None:
+        self.module_count = module_count
+        self.tower_count = tower_count
+        self.cells_per_module = cells_per_module
+        self.charger_count = charger_count
+        self._clock = clock
+        self._start = clock()
+
+    def _phase(self) -> float:
+        """Return elapsed time scaled to a slow oscillation."""
+        return (self._clock() - self._start) / 60
+
+    def rest_channels(self) -> dict[str, Any]:
+        """Return all REST channels keyed by OpenEMS address."""
+        phase = self._phase()
+        pv_power = max(0, round(3000 + 2500 * math.sin(phase)))
+        soc = 50 + round(30 * math.sin(phase / 10))
+
+        channels = battery_channels()
+        channels["battery0/Soc"] = soc
+        channels["battery0/Current"] = round(-20 * math.sin(phase))
+
+        for charger in range(self.charger_count):
+            channels.update(charger_channels(charger))
+            channels[f"charger{charger}/ActualPower"] = pv_power // self.charger_count
+
+        for address, value in cell_voltage_channels(
+            self.module_count, self.tower_count, self.cells_per_module
+        ).items():
+            channels[address] = value + round(5 * math.sin(phase + len(address)))
+
+        return channels
+
+    def modbus_registers(self) -> dict[int, int]:
+        """Return a sparse register map (address -> register value)."""
+        phase = self._phase()
+        values: dict[str, float] = {
+            "ess_soc": 50 + round(30 * math.sin(phase / 10)),
+        }
+        for index, key in enumerate(MODBUS_FLOAT32_HOLDING_REGISTERS):
+            values[key] = 1000 * math.sin(phase + index)
+        for index, key in enumerate(MODBUS_FLOAT64_HOLDING_REGISTERS):
+            values[key] = 100000 + (self._clock() - self._start) * (index + 1)
+
+        sparse: dict[int, int] = {}
+        for key, address in MODBUS_UINT16_INPUT_REGISTERS.items():
+            sparse[address] = int(values[key])
+        for key, address in MODBUS_FLOAT32_HOLDING_REGISTERS.items():
+            for offset, register in enumerate(_float32_registers(values[key])):
+                sparse[address + offset] = register
+        for key, address in MODBUS_FLOAT64_HOLDING_REGISTERS.items():
+            for offset, register in enumerate(_float64_registers(values[key])):
+                sparse[address + offset] = register
+
+        return sparse
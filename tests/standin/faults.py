@@ -0,0 +1,53 @@
+"""Latency and failure injection for the FEMS stand-in servers."""
+
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass, field
+import random
+
+
+@dataclass
+class FaultProfile:
+    """Configurable network and device misbehaviour.
+
+    The profile is mutable so a test can degrade or recover the stand-in
+    while the coordinators keep polling.
+    """
+
+    latency: float = 0.0
+    jitter: float = 0.0
+    drop_rate: float = 0.0
+    error_rate: float = 0.0
+    error_status: int = 503
+    seed: int | None = None
+    requests: int = 0
+    dropped: int = 0
+    errors: int = 0
+    _random: random.Random = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self._random = random.Random(self.seed)
+
+    async def async_delay(self) -> None:
+        """Sleep for the configured latency plus jitter."""
+        self.requests += 1
+        delay = self.latency
+        if self.jitter:
+            delay += self._random.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def should_drop(self) -> bool:
+        """Return True if the current request should lose its connection."""
+        if self.drop_rate and self._random.random() < self.drop_rate:
+            self.dropped += 1
+            return True
+        return False
+
+    def should_fail(self) -> bool:
+        """Return True if the current request should get an error response."""
+        if self.error_rate and self._random.random() < self.error_rate:
+            self.errors += 1
+            return True
+        return False
@@ -0,0 +1,64 @@
+"""Pytest fixtures starting the FEMS stand-in servers."""
+
+from __future__ import annotations
+
+from collections.abc import AsyncGenerator
+from dataclasses import dataclass
+from typing import Any
+
+import pytest
+
+from custom_components.fems.const import (
+    CONF_BATTERY_MODULE_COUNT,
+    CONF_MODBUS_HOST,
+    CONF_MODBUS_PORT,
+    CONF_MODBUS_SLAVE,
+    CONF_PASSWORD,
+    CONF_REST_HOST,
+    CONF_REST_PORT,
+    CONF_USERNAME,
+    DEFAULT_MODBUS_SLAVE,
+)
+from tests.standin.channels import FemsDeviceModel
+from tests.standin.faults import FaultProfile
+from tests.standin.modbus import FemsModbusStandin
+from tests.standin.rest import FemsRestStandin
+
+
+@dataclass
+class FemsStandin:
+    """Running REST and Modbus stand-ins sharing one device model."""
+
+    model: FemsDeviceModel
+    rest: FemsRestStandin
+    modbus: FemsModbusStandin
+
+    @property
+    def config(self) -> dict[str, Any]:
+        """Return config entry data pointing at the stand-ins."""
+        return {
+            CONF_REST_HOST: self.rest.host,
+            CONF_REST_PORT: self.rest.port,
+            CONF_MODBUS_HOST: self.modbus.host,
+            CONF_MODBUS_PORT: self.modbus.port,
+            CONF_MODBUS_SLAVE: DEFAULT_MODBUS_SLAVE,
+            CONF_BATTERY_MODULE_COUNT: self.model.module_count,
+            CONF_USERNAME: "x",
+            CONF_PASSWORD: "user",
+        }
+
+
+@pytest.fixture
+async def fems_standin(socket_enabled: None) -> AsyncGenerator[FemsStandin]:
+    """Start REST and Modbus stand-ins with independent fault profiles."""
+    model = FemsDeviceModel()
+    rest = FemsRestStandin(model, FaultProfile(seed=1))
+    modbus = FemsModbusStandin(model, FaultProfile(seed=2))
+
+    await rest.async_start()
+    await modbus.async_start()
+    try:
+        yield FemsStandin(model=model, rest=rest, modbus=modbus)
+    finally:
+        await modbus.async_stop()
+        await rest.async_stop()
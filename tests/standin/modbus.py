@@ -0,0 +1,107 @@
+"""pymodbus stand-in exposing the FEMS register map."""
+
+from __future__ import annotations
+
+from pymodbus.constants import ExcCodes
+from pymodbus.datastore import ModbusServerContext
+from pymodbus.datastore.context import ModbusBaseDeviceContext
+from pymodbus.server import ModbusTcpServer
+
+from custom_components.fems.const import (
+    MODBUS_FLOAT32_HOLDING_REGISTERS,
+    MODBUS_FLOAT64_HOLDING_REGISTERS,
+    MODBUS_UINT16_INPUT_REGISTERS,
+)
+from tests.standin.channels import FemsDeviceModel
+from tests.standin.faults import FaultProfile
+
+_INPUT_REGISTERS = 4
+_HOLDING_REGISTERS = 3
+
+_INPUT_ADDRESSES = frozenset(MODBUS_UINT16_INPUT_REGISTERS.values())
+_HOLDING_ADDRESSES = frozenset(
+    [
+        *(
+            address + offset
+            for address in MODBUS_FLOAT32_HOLDING_REGISTERS.values()
+            for offset in range(2)
+        ),
+        *(
+            address + offset
+            for address in MODBUS_FLOAT64_HOLDING_REGISTERS.values()
+            for offset in range(4)
+        ),
+    ]
+)
+
+
+class _FemsDeviceContext(ModbusBaseDeviceContext):
+    """Device context reading live values from the model."""
+
+    def __init__(self, standin: FemsModbusStandin) -> None:
+        self._standin = standin
+
+    def reset(self) -> None:
+        """Nothing to reset; values are computed on read."""
+
+    async def async_getValues(  # noqa: N802
+        self, func_code: int, address: int, count: int = 1
+    ) -> list[int] | ExcCodes:
+        faults = self._standin.faults
+        await faults.async_delay()
+
+        if faults.should_drop():
+            self._standin.drop_connections()
+            return ExcCodes.GATEWAY_NO_RESPONSE
+
+        if faults.should_fail():
+            return ExcCodes.DEVICE_FAILURE
+
+        if func_code == _INPUT_REGISTERS:
+            known = _INPUT_ADDRESSES
+        elif func_code == _HOLDING_REGISTERS:
+            known = _HOLDING_ADDRESSES
+        else:
+            return ExcCodes.ILLEGAL_FUNCTION
+
+        addresses = range(address, address + count)
+        if any(item not in known for item in addresses):
+            return ExcCodes.ILLEGAL_ADDRESS
+
+        registers = self._standin.model.modbus_registers()
+        return [registers[item] for item in addresses]
+
+
+class FemsModbusStandin:
+    """Modbus TCP server serving the register map from const.py."""
+
+    def __init__(
+        self,
+        model: FemsDeviceModel,
+        faults: FaultProfile | None = None,
+    ) -> None:
+        self.model = model
+        self.faults = faults or FaultProfile()
+        self.host = "127.0.0.1"
+        self.port = 0
+        self._server: ModbusTcpServer | None = None
+
+    async def async_start(self) -> None:
+        """Start listening on a free local port."""
+        context = ModbusServerContext(devices=_FemsDeviceContext(self), single=True)
+        self._server = ModbusTcpServer(context, address=(self.host, 0))
+        await self._server.serve_forever(background=True)
+        self.port = self._server.transport.sockets[0].getsockname()[1]
+
+    async def async_stop(self) -> None:
+        """Stop the server."""
+        if self._server is not None:
+            await self._server.shutdown()
+            self._server = None
+
+    def drop_connections(self) -> None:
+        """Close every open client connection."""
+        if self._server is None:
+            return
+        for connection in list(self._server.active_connections.values()):
+            connection.close()
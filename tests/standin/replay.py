@@ -0,0 +1,213 @@
+"""Replay of recorded FEMS traffic for offline tests and profiling."""
+
+from __future__ import annotations
+
+import asyncio
+from collections import defaultdict, deque
+from pathlib import Path
+from typing import Any
+
+import aiohttp
+from multidict import CIMultiDict, CIMultiDictProxy
+from yarl import URL
+
+from custom_components.fems.capture import (
+    KIND_MODBUS,
+    KIND_REST,
+    MODBUS_OK,
+    TrafficFrame,
+    modbus_key,
+    read_frames,
+    unpack_registers,
+)
+from custom_components.fems.const import DOMAIN
+from custom_components.fems.coordinator import FemsDataUpdateCoordinator
+
+
+async def async_attach_replay(
+    coordinator: FemsDataUpdateCoordinator, replay: FemsTrafficReplay
+) -> None:
+    """Serve all requests of a coordinator from a recorded capture."""
+    # Die bisherige Modbus-Verbindung nicht offen zurücklassen
+    await coordinator.modbus_api.async_close()
+    coordinator.rest_api = coordinator._create_rest_api(replay.rest_session())
+    coordinator.modbus_api = coordinator._create_modbus_api(replay.modbus_client())
+
+    # Der Diagnose-Coordinator teilt sich den REST-Client
+    diagnostics = coordinator.hass.data.get(DOMAIN, {}).get(
+        f"{coordinator.entry.entry_id}_diagnostics"
+    )
+    if diagnostics is not None:
+        diagnostics.rest_api = coordinator.rest_api
+
+
+class FemsTrafficReplay:
+    """Feed a capture file back into the FEMS API clients.
+
+    Responses are returned in recorded order per request key. With
+    ``speed`` > 0 every response is held back until its recorded offset
+    divided by ``speed`` has passed; ``speed=0`` replays as fast as possible.
+    """
+
+    def __init__(self, frames: list[TrafficFrame], speed: float = 1.0) -> None:
+        """Initialize replay."""
+        self.speed = speed
+        self.frames = len(frames)
+        self._origin = frames[0].timestamp if frames else 0.0
+        self._start: float | None = None
+        self._queues: dict[tuple[int, str], deque[TrafficFrame]] = defaultdict(deque)
+        for frame in frames:
+            self._queues[(frame.kind, frame.key)].append(frame)
+
+    @classmethod
+    async def async_load(
+        cls,
+        path: str | Path,
+        speed: float = 1.0,
+    ) -> FemsTrafficReplay:
+        """Load a capture file without blocking the event loop."""
+        frames = await asyncio.get_running_loop().run_in_executor(
+            None, read_frames, path
+        )
+        return cls(frames, speed)
+
+    @property
+    def remaining(self) -> int:
+        """Return the number of frames not yet replayed."""
+        return sum(len(queue) for queue in self._queues.values())
+
+    async def async_next(self, kind: int, key: str) -> TrafficFrame | None:
+        """Return the next recorded response for a request."""
+        queue = self._queues.get((kind, key))
+        if not queue:
+            return None
+
+        frame = queue.popleft()
+        if self.speed > 0:
+            loop = asyncio.get_running_loop()
+            if self._start is None:
+                self._start = loop.time()
+            delay = (frame.timestamp - self._origin) / self.speed - (
+                loop.time() - self._start
+            )
+            if delay > 0:
+                await asyncio.sleep(delay)
+        return frame
+
+    def rest_session(self) -> ReplayRestSession:
+        """Return a session replacement for FemsRestApi."""
+        return ReplayRestSession(self)
+
+    def modbus_client(self) -> ReplayModbusClient:
+        """Return a client replacement for FemsModbusApi."""
+        return ReplayModbusClient(self)
+
+
+class _ReplayRestResponse:
+    """Recorded REST response with the aiohttp surface FemsRestApi uses."""
+
+    def __init__(self, url: str, status: int, text: str) -> None:
+        self.url = URL(url)
+        self.status = status
+        self.headers = CIMultiDictProxy(
+            CIMultiDict({"Content-Type": "application/json"})
+        )
+        self._text = text
+
+    async def __aenter__(self) -> _ReplayRestResponse:
+        return self
+
+    async def __aexit__(self, *args: Any) -> None:
+        return None
+
+    async def text(self) -> str:
+        return self._text
+
+    async def read(self) -> bytes:
+        return self._text.encode()
+
+    def raise_for_status(self) -> None:
+        if self.status >= 400:
+            raise aiohttp.ClientResponseError(
+                aiohttp.RequestInfo(self.url, "GET", self.headers, self.url),
+                (),
+                status=self.status,
+            )
+
+
+class _PendingReplayRequest:
+    """Async context manager resolving the next recorded REST response."""
+
+    def __init__(self, replay: FemsTrafficReplay, url: str) -> None:
+        self._replay = replay
+        self._url = url
+
+    async def __aenter__(self) -> _ReplayRestResponse:
+        channel_group = self._url.split("/rest/channel/", 1)[-1]
+        frame = await self._replay.async_next(KIND_REST, channel_group)
+        if frame is None:
+            raise aiohttp.ClientConnectionError(
+                f"No recorded response left for {channel_group}"
+            )
+        return _ReplayRestResponse(self._url, frame.status, frame.body.decode())
+
+    async def __aexit__(self, *args: Any) -> None:
+        return None
+
+
+class ReplayRestSession:
+    """Stand-in for aiohttp.ClientSession serving recorded responses."""
+
+    def __init__(self, replay: FemsTrafficReplay) -> None:
+        self._replay = replay
+
+    def get(self, url: str, **kwargs: Any) -> _PendingReplayRequest:
+        return _PendingReplayRequest(self._replay, url)
+
+
+class _ReplayModbusResponse:
+    """Recorded Modbus response with the pymodbus surface FemsModbusApi uses."""
+
+    def __init__(self, registers: list[int], error: bool) -> None:
+        self.registers = registers
+        self._error = error
+
+    def isError(self) -> bool:  # noqa: N802
+        return self._error
+
+
+class ReplayModbusClient:
+    """Stand-in for AsyncModbusTcpClient serving recorded registers."""
+
+    def __init__(self, replay: FemsTrafficReplay) -> None:
+        self._replay = replay
+        self.connected = False
+
+    async def connect(self) -> bool:
+        self.connected = True
+        return True
+
+    def close(self) -> None:
+        self.connected = False
+
+    async def _async_read(
+        self, function: str, address: int, count: int
+    ) -> _ReplayModbusResponse:
+        frame = await self._replay.async_next(
+            KIND_MODBUS, modbus_key(function, address, count)
+        )
+        if frame is None:
+            raise ConnectionError(f"No recorded response left for {function}/{address}")
+        return _ReplayModbusResponse(
+            unpack_registers(frame.body), frame.status != MODBUS_OK
+        )
+
+    async def read_input_registers(
+        self, address: int, count: int = 1, **kwargs: Any
+    ) -> _ReplayModbusResponse:
+        return await self._async_read("input", address, count)
+
+    async def read_holding_registers(
+        self, address: int, count: int = 1, **kwargs: Any
+    ) -> _ReplayModbusResponse:
+        return await self._async_read("holding", address, count)
@@ -0,0 +1,80 @@
+"""aiohttp stand-in for the OpenEMS REST channel API."""
+
+from __future__ import annotations
+
+import re
+
+from aiohttp import BasicAuth, web
+
+from tests.standin.channels import FemsDeviceModel, channel_item
+from tests.standin.faults import FaultProfile
+
+
+class FemsRestStandin:
+    """Serve ``/rest/channel/<component>/<channel>`` like a FEMS does."""
+
+    def __init__(
+        self,
+        model: FemsDeviceModel,
+        faults: FaultProfile | None = None,
+        username: str = "x",
+        password: str = "user",
+    ) -> None:
+        self.model = model
+        self.faults = faults or FaultProfile()
+        self._auth = BasicAuth(username, password)
+        self._runner: web.AppRunner | None = None
+        self.host = "127.0.0.1"
+        self.port = 0
+
+    async def async_start(self) -> None:
+        """Start listening on a free local port."""
+        app = web.Application()
+        app.router.add_get("/rest/channel/{path:.+}", self._handle_channel)
+        self._runner = web.AppRunner(app, handle_signals=False)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, 0)
+        await site.start()
+        self.port = self._runner.addresses[0][1]
+
+    async def async_stop(self) -> None:
+        """Stop the server."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _handle_channel(self, request: web.Request) -> web.StreamResponse:
+        """Answer one channel query."""
+        await self.faults.async_delay()
+
+        if self.faults.should_drop():
+            if request.transport is not None:
+                request.transport.close()
+            return web.Response(status=500)
+
+        if self.faults.should_fail():
+            return web.Response(status=self.faults.error_status, text="Error")
+
+        auth = request.headers.get("Authorization")
+        if auth is None or BasicAuth.decode(auth) != self._auth:
+            return web.Response(status=401)
+
+        component, _, channel = request.match_info["path"].partition("/")
+        try:
+            component_re = re.compile(component)
+            channel_re = re.compile(channel)
+        except re.error:
+            return web.Response(status=400, text="Invalid pattern")
+
+        channels = self.model.rest_channels()
+        components = {address.split("/", 1)[0] for address in channels}
+        if not any(component_re.fullmatch(name) for name in components):
+            return web.Response(status=404, text="Component not found")
+
+        items = []
+        for address, value in channels.items():
+            name, _, channel_id = address.partition("/")
+            if component_re.fullmatch(name) and channel_re.fullmatch(channel_id):
+                items.append(channel_item(address, value))
+
+        return web.json_response(items)
@@ -0,0 +1,105 @@
+"""Tests for the FEMS stand-in servers and coordinators running against them."""
+
+from __future__ import annotations
+
+from unittest.mock import MagicMock, patch
+
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.fems.const import DEFAULT_CELLS_PER_MODULE, DOMAIN
+from custom_components.fems.coordinator import FemsDataUpdateCoordinator
+from custom_components.fems.diagnostics_coordinator import FemsDiagnosticsCoordinator
+from tests.components.fems.conftest import MOCK_OPTIONS
+from tests.standin.fixtures import FemsStandin
+
+
+def _build_coordinators(
+    hass: HomeAssistant,
+    fems_standin: FemsStandin,
+) -> tuple[FemsDataUpdateCoordinator, FemsDiagnosticsCoordinator]:
+    """Create both coordinators pointing at the stand-ins."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data=fems_standin.config,
+        options=MOCK_OPTIONS,
+        version=2,
+    )
+    entry.add_to_hass(hass)
+
+    coordinator = FemsDataUpdateCoordinator(hass, entry)
+    coordinator.snapshot_store = MagicMock()
+    diagnostics_coordinator = FemsDiagnosticsCoordinator(
+        hass,
+        entry,
+        coordinator.rest_api,
+    )
+    diagnostics_coordinator.snapshot_store = MagicMock()
+    return coordinator, diagnostics_coordinator
+
+
+async def test_coordinators_read_standin(
+    hass: HomeAssistant,
+    fems_standin: FemsStandin,
+) -> None:
+    """Test both coordinators fetch complete data from the stand-ins."""
+    coordinator, diagnostics_coordinator = _build_coordinators(hass, fems_standin)
+
+    data = await coordinator._async_update_data()
+    diagnostics = await diagnostics_coordinator._async_update_data()
+
+    assert "battery0/Soc" in data.rest
+    assert "charger1/ActualPower" in data.rest
+    assert data.modbus["ess_soc"] is not None
+    assert None not in data.modbus.values()
+    assert len(diagnostics.rest) == fems_standin.model.module_count * DEFAULT_CELLS_PER_MODULE
+
+
+async def test_coordinator_keeps_partial_data_on_rest_errors(
+    hass: HomeAssistant,
+    fems_standin: FemsStandin,
+) -> None:
+    """Test REST error responses leave Modbus data intact."""
+    coordinator, _ = _build_coordinators(hass, fems_standin)
+    fems_standin.rest.faults.error_rate = 1.0
+
+    data = await coordinator._async_update_data()
+
+    assert data.rest == {}
+    assert data.modbus["ess_soc"] is not None
+    assert fems_standin.rest.faults.errors == 2
+
+
+async def test_coordinator_survives_dropped_modbus_connections(
+    hass: HomeAssistant,
+    fems_standin: FemsStandin,
+) -> None:
+    """Test dropped Modbus connections fail only the Modbus part of a cycle."""
+    coordinator, _ = _build_coordinators(hass, fems_standin)
+    fems_standin.modbus.faults.drop_rate = 1.0
+
+    with patch("custom_components.fems.coordinator.MODBUS_TIMEOUT", 0.5):
+        data = await coordinator._async_update_data()
+
+    assert "battery0/Soc" in data.rest
+    assert data.modbus == {}
+    assert fems_standin.modbus.faults.dropped > 0
+
+    fems_standin.modbus.faults.drop_rate = 0.0
+    data = await coordinator._async_update_data()
+
+    assert None not in data.modbus.values()
+
+
+async def test_rest_latency_is_applied(
+    hass: HomeAssistant,
+    fems_standin: FemsStandin,
+) -> None:
+    """Test configured latency delays REST responses."""
+    coordinator, _ = _build_coordinators(hass, fems_standin)
+    fems_standin.rest.faults.latency = 0.2
+
+    start = hass.loop.time()
+    await coordinator.rest_api.async_fetch_group("charger0/(ActualPower)")
+
+    assert hass.loop.time() - start >= 0.2